@@ -0,0 +1,104 @@
+# 점수 모델(감정 가중치 / 녹지 유형 프로파일) 레지스트리
+# - scoring_model.json 을 한 번 읽어서 행렬(튜플)로 컴파일 → 요청마다 dict 재생성 X
+# - 파일 수정 시각을 주기적으로 확인해서 워커 재시작 없이 다시 로드 (hot reload)
+from typing import Dict, Tuple, Optional
+from dotenv import load_dotenv
+from pathlib import Path
+import json, math, os, threading, time
+
+load_dotenv()
+
+MODEL_PATH = Path(os.getenv("SCORING_MODEL_PATH", Path(__file__).parent / "scoring_model.json"))
+RELOAD_CHECK_INTERVAL = 5  # 파일 변경 확인 주기(초)
+
+
+class CompiledModel:
+    """버전 + 가중치 행렬 (감정 E × 지표 D, 녹지 유형 C × 지표 D)"""
+    __slots__ = ("version", "dims", "dim_labels", "emotions", "emotion_matrix",
+                 "categories", "category_matrix", "category_norms", "emotion_weights")
+
+    def __init__(self, spec: Dict):
+        self.version = str(spec["version"])
+        self.dims = tuple(spec["dims"])
+        self.dim_labels = tuple(spec.get("dim_labels", {}).get(d, d) for d in self.dims)
+
+        self.emotions = tuple(spec["emotion_weights"].keys())
+        self.emotion_matrix = tuple(tuple(float(x) for x in row) for row in spec["emotion_weights"].values())
+
+        self.categories = tuple(spec["category_profiles"].keys())
+        self.category_matrix = tuple(tuple(float(x) for x in row) for row in spec["category_profiles"].values())
+        self.category_norms = tuple(math.sqrt(sum(x * x for x in row)) for row in self.category_matrix)
+
+        for row in self.emotion_matrix + self.category_matrix:
+            if len(row) != len(self.dims):
+                raise ValueError(f"가중치 길이가 지표 수({len(self.dims)})와 다릅니다: {row}")
+
+        # 기존 dict 형태 조회용 (한 번만 생성)
+        self.emotion_weights = {
+            emo: dict(zip(self.dims, row)) for emo, row in zip(self.emotions, self.emotion_matrix)
+        }
+
+    def blend(self, emotion_levels: Dict[str, int]) -> Tuple[float, ...]:
+        """감정 강도(1~5)로 가중 평균한 지표 가중치 벡터(합=1). 감정이 없으면 균등"""
+        n = len(self.dims)
+        levels = [int(emotion_levels.get(emo, 0) or 0) for emo in self.emotions]
+        total = sum(lv for lv in levels if lv > 0)
+        if total == 0:
+            return tuple(1.0 / n for _ in range(n))
+
+        agg = [0.0] * n
+        for lv, row in zip(levels, self.emotion_matrix):
+            if lv > 0:
+                contrib = lv / total
+                for i in range(n):
+                    agg[i] += row[i] * contrib
+        s = sum(agg)
+        return tuple((a / s if s > 0 else 0.0) for a in agg)
+
+
+_lock = threading.Lock()
+_model: Optional[CompiledModel] = None
+_loaded_mtime = 0.0
+_last_check = 0.0
+
+
+def _load(path: Path) -> CompiledModel:
+    with open(path, encoding="utf-8") as f:
+        return CompiledModel(json.load(f))
+
+
+def reload_model(force: bool = True) -> str:
+    """모델 파일 다시 로드. 파일이 잘못됐으면 기존 모델 유지"""
+    global _model, _loaded_mtime, _last_check
+    with _lock:
+        _last_check = time.time()
+        mtime = MODEL_PATH.stat().st_mtime
+        if _model is not None and not force and mtime == _loaded_mtime:
+            return _model.version
+        try:
+            model = _load(MODEL_PATH)
+        except Exception as e:
+            if _model is None:
+                raise
+            print(f"[WARN] 점수 모델 로드 실패, 기존 버전({_model.version}) 유지 : {e}")
+            return _model.version
+        if _model is None or model.version != _model.version:
+            print(f"[INFO] 점수 모델 로드 : {model.version}")
+        _model, _loaded_mtime = model, mtime
+        return _model.version
+
+
+def get_model() -> CompiledModel:
+    """현재 모델 반환 (RELOAD_CHECK_INTERVAL 마다 파일 변경 확인)"""
+    if _model is None or time.time() - _last_check > RELOAD_CHECK_INTERVAL:
+        try:
+            reload_model(force=False)
+        except OSError as e:
+            if _model is None:
+                raise
+            print(f"[WARN] 점수 모델 파일 확인 실패 : {e}")
+    return _model
+
+
+def model_version() -> str:
+    return get_model().version
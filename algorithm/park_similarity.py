@@ -0,0 +1,211 @@
+# "이 공원과 비슷한 공원" - 5지표(Nature, Convenience, Safety, Activity, Social) 벡터 최근접 이웃 인덱스
+# - 지표를 표준화(z-score) 후 코사인 유사도, 이웃 공원의 Coverage(신뢰도)를 곱함 (추천 점수와 같은 방식)
+# - 공원별 상위 PRECOMPUTED_K 이웃을 미리 계산 → 거리 조건 없는 조회는 리스트 슬라이스만
+# - 거리 가중/반경 조건이 있으면 정규화 벡터(N x 5) 한 번 곱 + 거리 벡터 계산 (공원 수천 개 기준 수십 us)
+# - tb_parks_score 갱신(notify_scores_reloaded) 시 백그라운드에서 다시 만들고, 끝나면 통째 교체
+from typing import Dict, Any, List, Optional
+import threading, time
+import numpy as np
+from algorithm.parks_algorithm import get_db_connection, on_scores_reloaded, current_snapshot
+
+INDICATORS = ("Nature", "Convenience", "Safety", "Activity", "Social")
+PRECOMPUTED_K = 50          # 공원별로 미리 저장할 이웃 수
+DISTANCE_SCALE_KM = 10.0    # 거리 가중 시 이 거리 이상이면 거리 점수 0
+BUILD_BLOCK = 512           # 이웃 계산 시 한 번에 곱할 행 수 (N x N 행렬 전체를 만들지 않음)
+
+INDEX_SQL = f"""
+    SELECT s.ParkID, p.Park, {", ".join("s." + c for c in INDICATORS)}, s.Coverage, p.Latitude, p.Longitude
+    FROM tb_parks_score s
+    JOIN tb_parks p ON s.ParkID = p.ID
+"""
+
+
+def _haversine_km(lat: float, lon: float, lats: np.ndarray, lons: np.ndarray) -> np.ndarray:
+    lat1, lon1 = np.radians(lat), np.radians(lon)
+    lat2, lon2 = np.radians(lats), np.radians(lons)
+    a = np.sin((lat2 - lat1) / 2) ** 2 + np.cos(lat1) * np.cos(lat2) * np.sin((lon2 - lon1) / 2) ** 2
+    return 6371 * 2 * np.arcsin(np.sqrt(np.clip(a, 0, 1)))
+
+
+class SimilarityIndex:
+    """한 번 만들면 바뀌지 않는 인덱스 (교체는 ParkSimilarity 가 참조를 바꿔서)"""
+    def __init__(self, rows: List[Dict[str, Any]]):
+        n = len(rows)
+        self.ids = np.array([int(r["ParkID"]) for r in rows], dtype=np.int64)
+        self.names = [r["Park"] for r in rows]
+        self.position = {int(pid): i for i, pid in enumerate(self.ids)}
+        self.lats = np.array([float(r["Latitude"] or 0) for r in rows])
+        self.lons = np.array([float(r["Longitude"] or 0) for r in rows])
+        self.coverage = np.array([float(r["Coverage"]) if r["Coverage"] is not None else 0.0 for r in rows])
+
+        # 결측 지표는 평균(= 표준화 후 0)으로
+        x = np.array([[np.nan if r[c] is None else float(r[c]) for c in INDICATORS] for r in rows]).reshape(n, len(INDICATORS))
+        counts = np.maximum((~np.isnan(x)).sum(axis=0), 1)
+        mean = np.nansum(x, axis=0) / counts
+        std = np.sqrt(np.nansum((x - mean) ** 2, axis=0) / counts)
+        z = np.nan_to_num((x - mean) / np.where(std > 0, std, 1))
+        norms = np.linalg.norm(z, axis=1, keepdims=True)
+        self.vectors = (z / np.where(norms > 0, norms, 1)).astype(np.float32)
+
+        # 공원별 상위 이웃 미리 계산 (블록 단위)
+        k = min(PRECOMPUTED_K, max(n - 1, 0))
+        self.neighbors = np.zeros((n, k), dtype=np.int32)
+        self.neighbor_scores = np.zeros((n, k), dtype=np.float32)
+        for start in range(0, n, BUILD_BLOCK):
+            block = self._scores(self.vectors[start:start + BUILD_BLOCK])
+            rows_idx = np.arange(block.shape[0])
+            block[rows_idx, start + rows_idx] = -np.inf  # 자기 자신 제외
+            if k == 0:
+                continue
+            top = np.argpartition(-block, k - 1, axis=1)[:, :k]
+            top_scores = np.take_along_axis(block, top, axis=1)
+            order = np.argsort(-top_scores, axis=1, kind="stable")
+            self.neighbors[start:start + len(block)] = np.take_along_axis(top, order, axis=1)
+            self.neighbor_scores[start:start + len(block)] = np.take_along_axis(top_scores, order, axis=1)
+
+    def _scores(self, query_vectors: np.ndarray) -> np.ndarray:
+        """코사인 유사도 x 이웃 Coverage"""
+        return (query_vectors @ self.vectors.T) * self.coverage[None, :].astype(np.float32)
+
+    def __len__(self):
+        return len(self.ids)
+
+    def similar(self, park_id: int, k: int = 6, distance_weight: float = 0.0,
+                max_km: Optional[float] = None) -> Optional[List[Dict[str, Any]]]:
+        """
+        park_id 와 비슷한 공원 k개. 없는 공원이면 None
+        distance_weight : 0 = 지표만, 1 = 거리만 (점수 = (1-w) * 유사도 + w * 가까움)
+        max_km          : 이 거리 안의 공원만
+        """
+        i = self.position.get(park_id)
+        if i is None:
+            return None
+
+        if distance_weight <= 0 and max_km is None and k <= self.neighbors.shape[1]:
+            idx = self.neighbors[i, :k]
+            sims = scores = self.neighbor_scores[i, :k]
+            distances = _haversine_km(self.lats[i], self.lons[i], self.lats[idx], self.lons[idx])
+        else:
+            all_distances = _haversine_km(self.lats[i], self.lons[i], self.lats, self.lons)
+            sims = self._scores(self.vectors[i:i + 1])[0]
+            closeness = 1 - np.minimum(all_distances / DISTANCE_SCALE_KM, 1)
+            scores = (1 - distance_weight) * sims + distance_weight * closeness
+            scores[i] = -np.inf
+            if max_km is not None:
+                scores[all_distances > max_km] = -np.inf
+            k = min(k, int(np.isfinite(scores).sum()))
+            if k <= 0:
+                return []
+            idx = np.argpartition(-scores, k - 1)[:k]
+            idx = idx[np.argsort(-scores[idx], kind="stable")]
+            sims, scores, distances = sims[idx], scores[idx], all_distances[idx]
+
+        return [
+            {
+                "ID": int(self.ids[j]),
+                "Park": self.names[j],
+                "similarity": round(float(sim), 4),
+                "score": round(float(score), 4),
+                "distance_km": round(float(dist), 2),
+            }
+            for j, sim, score, dist in zip(idx.tolist(), sims.tolist(), scores.tolist(), distances.tolist())
+        ]
+
+
+class ParkSimilarity:
+    def __init__(self):
+        self._index: Optional[SimilarityIndex] = None
+        self._lock = threading.Lock()
+        self._rebuilding = False
+        self.built_at = None
+        self.build_ms = None
+        self.rebuilds = 0
+
+    def build(self) -> SimilarityIndex:
+        snapshot = current_snapshot()
+        if snapshot is not None:
+            rows = snapshot.score_rows()  # 공원 스냅샷이 있으면 DB 조회 생략
+        else:
+            conn = get_db_connection()
+            try:
+                with conn.cursor() as cur:
+                    cur.execute(INDEX_SQL)
+                    rows = cur.fetchall()
+            finally:
+                conn.close()
+        t0 = time.perf_counter()
+        index = SimilarityIndex(rows)
+        self.build_ms = round((time.perf_counter() - t0) * 1000, 1)
+        self._index, self.built_at = index, time.time()
+        print(f"[INFO] 유사 공원 인덱스 : 공원 {len(index)}개, {self.build_ms}ms")
+        return index
+
+    def index(self) -> SimilarityIndex:
+        index = self._index
+        if index is None:
+            with self._lock:
+                index = self._index or self.build()
+        return index
+
+    def similar(self, park_id: int, **kwargs) -> Optional[List[Dict[str, Any]]]:
+        return self.index().similar(park_id, **kwargs)
+
+    def rebuild_async(self):
+        """점수 갱신 시 호출 — 새 인덱스를 만드는 동안에는 기존 인덱스로 응답"""
+        if self._index is None:
+            return  # 아직 한 번도 안 만들었으면 첫 요청 때 생성
+        with self._lock:
+            if self._rebuilding:
+                return
+            self._rebuilding = True
+
+        def run():
+            try:
+                with self._lock:
+                    self.build()
+                self.rebuilds += 1
+            except Exception as e:
+                print(f"[WARN] 유사 공원 인덱스 재생성 실패, 기존 인덱스 유지 : {e}")
+            finally:
+                self._rebuilding = False
+
+        threading.Thread(target=run, name="park-similarity-rebuild", daemon=True).start()
+
+    def stats(self) -> Dict[str, Any]:
+        index = self._index
+        return {"parks": 0 if index is None else len(index), "built_at": self.built_at,
+                "build_ms": self.build_ms, "rebuilds": self.rebuilds}
+
+
+park_similarity = ParkSimilarity()
+on_scores_reloaded(park_similarity.rebuild_async)
+
+
+# 벤치마크 : python -m algorithm.park_similarity --parks 3000
+if __name__ == "__main__":
+    import argparse, random, statistics
+
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--parks", type=int, default=3000)
+    parser.add_argument("-n", type=int, default=20000)
+    args = parser.parse_args()
+
+    random.seed(0)
+    rows = [{"ParkID": i, "Park": f"공원{i}", "Coverage": random.choice([0.4, 0.6, 0.8, 1.0]),
+             "Latitude": 37.45 + random.random() * 0.25, "Longitude": 126.8 + random.random() * 0.4,
+             **{c: (None if random.random() < 0.05 else random.random()) for c in INDICATORS}}
+            for i in range(args.parks)]
+    t0 = time.perf_counter()
+    index = SimilarityIndex(rows)
+    print(f"build : {args.parks} parks, {(time.perf_counter() - t0) * 1000:.1f} ms")
+
+    for name, kwargs in (("indicators only", {}), ("distance_weight=0.3", {"distance_weight": 0.3}),
+                         ("max_km=3", {"max_km": 3.0})):
+        samples = []
+        for _ in range(args.n // 10):
+            pid = random.randrange(args.parks)
+            t = time.perf_counter()
+            index.similar(pid, k=6, **kwargs)
+            samples.append((time.perf_counter() - t) * 1e6)
+        samples.sort()
+        print(f"{name:<22} median={statistics.median(samples):7.1f} us  p99={samples[int(len(samples) * 0.99)]:7.1f} us")
@@ -1,25 +1,121 @@
-from typing import Dict, Any, List
+from typing import Dict, Any, List, Optional, Tuple
 import pymysql
 from dotenv import load_dotenv
 import os 
+import math, json, time, uuid, base64, threading
+import numpy as np
+from algorithm.model_registry import get_model
 
 load_dotenv()
 
-def get_db_connection():
-    """DB 연결 생성"""
+# DB 연결 함수 / 공원 스냅샷 - 서버(backend)는 시작 시 configure() 로 replica 라우팅/SQL 계측이 들어간 연결과
+# 공원 스냅샷(mmap) 조회 함수를 넣어 줌
+# (algorithm 패키지는 backend 를 import 하지 않음. 스크립트 단독 실행 시에는 .env 로 직접 연결, 스냅샷 없음)
+_connect = None
+_snapshot = None
+
+def configure(connect=None, snapshot=None):
+    """
+    connect(**pymysql 옵션) → DB-API 연결 (공원 검색은 읽기 전용)
+    snapshot() → 현재 공원 스냅샷 (없으면 None). 있으면 후보 공원 검색/유사 공원 인덱스가 DB 대신 스냅샷 배열 사용
+    """
+    global _connect, _snapshot
+    _connect = connect
+    _snapshot = snapshot
+
+def current_snapshot():
+    return _snapshot() if _snapshot is not None else None
+
+def get_db_connection(**kwargs):
+    """DB 연결 생성 (기본 DictCursor)"""
+    kwargs.setdefault("cursorclass", pymysql.cursors.DictCursor)
+    if _connect is not None:
+        return _connect(**kwargs)
     return pymysql.connect(
         host=os.getenv("DB_HOST"),
-        port=int(os.getenv("DB_PORT")),
+        port=int(os.getenv("DB_PORT", 3306)),
         user=os.getenv("DB_USER"),
         password=os.getenv("DB_PASSWORD"),
         db=os.getenv("DB_NAME"),
         charset=os.getenv("DB_CHARSET", "utf8mb4"),
-        cursorclass=pymysql.cursors.DictCursor
+        **kwargs
     )
 
 
+# 공원 점수(tb_parks_score) 재적재 알림 - 점수를 쓰는 캐시/인덱스 무효화용
+_reload_callbacks = []
+
+def on_scores_reloaded(callback):
+    """점수 재적재 시 호출할 함수 등록"""
+    _reload_callbacks.append(callback)
+
+def notify_scores_reloaded():
+    """tb_parks_score 갱신 후 호출 → 등록된 캐시 모두 무효화"""
+    for callback in list(_reload_callbacks):
+        try:
+            callback()
+        except Exception as e:
+            print(f"[WARN] 점수 재적재 콜백 실패 : {e}")
+
+
+# -----------------------------
+# 스냅샷 후보 검색 (DB 쿼리와 같은 행/순서)
+# -----------------------------
+INDICATOR_COLUMNS = ("Nature", "Convenience", "Safety", "Activity", "Social")
+
+class SnapshotGeo:
+    """스냅샷 하나의 점수 있는 공원 좌표 (라디안, 위도순) → 위도 띠만 잘라서 거리 계산"""
+    def __init__(self, snapshot):
+        self.snapshot = snapshot
+        idx = np.nonzero(snapshot.has_score.astype(bool) & ~np.isnan(snapshot.lat) & ~np.isnan(snapshot.lon))[0]
+        lat = np.radians(snapshot.lat[idx])
+        order = np.argsort(lat, kind="stable")
+        self.rows = idx[order]
+        self.lat = lat[order]
+        self.lon = np.radians(snapshot.lon[self.rows])
+        self.cos_lat, self.sin_lat = np.cos(self.lat), np.sin(self.lat)
+
+    def nearby(self, latitude, longitude, radius_km: float, limit: Optional[int] = None) -> List[Dict[str, Any]]:
+        """반경 안 공원 (거리순, 같은 거리는 ID 순) - parks_and_scores_in_5km 과 같은 형식"""
+        lat1, lon1 = math.radians(float(latitude)), math.radians(float(longitude))
+        band = radius_km / 6371
+        lo, hi = np.searchsorted(self.lat, (lat1 - band, lat1 + band))
+        cos_d = (math.cos(lat1) * self.cos_lat[lo:hi] * np.cos(self.lon[lo:hi] - lon1)
+                 + math.sin(lat1) * self.sin_lat[lo:hi])
+        dist = 6371 * np.arccos(np.clip(cos_d, -1, 1))
+        keep = np.nonzero(dist <= radius_km)[0]
+        rows, dist = self.rows[lo:hi][keep], dist[keep]
+        order = np.lexsort((self.snapshot.ids[rows], dist))[:limit]
+        return [self._row(int(i), float(d)) for i, d in zip(rows[order].tolist(), dist[order].tolist())]
+
+    def _row(self, i: int, distance: float) -> Dict[str, Any]:
+        snap = self.snapshot
+        coverage = float(snap.coverage[i])
+        return {"ParkID": int(snap.ids[i]), "Park": snap.string(i, "Park"),
+                **{c: (None if v != v else v) for c, v in zip(INDICATOR_COLUMNS, snap.indicators[i].tolist())},
+                "Coverage": None if coverage != coverage else coverage,
+                "Latitude": float(snap.lat[i]), "Longitude": float(snap.lon[i]), "distance": distance}
+
+
+_geo: Optional[SnapshotGeo] = None
+
+def snapshot_geo() -> Optional[SnapshotGeo]:
+    """현재 스냅샷의 좌표 인덱스 (스냅샷이 바뀌면 다시 만듦). 스냅샷이 없으면 None → DB 검색"""
+    global _geo
+    snapshot = current_snapshot()
+    if snapshot is None:
+        return None
+    geo = _geo
+    if geo is None or geo.snapshot is not snapshot:
+        geo = _geo = SnapshotGeo(snapshot)
+    return geo
+
 
 def parks_and_scores_in_5km(latitude, longitude):
+    geo = snapshot_geo()
+    if geo is not None:
+        return geo.nearby(latitude, longitude, 5)
+
     conn = get_db_connection()
 
     # 사용자 현재 위치부터 반경 5km이내 공원 가져오는 SELECT문 (python코드로 걸러내는 것 보다 이게 빠름)
@@ -51,40 +147,85 @@ def parks_and_scores_in_5km(latitude, longitude):
     return parks_list
 
 
-# 감정 가중치(연구 기반)
+# -----------------------------
+# 적응형 반경 검색 (k-최근접)
+# -----------------------------
+# 후보가 k개 모일 때까지 반경을 넓혀가며 검색 (외곽: 결과 0개 방지, 도심: 후보 수 제한)
+SEARCH_RADII_KM = (1, 2, 3, 5, 8, 13, 20)
+DEFAULT_K = 30                # 목표 후보 수
+DEFAULT_MAX_CANDIDATES = 60   # 점수 계산할 최대 후보 수
+
+def parks_and_scores_adaptive(latitude, longitude, k: int = DEFAULT_K,
+                              max_candidates: int = DEFAULT_MAX_CANDIDATES,
+                              radii=SEARCH_RADII_KM) -> Tuple[List[Dict[str, Any]], float]:
+    """
+    반경을 radii 순서대로 넓히면서 k개 이상 모이면 중단.
+    거리순 상위 max_candidates개만 반환 → (공원 리스트, 사용한 반경 km)
+    """
+    geo = snapshot_geo()
+    if geo is not None:
+        parks_list, radius = [], 0
+        for radius in radii:
+            parks_list = geo.nearby(latitude, longitude, radius, max_candidates)
+            if len(parks_list) >= k:
+                break
+        return parks_list, radius
+
+    conn = get_db_connection()
+
+    # 위경도 박스로 먼저 거른 뒤 haversine 계산 (Latitude/Longitude 인덱스 사용 가능)
+    query = """
+        SELECT 
+            s.ParkID,
+            p.Park,
+            s.Nature, s.Convenience, s.Safety, s.Activity, s.Social, s.Coverage,
+            p.Latitude, p.Longitude,
+            (6371 * ACOS(LEAST(1, 
+                COS(RADIANS(%s)) * COS(RADIANS(p.latitude)) *
+                COS(RADIANS(p.longitude) - RADIANS(%s)) +
+                SIN(RADIANS(%s)) * SIN(RADIANS(p.latitude))
+            ))) AS distance
+        FROM tb_parks_score s
+        JOIN tb_parks p ON s.ParkID = p.ID
+        WHERE p.Latitude BETWEEN %s AND %s
+          AND p.Longitude BETWEEN %s AND %s
+        HAVING distance <= %s
+        ORDER BY distance
+        LIMIT %s;
+        """
+
+    parks_list, radius = [], 0
+    try:
+        cur = conn.cursor()
+        for radius in radii:
+            dlat = radius / 111.0
+            dlon = radius / (111.0 * max(math.cos(math.radians(float(latitude))), 0.01))
+            cur.execute(query, (latitude, longitude, latitude,
+                                latitude - dlat, latitude + dlat,
+                                longitude - dlon, longitude + dlon,
+                                radius, max_candidates))
+            parks_list = cur.fetchall()
+            if len(parks_list) >= k:
+                break
+        cur.close()
+    finally:
+        conn.close()
+
+    return parks_list, radius
+
+
+# 감정 가중치(연구 기반) - scoring_model.json 에서 한 번 컴파일된 값 사용
 def get_emotion_base_weights() -> Dict[str, Dict[str, float]]:
     # 5지표 합=1 (정규화)
-    return {
-        "불안":   {"Nature": 0.20, "Convenience": 0.25, "Safety": 0.40, "Activity": 0.05, "Social": 0.10},
-        "우울":   {"Nature": 0.45, "Convenience": 0.25, "Safety": 0.20, "Activity": 0.10, "Social": 0.00},
-        "스트레스":{"Nature": 0.30, "Convenience": 0.15, "Safety": 0.05, "Activity": 0.50, "Social": 0.00},
-        "행복":   {"Nature": 0.25, "Convenience": 0.15, "Safety": 0.05, "Activity": 0.30, "Social": 0.25},
-        "에너지": {"Nature": 0.35, "Convenience": 0.20, "Safety": 0.10, "Activity": 0.30, "Social": 0.05},
-        "성취감": {"Nature": 0.20, "Convenience": 0.25, "Safety": 0.15, "Activity": 0.35, "Social": 0.05},
-    }
+    return get_model().emotion_weights
 
 def blend_emotion_weights(emotion_levels: Dict[str, int]) -> Dict[str, float]:
     """
     저장된 5지표(Nature/Convenience/Safety/Activity/Social)에 적용할 통합 가중치(합=1) 생성.
     emotion_levels: {"우울":1~5, "불안":1~5, ...} (0은 미고려)
     """
-    base = get_emotion_base_weights()
-    dims = ['Nature', 'Convenience', 'Safety', 'Activity', 'Social']
-
-    levels = {k: int(emotion_levels.get(k, 0)) for k in base.keys()}
-    active = {k: v for k, v in levels.items() if v > 0}
-    if not active:
-        return {d: (1.0/len(dims)) for d in dims}
-
-    total = sum(active.values())
-    agg = {d: 0.0 for d in dims}
-    for emo, lv in active.items():
-        contrib = lv / total
-        for d in dims:
-            agg[d] += base[emo][d] * contrib
-
-    s = sum(agg.values())
-    return {d: (agg[d]/s if s > 0 else 0.0) for d in dims}
+    model = get_model()
+    return dict(zip(model.dims, model.blend(emotion_levels)))
 
 # 점수화된 공원 추천
 def score_with_stored_indicators(park: Dict[str, Any], weights: Dict[str, float]) -> Dict[str, float]:
@@ -110,18 +251,14 @@ def score_with_stored_indicators(park: Dict[str, Any], weights: Dict[str, float]
 
     return {
         "raw_score": None if raw is None else round(raw, 3),
-        'Coverage': None if raw is None else round(Coverage, 3),
+        'Coverage': None if raw is None or not isinstance(Coverage, (int,float)) else round(Coverage, 3),
         "final_score": None if final is None else round(final, 3)
     }
 
-# 최종 추천 로직 (유저 위도,경도, 마음 상태 받기)
-def recommend_from_scored_parks(latitude, longitude, emotion_levels: Dict[str, int],
-                                top_n: int = 6,
-                                return_weights: bool = True) -> Dict[str, Any]:
-    
-    parks_scored = parks_and_scores_in_5km(latitude, longitude)
+# 후보 공원 점수화 + 정렬 (DB 접근 없음)
+def rank_scored_parks(parks_scored: List[Dict[str, Any]], emotion_levels: Dict[str, int]) -> List[Dict[str, Any]]:
     weights = blend_emotion_weights(emotion_levels)
-    
+
     results = []
     for p in parks_scored:
         s = score_with_stored_indicators(p, weights)
@@ -133,6 +270,139 @@ def recommend_from_scored_parks(latitude, longitude, emotion_levels: Dict[str, i
             "final_score": s["final_score"], # 최종 점수
         })
     # 점수 높은 순으로 정리
-    ranked = sorted(results, key=lambda x: (x["final_score"] is not None, x["final_score"]), reverse=True)
+    return sorted(results, key=lambda x: (x["final_score"] is not None, x["final_score"]), reverse=True)
+
+# 최종 추천 로직 (유저 위도,경도, 마음 상태 받기)
+def recommend_from_scored_parks(latitude, longitude, emotion_levels: Dict[str, int],
+                                top_n: int = 6,
+                                return_weights: bool = True) -> Dict[str, Any]:
+    
+    parks_scored = parks_and_scores_in_5km(latitude, longitude)
+    ranked = rank_scored_parks(parks_scored, emotion_levels)
     final_result = ranked[:top_n]
-    return final_result
\ No newline at end of file
+    return final_result
+
+
+# -----------------------------
+# 적응형 반경 추천 + 페이지네이션(cursor)
+# -----------------------------
+RANKING_TTL = 600  # 정렬 결과 보관 시간(초)
+MAX_RANKINGS = 1000  # 보관할 정렬 결과 최대 개수 (넘으면 오래된 것부터 삭제)
+MAX_CURSOR_OFFSET = 1000
+MAX_PAGE_SIZE = 50
+MAX_EMOTION_LEVEL = 5   # 감정 수준 0 ~ 5
+MAX_EMOTIONS = 20       # cursor 에 넣는 감정 항목 최대 개수
+_rankings: Dict[str, Tuple[float, List[Dict[str, Any]], float]] = {}  # token -> (만료시각, 정렬결과, 반경)
+_rankings_lock = threading.Lock()
+
+def _clear_rankings():
+    with _rankings_lock:
+        _rankings.clear()
+
+on_scores_reloaded(_clear_rankings)
+
+def _encode_cursor(payload: Dict[str, Any]) -> str:
+    raw = json.dumps(payload, ensure_ascii=False, separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+def _is_number(v) -> bool:
+    return isinstance(v, (int, float)) and not isinstance(v, bool) and math.isfinite(v)
+
+def _decode_cursor(cursor: str) -> Dict[str, Any]:
+    """cursor → {t, o, n, lat, lon, e}. 형식/범위가 맞지 않으면 ValueError (라우터에서 400)"""
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        c = json.loads(raw)
+    except Exception:
+        raise ValueError("잘못된 cursor 입니다.")
+    if not isinstance(c, dict):
+        raise ValueError("잘못된 cursor 입니다.")
+    t, o, n, e = c.get("t"), c.get("o"), c.get("n"), c.get("e")
+    if not isinstance(t, str) or not 0 < len(t) <= 32:
+        raise ValueError("잘못된 cursor 입니다. (t)")
+    if not isinstance(o, int) or isinstance(o, bool) or not 0 <= o <= MAX_CURSOR_OFFSET:
+        raise ValueError("잘못된 cursor 입니다. (o)")
+    if n is not None and (not isinstance(n, int) or isinstance(n, bool) or not 1 <= n <= MAX_PAGE_SIZE):
+        raise ValueError("잘못된 cursor 입니다. (n)")
+    if not _is_number(c.get("lat")) or not -90 <= c["lat"] <= 90 \
+            or not _is_number(c.get("lon")) or not -180 <= c["lon"] <= 180:
+        raise ValueError("잘못된 cursor 입니다. (lat/lon)")
+    if not _valid_emotions(e):
+        raise ValueError("잘못된 cursor 입니다. (e)")
+    return c
+
+def _valid_emotions(e) -> bool:
+    return isinstance(e, dict) and len(e) <= MAX_EMOTIONS and \
+        all(isinstance(k, str) and isinstance(v, int) and not isinstance(v, bool) and 0 <= v <= MAX_EMOTION_LEVEL
+            for k, v in e.items())
+
+def _check_first_page(latitude, longitude, emotion_levels, top_n):
+    """첫 요청 검증 - 다음 요청에서 _decode_cursor 가 거부할 cursor 를 만들지 않도록 같은 기준. 어긋나면 ValueError"""
+    if not isinstance(top_n, int) or isinstance(top_n, bool) or not 1 <= top_n <= MAX_PAGE_SIZE:
+        raise ValueError(f"top_n 은 1 ~ {MAX_PAGE_SIZE} 사이여야 합니다.")
+    if not _is_number(latitude) or not -90 <= latitude <= 90 or not _is_number(longitude) or not -180 <= longitude <= 180:
+        raise ValueError("위도/경도 범위가 잘못되었습니다.")
+    if not _valid_emotions(emotion_levels):
+        raise ValueError(f"감정 수준은 0 ~ {MAX_EMOTION_LEVEL} 사이 정수여야 합니다. (최대 {MAX_EMOTIONS}개)")
+
+def _store_ranking(ranked: List[Dict[str, Any]], radius: float) -> str:
+    now = time.time()
+    token = uuid.uuid4().hex[:16]
+    with _rankings_lock:
+        # 만료된 정렬 결과 정리
+        for t in [t for t, (exp, _, _) in _rankings.items() if exp < now]:
+            del _rankings[t]
+        # 개수 제한 (dict 는 넣은 순서 → 오래된 것부터)
+        while len(_rankings) >= MAX_RANKINGS:
+            del _rankings[next(iter(_rankings))]
+        _rankings[token] = (now + RANKING_TTL, ranked, radius)
+    return token
+
+def recommend_parks_adaptive(latitude, longitude, emotion_levels: Dict[str, int],
+                             top_n: int = 6, cursor: Optional[str] = None,
+                             k: int = DEFAULT_K,
+                             max_candidates: int = DEFAULT_MAX_CANDIDATES) -> Dict[str, Any]:
+    """
+    반경을 넓혀가며 후보 k개 확보 → 상위 max_candidates개만 점수화.
+    cursor가 있으면 저장된 정렬 결과에서 다음 페이지만 잘라서 반환 (재계산 X).
+    cursor에는 위치/감정도 들어있어서 다른 워커로 가도(정렬 결과 없음) 다시 계산 후 이어서 반환.
+    """
+    offset = 0
+    ranked = None
+    token = None
+    radius = None
+    if cursor:
+        c = _decode_cursor(cursor)
+        token, offset = c["t"], c["o"]
+        latitude, longitude, emotion_levels = c["lat"], c["lon"], c["e"]
+        top_n = c.get("n") or top_n
+        with _rankings_lock:
+            entry = _rankings.get(token)
+        if entry and entry[0] >= time.time():
+            _, ranked, radius = entry
+    else:
+        _check_first_page(latitude, longitude, emotion_levels, top_n)
+
+    if ranked is None:
+        parks_scored, radius = parks_and_scores_adaptive(latitude, longitude, k=k, max_candidates=max_candidates)
+        ranked = rank_scored_parks(parks_scored, emotion_levels)
+        # 다음 페이지가 있을 때만 보관 (한 페이지로 끝나는 요청은 저장할 필요 없음)
+        if offset + top_n < len(ranked):
+            token = _store_ranking(ranked, radius)
+
+    page = ranked[offset:offset + top_n]
+    next_offset = offset + top_n
+    next_cursor = None
+    if next_offset < len(ranked):
+        next_cursor = _encode_cursor({
+            "t": token, "o": next_offset, "n": top_n,
+            "lat": latitude, "lon": longitude,
+            "e": {k_: int(v) for k_, v in emotion_levels.items()},
+        })
+
+    return {
+        "parks": page,
+        "next_cursor": next_cursor,
+        "radius_km": radius,
+        "total_candidates": len(ranked),
+    }
\ No newline at end of file
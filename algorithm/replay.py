@@ -0,0 +1,443 @@
+# 추천 알고리즘 오프라인 재생(replay) / 평가
+# 과거 감정 체크인(tb_users_emotions 또는 CSV 덤프)을 여러 알고리즘 버전으로 다시 돌려서 비교
+# - 알고리즘 버전 = import 가능한 함수 "모듈:함수"
+#     fn(emotion_levels, candidates, top_parks, top_categories) -> (공원 ID 목록, 녹지 유형 이름 목록)
+#     emotion_levels : {"우울": 1~5, ...} (서비스와 같은 형식)
+#     candidates     : 반경 5km 후보 공원 (parks_and_scores_in_5km 과 같은 행 + distance, 거리순). 위치 없으면 []
+#   기본(current) = 이 파일의 current → 실서비스 함수(rank_scored_parks / recommend_category_by_mind) 그대로 호출
+#   새 버전은 별도 모듈에 같은 형식의 함수로 작성 (예: algorithm/experiments/v2.py 의 recommend → algorithm.experiments.v2:recommend)
+# - 순위 겹침 : 첫 번째 버전(기준) 대비 공원 top-N / 녹지 유형 top-N 겹침 비율, 1위 일치율
+# - 방문 적중률 : 그 처방(create_date)에서 실제 방문한 공원(tb_parks_visit_log)이 top-N 에 있었는지
+# - 처리량 : 버전별 체크인/초 (점수 계산 시간만)
+#
+#   python -m algorithm.replay --algorithm current --algorithm v2=algorithm.experiments.v2:recommend
+#   python -m algorithm.replay --input checkins.csv --algorithm ...   : 덤프 파일에서 읽기
+#   python -m algorithm.replay --export checkins.csv                  : DB 체크인을 CSV 로 덤프
+#   python -m algorithm.replay --synthetic 1000000 --algorithm ...    : DB 없이 가상 데이터로 처리량 측정
+#   python -m algorithm.replay --verify 200                           : 벡터화 계산이 실서비스 함수와 같은지 확인
+#
+# 체크인은 청크 단위로 스트리밍(서버 측 커서)해서 워커 프로세스들이 나눠 계산 → 수백만 건도 메모리 일정
+# current 는 체크인 묶음을 numpy 로 한 번에 계산 (결과는 서비스 함수와 같음 - --verify 로 확인). 다른 버전은 체크인마다 함수 호출
+from collections import defaultdict
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+import csv, importlib, json, math, multiprocessing as mp, os, random, time
+import numpy as np
+import pymysql
+
+from algorithm.model_registry import CompiledModel, get_model
+from algorithm.parks_algorithm import get_db_connection, rank_scored_parks
+from algorithm.category_algorithm import recommend_category_by_mind
+
+INDICATORS = ("Nature", "Convenience", "Safety", "Activity", "Social")
+EMOTION_COLUMNS = {"depression": "우울", "anxiety": "불안", "stress": "스트레스",
+                   "happiness": "행복", "energy": "에너지", "achievement": "성취감"}
+CHECKIN_COLUMNS = ("nickname", "create_date", *EMOTION_COLUMNS, "latitude", "longitude")
+RADIUS_KM = 5.0   # recommend_from_scored_parks 와 같은 후보 반경
+CHUNK_SIZE = 5000
+CURRENT = "algorithm.replay:current"
+
+CHECKIN_SQL = f"SELECT {', '.join(CHECKIN_COLUMNS)} FROM tb_users_emotions ORDER BY id"
+PARKS_SQL = f"""
+    SELECT s.ParkID, p.Park, {", ".join("s." + c for c in INDICATORS)}, s.Coverage, p.Latitude, p.Longitude
+    FROM tb_parks_score s
+    JOIN tb_parks p ON s.ParkID = p.ID
+"""
+VISITS_SQL = "SELECT nickname, park_id, create_date FROM tb_parks_visit_log"
+
+
+def _date_key(value) -> str:
+    return value.strftime("%Y-%m-%d %H:%M:%S") if hasattr(value, "strftime") else str(value)[:19]
+
+
+def _emotion_levels(row: Dict[str, Any]) -> Dict[str, int]:
+    return {label: int(row[col] or 0) for col, label in EMOTION_COLUMNS.items()}
+
+
+# ---------------------------
+# 알고리즘 버전
+# ---------------------------
+def current(emotion_levels: Dict[str, int], candidates: List[Dict[str, Any]],
+            top_parks: int, top_categories: int) -> Tuple[List[int], List[str]]:
+    """현재 서비스 알고리즘 (recommend_from_scored_parks / recommend_category_by_mind 와 같은 함수)"""
+    parks = [p["ID"] for p in rank_scored_parks(candidates, emotion_levels)[:top_parks]]
+    categories = [c["category"] for c in recommend_category_by_mind(emotion_levels, top_n=top_categories)]
+    return parks, categories
+
+
+def load_algorithm(spec: str):
+    """"모듈:함수" → 함수"""
+    if spec == CURRENT:
+        return current  # python -m algorithm.replay 로 실행하면 이 모듈이 __main__ → 같은 함수 객체로 (벡터화 경로)
+    module, _, name = spec.partition(":")
+    if not module or not name:
+        raise ValueError(f"알고리즘은 '모듈:함수' 형식이어야 합니다: {spec}")
+    fn = getattr(importlib.import_module(module), name, None)
+    if not callable(fn):
+        raise ValueError(f"{spec} 에 호출 가능한 함수가 없습니다.")
+    return fn
+
+
+# ---------------------------
+# 공원 / 모델 (워커 공용, fork 로 공유)
+# ---------------------------
+class ParkTable:
+    """공원 지표를 배열로 (결측은 0 + present 마스크 → score_with_stored_indicators 와 같은 계산)"""
+    def __init__(self, rows: List[Dict[str, Any]]):
+        self.rows = rows  # 다른 알고리즘 버전에 넘길 후보 행
+        self.ids = np.array([int(r["ParkID"]) for r in rows], dtype=np.int64)
+        values = [[r[c] if isinstance(r[c], (int, float)) else None for c in INDICATORS] for r in rows]
+        self.present = np.array([[v is not None for v in row] for row in values], dtype=np.float64).reshape(-1, len(INDICATORS))
+        self.values = np.array([[v or 0.0 for v in row] for row in values], dtype=np.float64).reshape(-1, len(INDICATORS))
+        self.coverage = np.array([float(r["Coverage"]) if isinstance(r["Coverage"], (int, float)) else np.nan
+                                  for r in rows])
+        lat = np.radians(np.array([float(r["Latitude"]) for r in rows]))
+        # 위도순 정렬 → 반경에 해당하는 위도 띠만 거리 계산
+        self.by_lat = np.argsort(lat, kind="stable")
+        self.lat_sorted = lat[self.by_lat]
+        self.cos_lat, self.sin_lat = np.cos(lat), np.sin(lat)
+        self.lon = np.radians(np.array([float(r["Longitude"]) for r in rows]))
+
+    def candidates(self, lat: float, lon: float) -> Tuple[np.ndarray, np.ndarray]:
+        """반경 안 공원 인덱스와 거리(km) (거리순 = 서비스의 ORDER BY distance)"""
+        lat1, lon1 = math.radians(lat), math.radians(lon)
+        band = RADIUS_KM / 6371
+        lo, hi = np.searchsorted(self.lat_sorted, (lat1 - band, lat1 + band))
+        idx = np.sort(self.by_lat[lo:hi])
+        cos_d = (math.cos(lat1) * self.cos_lat[idx] * np.cos(self.lon[idx] - lon1)
+                 + math.sin(lat1) * self.sin_lat[idx])
+        dist = 6371 * np.arccos(np.clip(cos_d, -1, 1))
+        keep = dist <= RADIUS_KM
+        idx, dist = idx[keep], dist[keep]
+        order = np.argsort(dist, kind="stable")
+        return idx[order], dist[order]
+
+    def candidate_rows(self, idx: np.ndarray, dist: np.ndarray) -> List[Dict[str, Any]]:
+        """parks_and_scores_in_5km 과 같은 형식의 후보 행"""
+        return [{**self.rows[i], "distance": d} for i, d in zip(idx.tolist(), dist.tolist())]
+
+    def rank(self, idx: np.ndarray, weights: np.ndarray, top_n: int) -> List[int]:
+        """rank_scored_parks 와 같은 순서 (점수 3자리 반올림 후 안정 정렬, 점수 없는 공원은 뒤로)"""
+        wsum = self.present[idx] @ weights
+        with np.errstate(invalid="ignore", divide="ignore"):
+            raw = np.where(wsum > 0, (self.values[idx] @ weights) / wsum, np.nan)
+        cov = self.coverage[idx]
+        final = np.round(np.where(np.isnan(cov), raw, raw * cov), 3)
+        order = np.argsort(np.where(np.isnan(final), np.inf, -final), kind="stable")
+        return self.ids[idx[order[:top_n]]].tolist()
+
+
+def blend_batch(model: CompiledModel, levels: np.ndarray) -> np.ndarray:
+    """CompiledModel.blend 를 체크인 묶음(levels: 체크인 x 감정, model.emotions 순서)에 한 번에"""
+    levels = np.where(levels > 0, levels, 0).astype(np.float64)
+    total = levels.sum(axis=1, keepdims=True)
+    agg = (levels / np.where(total > 0, total, 1)) @ np.array(model.emotion_matrix)
+    s = agg.sum(axis=1, keepdims=True)
+    mind = np.where(s > 0, agg / np.where(s > 0, s, 1), 0.0)
+    mind[total[:, 0] == 0] = 1.0 / len(model.dims)
+    return mind
+
+
+def rank_categories_batch(model: CompiledModel, minds: np.ndarray, top_n: int) -> List[List[str]]:
+    """recommend_category_by_mind 와 같은 순서 (3자리 반올림 후 안정 정렬)"""
+    cats = np.array(model.category_matrix)
+    denom = np.linalg.norm(minds, axis=1, keepdims=True) * np.array(model.category_norms)[None, :]
+    with np.errstate(invalid="ignore", divide="ignore"):
+        scores = np.round(np.where(denom > 0, (minds @ cats.T) / denom, 0.0), 3)
+    order = np.argsort(-scores, axis=1, kind="stable")[:, :top_n]
+    return [[model.categories[j] for j in row] for row in order.tolist()]
+
+
+def rank_categories(model: CompiledModel, mind: Tuple[float, ...], top_n: int) -> List[str]:
+    """recommend_category_by_mind 와 같은 순서"""
+    mind_norm = math.sqrt(sum(x * x for x in mind))
+    scores = []
+    for cat, row, norm in zip(model.categories, model.category_matrix, model.category_norms):
+        denom = mind_norm * norm
+        scores.append((cat, round(sum(a * b for a, b in zip(mind, row)) / denom if denom > 0 else 0.0, 3)))
+    scores.sort(key=lambda x: x[1], reverse=True)
+    return [cat for cat, _ in scores[:top_n]]
+
+
+_parks: Optional[ParkTable] = None
+_algorithms: List[Tuple[str, str, Any]] = []  # (이름, "모듈:함수", 함수)
+_visits: Dict[Tuple[str, str], frozenset] = {}
+_top_n = (6, 3)
+
+
+def _init_worker(parks, algorithms, visits, top_n):
+    global _parks, _algorithms, _visits, _top_n
+    _parks, _algorithms, _visits, _top_n = parks, algorithms, visits, top_n
+
+
+def _rank_current(chunk, candidates, top_parks: int, top_cats: int):
+    """current 를 체크인 묶음 전체에 한 번에 (numpy)"""
+    model = get_model()
+    label_to_column = {label: col for col, label in EMOTION_COLUMNS.items()}
+    levels = np.array([[int(row[label_to_column[e]] or 0) for e in model.emotions] for row in chunk])
+    minds = blend_batch(model, levels)
+    cats = rank_categories_batch(model, minds, top_cats)
+    parks = [_parks.rank(c[0], mind, top_parks) if c is not None else []
+             for c, mind in zip(candidates, minds)]
+    return parks, cats
+
+
+def _rank_each(fn, chunk, candidates, top_parks: int, top_cats: int):
+    """다른 버전 : 체크인마다 함수 호출"""
+    parks, cats = [], []
+    for row, c in zip(chunk, candidates):
+        rows = _parks.candidate_rows(*c) if c is not None else []
+        p, cat = fn(_emotion_levels(row), rows, top_parks, top_cats)
+        parks.append([int(x) for x in p][:top_parks] if c is not None else [])
+        cats.append(list(cat)[:top_cats])
+    return parks, cats
+
+
+def _evaluate_chunk(chunk: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """체크인 묶음 → 부분 집계 (부모 프로세스에서 합침)"""
+    top_parks, top_cats = _top_n
+    stats = {"checkins": 0, "located": 0, "with_visits": 0, "models": {}}
+    for name, _, _ in _algorithms:
+        stats["models"][name] = defaultdict(float)
+
+    t0 = time.perf_counter()
+    located = [row["latitude"] not in (None, "") and row["longitude"] not in (None, "") for row in chunk]
+    candidates = [_parks.candidates(float(row["latitude"]), float(row["longitude"])) if ok else None
+                  for row, ok in zip(chunk, located)]
+    shared_seconds = time.perf_counter() - t0  # 후보 검색은 버전과 무관 → 버전 수로 나눠서 배분
+
+    per_model = []
+    for name, _, fn in _algorithms:
+        t0 = time.perf_counter()
+        if fn is current:
+            parks, cats = _rank_current(chunk, candidates, top_parks, top_cats)
+        else:
+            parks, cats = _rank_each(fn, chunk, candidates, top_parks, top_cats)
+        stats["models"][name]["seconds"] += time.perf_counter() - t0 + shared_seconds / len(_algorithms)
+        per_model.append((stats["models"][name], parks, cats))
+
+    _, base_parks, base_cats = per_model[0]
+    for i, row in enumerate(chunk):
+        visited = _visits.get((row["nickname"], _date_key(row["create_date"])))
+        stats["checkins"] += 1
+        stats["located"] += located[i]
+        stats["with_visits"] += bool(visited) and located[i]
+        for m, parks, cats in per_model:
+            if located[i] and base_parks[i]:
+                m["park_overlap"] += len(set(parks[i]) & set(base_parks[i])) / len(base_parks[i])
+                m["park_top1_same"] += parks[i][:1] == base_parks[i][:1]
+                m["park_compared"] += 1
+            m["category_overlap"] += len(set(cats[i]) & set(base_cats[i])) / max(len(base_cats[i]), 1)
+            m["category_top1_same"] += cats[i][:1] == base_cats[i][:1]
+            if visited and located[i]:
+                m["visit_hits"] += bool(visited & set(parks[i]))
+    return stats
+
+
+def _merge(total: Dict[str, Any], part: Dict[str, Any]):
+    for key in ("checkins", "located", "with_visits"):
+        total[key] = total.get(key, 0) + part[key]
+    for name, values in part["models"].items():
+        bucket = total.setdefault("models", {}).setdefault(name, defaultdict(float))
+        for k, v in values.items():
+            bucket[k] += v
+
+
+# ---------------------------
+# 입력 (스트리밍)
+# ---------------------------
+def _connect():
+    return get_db_connection(cursorclass=pymysql.cursors.SSDictCursor)
+
+
+def stream_db(chunk_size: int = CHUNK_SIZE) -> Iterator[List[Dict[str, Any]]]:
+    """서버 측 커서로 체크인을 chunk_size 씩 (전체를 메모리에 올리지 않음)"""
+    conn = _connect()
+    try:
+        with conn.cursor() as cur:
+            cur.execute(CHECKIN_SQL)
+            while True:
+                rows = cur.fetchmany(chunk_size)
+                if not rows:
+                    break
+                yield rows
+    finally:
+        conn.close()
+
+
+def stream_csv(path: Path, chunk_size: int = CHUNK_SIZE) -> Iterator[List[Dict[str, Any]]]:
+    with open(path, newline="", encoding="utf-8") as f:
+        chunk = []
+        for row in csv.DictReader(f):
+            chunk.append(row)
+            if len(chunk) >= chunk_size:
+                yield chunk
+                chunk = []
+        if chunk:
+            yield chunk
+
+
+def export_csv(path: Path) -> int:
+    count = 0
+    with open(path, "w", newline="", encoding="utf-8") as f:
+        writer = csv.DictWriter(f, fieldnames=CHECKIN_COLUMNS)
+        writer.writeheader()
+        for chunk in stream_db():
+            for row in chunk:
+                writer.writerow({**row, "create_date": _date_key(row["create_date"])})
+            count += len(chunk)
+    return count
+
+
+def load_parks_and_visits():
+    conn = _connect()
+    try:
+        with conn.cursor() as cur:
+            cur.execute(PARKS_SQL)
+            parks = ParkTable(cur.fetchall())
+        visits = defaultdict(set)
+        with conn.cursor() as cur:
+            cur.execute(VISITS_SQL)
+            for v in cur.fetchall_unbuffered():
+                visits[(v["nickname"], _date_key(v["create_date"]))].add(int(v["park_id"]))
+    finally:
+        conn.close()
+    return parks, {k: frozenset(v) for k, v in visits.items()}
+
+
+def synthetic(n_checkins: int, n_parks: int = 2000, seed: int = 0):
+    """DB 없이 처리량 측정용 가상 데이터 (서울 범위 공원 / 체크인 / 방문)"""
+    rng = random.Random(seed)
+    parks = ParkTable([{"ParkID": i, "Park": f"공원{i}", "Coverage": rng.choice([None, 0.4, 0.6, 0.8, 1.0]),
+                        "Latitude": 37.45 + rng.random() * 0.25, "Longitude": 126.8 + rng.random() * 0.4,
+                        **{c: (None if rng.random() < 0.05 else rng.random()) for c in INDICATORS}}
+                       for i in range(n_parks)])
+    # 10건 중 1건은 그 처방에서 공원 하나 방문 (체크인 번호로 결정 → 미리 만들어 두고 체크인은 스트리밍)
+    base = datetime(2025, 1, 1)
+    created = lambda i: (base + timedelta(seconds=i)).strftime("%Y-%m-%d %H:%M:%S")
+    visits = {(f"user{i % 5000}", created(i)): frozenset({(i * 7919) % n_parks})
+              for i in range(0, n_checkins, 10)}
+
+    def chunks():
+        for start in range(0, n_checkins, CHUNK_SIZE):
+            yield [{"nickname": f"user{i % 5000}", "create_date": created(i),
+                    "latitude": 37.45 + rng.random() * 0.25, "longitude": 126.8 + rng.random() * 0.4,
+                    **{col: rng.randint(1, 5) for col in EMOTION_COLUMNS}}
+                   for i in range(start, min(start + CHUNK_SIZE, n_checkins))]
+
+    return parks, visits, chunks
+
+
+# ---------------------------
+# 실행
+# ---------------------------
+def replay(chunks: Iterator[List[Dict[str, Any]]], parks: ParkTable, algorithms, visits,
+           top_n=(6, 3), workers: int = os.cpu_count() or 1) -> Dict[str, Any]:
+    total: Dict[str, Any] = {}
+    t0 = time.perf_counter()
+    if workers <= 1:
+        _init_worker(parks, algorithms, visits, top_n)
+        for chunk in chunks:
+            _merge(total, _evaluate_chunk(chunk))
+    else:
+        # fork → 공원 배열 / 방문 기록은 복사 없이 공유 (copy-on-write)
+        ctx = mp.get_context("fork")
+        with ctx.Pool(workers, initializer=_init_worker, initargs=(parks, algorithms, visits, top_n)) as pool:
+            for part in pool.imap_unordered(_evaluate_chunk, chunks):
+                _merge(total, part)
+    total["wall_seconds"] = time.perf_counter() - t0
+    return total
+
+
+def report(total: Dict[str, Any], algorithms) -> Dict[str, Any]:
+    n, located, with_visits = total.get("checkins", 0), total.get("located", 0), total.get("with_visits", 0)
+    result = {"checkins": n, "located": located, "with_visits": with_visits,
+              "wall_seconds": round(total.get("wall_seconds", 0), 2),
+              "checkins_per_second": round(n / total["wall_seconds"]) if total.get("wall_seconds") else None,
+              "models": {}}
+    for name, spec, fn in algorithms:
+        m = total.get("models", {}).get(name, {})
+        compared = m.get("park_compared", 0)
+        result["models"][name] = {
+            "algorithm": spec,
+            "model_version": get_model().version if fn is current else None,
+            "park_overlap": round(m.get("park_overlap", 0) / compared, 4) if compared else None,
+            "park_top1_same": round(m.get("park_top1_same", 0) / compared, 4) if compared else None,
+            "category_overlap": round(m.get("category_overlap", 0) / n, 4) if n else None,
+            "category_top1_same": round(m.get("category_top1_same", 0) / n, 4) if n else None,
+            "visit_hit_rate": round(m.get("visit_hits", 0) / with_visits, 4) if with_visits else None,
+            "checkins_per_cpu_second": round(n / m["seconds"]) if m.get("seconds") else None,
+        }
+    return result
+
+
+def verify(n: int) -> int:
+    """현재 모델 기준으로 벡터화 계산 == 서비스 함수 (rank_scored_parks / recommend_category_by_mind)"""
+    from algorithm.model_registry import get_model
+    from algorithm.parks_algorithm import rank_scored_parks, parks_and_scores_in_5km
+    from algorithm.category_algorithm import recommend_category_by_mind
+
+    parks, _ = load_parks_and_visits()
+    model = get_model()
+    mismatches = checked = 0
+    for chunk in stream_db(chunk_size=n):
+        for row in chunk[:n]:
+            if row["latitude"] is None or row["longitude"] is None:
+                continue
+            levels = {label: int(row[col] or 0) for col, label in EMOTION_COLUMNS.items()}
+            expected_parks = [p["ID"] for p in rank_scored_parks(
+                parks_and_scores_in_5km(row["latitude"], row["longitude"]), levels)[:6]]
+            expected_cats = [c["category"] for c in recommend_category_by_mind(levels, top_n=3)]
+            mind = model.blend(levels)
+            got_parks = parks.rank(parks.candidates(float(row["latitude"]), float(row["longitude"]))[0], np.array(mind), 6)
+            got_cats = rank_categories(model, mind, 3)
+            checked += 1
+            if got_parks != expected_parks or got_cats != expected_cats:
+                mismatches += 1
+                print(f"[WARN] 불일치 {row['nickname']} {row['create_date']}: {got_parks} != {expected_parks}")
+        break
+    print(f"[INFO] 검증 {checked}건, 불일치 {mismatches}건")
+    return mismatches
+
+
+if __name__ == "__main__":
+    import argparse, sys
+
+    parser = argparse.ArgumentParser(description="추천 알고리즘 오프라인 재생 / 평가")
+    parser.add_argument("--algorithm", action="append", default=[], metavar="NAME=MODULE:FUNCTION",
+                        help=f"비교할 알고리즘 버전 (첫 번째가 기준). 'current' 는 {CURRENT}. 기본: current")
+    parser.add_argument("--input", type=Path, help="체크인 CSV 덤프 (없으면 DB)")
+    parser.add_argument("--export", type=Path, help="DB 체크인을 CSV 로 저장하고 종료")
+    parser.add_argument("--synthetic", type=int, help="가상 체크인 N건으로 실행")
+    parser.add_argument("--verify", type=int, help="서비스 함수와 결과 비교할 체크인 수")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--top-parks", type=int, default=6)
+    parser.add_argument("--top-categories", type=int, default=3)
+    parser.add_argument("--json", type=Path, help="결과를 JSON 으로 저장")
+    args = parser.parse_args()
+
+    if args.export:
+        print(f"[INFO] 체크인 {export_csv(args.export)}건 저장 : {args.export}")
+        sys.exit(0)
+    if args.verify:
+        sys.exit(1 if verify(args.verify) else 0)
+
+    algorithms = []
+    for spec in args.algorithm or ["current"]:
+        name, _, target = spec.partition("=")
+        target = target or (CURRENT if name == "current" else name)
+        algorithms.append((name, target, load_algorithm(target)))
+
+    if args.synthetic:
+        parks, visits, make_chunks = synthetic(args.synthetic)
+        chunks = make_chunks()
+    else:
+        parks, visits = load_parks_and_visits()
+        chunks = stream_csv(args.input) if args.input else stream_db()
+
+    result = report(replay(chunks, parks, algorithms, visits, (args.top_parks, args.top_categories), args.workers),
+                    algorithms)
+    print(json.dumps(result, ensure_ascii=False, indent=2))
+    if args.json:
+        args.json.write_text(json.dumps(result, ensure_ascii=False, indent=2), encoding="utf-8")
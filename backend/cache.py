@@ -0,0 +1,276 @@
+# 공용 캐시 API (get / set / TTL / get_or_compute) + 교체 가능한 저장소
+#   CACHE_BACKEND=memory (기본)            : 프로세스 내 LRU (워커마다 따로)
+#   CACHE_BACKEND=file:/path/cache.sqlite3 : 같은 서버의 워커들이 공유하는 파일(SQLite) 캐시
+#   CACHE_BACKEND=redis://host:6379/0      : Redis 프로토콜 서버 (여러 서버 공유)
+# 값은 JSON 으로 저장 → 어떤 저장소든 같은 형태로 주고받음
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Optional
+from dotenv import load_dotenv
+from . import metrics
+from .resp_client import RespClient
+from .responses import dumps
+import json, os, sqlite3, threading, time, uuid
+
+load_dotenv()
+
+CACHE_BACKEND = os.getenv("CACHE_BACKEND", "memory")
+VERSION_CHECK_INTERVAL = float(os.getenv("CACHE_VERSION_CHECK_INTERVAL", "2"))  # 다른 워커의 무효화 확인 주기(초)
+VERSION_TTL = 30 * 86400
+_MISSING = object()
+
+
+# ---------------------------
+# 저장소 (bytes 만 다룸)
+# ---------------------------
+class LocalLRUBackend:
+    def __init__(self, max_entries: int = 10000):
+        self._data: "OrderedDict[str, tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.max_entries = max_entries
+
+    def get(self, key: str) -> Optional[bytes]:
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                return None
+            if entry[0] < time.time():
+                del self._data[key]
+                return None
+            self._data.move_to_end(key)
+            return entry[1]
+
+    def set(self, key: str, value: bytes, ttl: float):
+        with self._lock:
+            self._data[key] = (time.time() + ttl, value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.max_entries:
+                self._data.popitem(last=False)
+
+    def delete(self, key: str):
+        with self._lock:
+            self._data.pop(key, None)
+
+
+class FileBackend:
+    """SQLite(WAL) 파일 캐시 - 한 서버의 여러 워커 프로세스가 같은 파일 공유"""
+    def __init__(self, path: str):
+        self.path = path
+        self._local = threading.local()
+        self._last_purge = 0.0
+        conn = self._conn()
+        conn.execute("CREATE TABLE IF NOT EXISTS cache (key TEXT PRIMARY KEY, value BLOB, expires REAL)")
+        conn.commit()
+
+    def _conn(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=1.0, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def get(self, key: str) -> Optional[bytes]:
+        row = self._conn().execute("SELECT value, expires FROM cache WHERE key = ?", (key,)).fetchone()
+        if row is None or row[1] < time.time():
+            return None
+        return row[0]
+
+    def set(self, key: str, value: bytes, ttl: float):
+        now = time.time()
+        conn = self._conn()
+        conn.execute("INSERT OR REPLACE INTO cache (key, value, expires) VALUES (?, ?, ?)", (key, value, now + ttl))
+        if now - self._last_purge > 60:  # 만료된 항목 주기적으로 정리
+            self._last_purge = now
+            conn.execute("DELETE FROM cache WHERE expires < ?", (now,))
+
+    def delete(self, key: str):
+        self._conn().execute("DELETE FROM cache WHERE key = ?", (key,))
+
+
+class RedisBackend:
+    def __init__(self, url: str):
+        self.client = RespClient(url)
+
+    def get(self, key: str) -> Optional[bytes]:
+        return self.client.execute("GET", key)
+
+    def set(self, key: str, value: bytes, ttl: float):
+        self.client.execute("SET", key, value, "PX", max(1, int(ttl * 1000)))
+
+    def delete(self, key: str):
+        self.client.execute("DEL", key)
+
+
+def make_backend(spec: str = CACHE_BACKEND):
+    if spec.startswith("redis://"):
+        return RedisBackend(spec)
+    if spec.startswith("file:"):
+        return FileBackend(spec[len("file:"):])
+    return LocalLRUBackend()
+
+
+# ---------------------------
+# 네임스페이스별 캐시
+# ---------------------------
+class Cache:
+    def __init__(self, namespace: str, backend, default_ttl: float):
+        self.namespace = namespace
+        self.backend = backend
+        self.default_ttl = default_ttl
+        self._key_locks: Dict[str, threading.Lock] = {}
+        self._locks_lock = threading.Lock()
+        self.hits = self.misses = self.sets = self.errors = 0
+
+    def _key(self, key: str) -> str:
+        return f"{self.namespace}:{key}"
+
+    def get(self, key: str, default: Any = None) -> Any:
+        try:
+            raw = self.backend.get(self._key(key))
+        except Exception as e:
+            self.errors += 1
+            print(f"[WARN] 캐시 조회 실패({self.namespace}) : {e}")
+            raw = None
+        if raw is None:
+            self.misses += 1
+            return default
+        self.hits += 1
+        return json.loads(raw)
+
+    def set(self, key: str, value: Any, ttl: Optional[float] = None):
+        try:
+            self.backend.set(self._key(key), dumps(value), ttl or self.default_ttl)
+            self.sets += 1
+        except Exception as e:
+            self.errors += 1
+            print(f"[WARN] 캐시 저장 실패({self.namespace}) : {e}")
+
+    def delete(self, key: str):
+        try:
+            self.backend.delete(self._key(key))
+        except Exception as e:
+            self.errors += 1
+            print(f"[WARN] 캐시 삭제 실패({self.namespace}) : {e}")
+
+    def get_or_compute(self, key: str, compute: Callable[[], Any], ttl: Optional[float] = None) -> Any:
+        """캐시에 없으면 compute() 결과 저장 후 반환. 같은 워커 안에서는 같은 키를 한 번만 계산"""
+        value = self.get(key, _MISSING)
+        if value is not _MISSING:
+            return value
+        with self._locks_lock:
+            if len(self._key_locks) > 10000:  # 키별 lock 이 너무 쌓이면 정리
+                self._key_locks.clear()
+            lock = self._key_locks.setdefault(key, threading.Lock())
+        with lock:
+            try:
+                raw = self.backend.get(self._key(key))
+            except Exception:
+                raw = None
+            if raw is not None:  # 기다리는 동안 다른 요청이 채움
+                return json.loads(raw)
+            value = compute()
+            self.set(key, value, ttl)
+            return value
+
+    def stats(self) -> Dict[str, Any]:
+        lookups = self.hits + self.misses
+        return {"hits": self.hits, "misses": self.misses, "sets": self.sets, "errors": self.errors,
+                "hit_ratio": round(self.hits / lookups, 4) if lookups else 0.0}
+
+
+_backend = None
+_caches: Dict[str, Cache] = {}
+_caches_lock = threading.Lock()
+
+
+def get_cache(namespace: str, ttl: float = 300) -> Cache:
+    """네임스페이스 캐시 반환 (모든 네임스페이스가 CACHE_BACKEND 저장소 하나를 공유)"""
+    global _backend
+    with _caches_lock:
+        if _backend is None:
+            _backend = make_backend()
+        cache = _caches.get(namespace)
+        if cache is None:
+            cache = _caches[namespace] = Cache(namespace, _backend, ttl)
+        return cache
+
+
+# ---------------------------
+# 워커 간 무효화 신호 (버전 키)
+# ---------------------------
+class SharedVersion:
+    """
+    공용 저장소에 버전 값 하나를 두고, 바뀌면 각 워커가 등록된 콜백(프로세스 내 캐시 비우기 등)을 실행
+    - bump() : 새 버전 기록 + 이 워커의 콜백 바로 실행
+    - 다른 워커는 감시 스레드가 VERSION_CHECK_INTERVAL 마다 확인해서 콜백 실행
+    CACHE_BACKEND=memory 이면 저장소가 워커마다 따로라 이 워커에만 적용 (다른 워커는 각 캐시 TTL 이 상한)
+    """
+    def __init__(self, name: str):
+        self.name = name
+        self._cache = get_cache("versions", ttl=VERSION_TTL)
+        self._callbacks = []
+        self.value = self._cache.get(name)
+        self.changes = 0
+        with _versions_lock:
+            _versions.append(self)
+        _start_version_watcher()
+
+    def on_change(self, callback: Callable[[], Any]):
+        self._callbacks.append(callback)
+
+    def _run_callbacks(self):
+        self.changes += 1
+        for callback in list(self._callbacks):
+            try:
+                callback()
+            except Exception as e:
+                print(f"[WARN] 버전 변경 콜백 실패({self.name}) : {e}")
+
+    def bump(self) -> str:
+        self.value = uuid.uuid4().hex[:12]
+        self._cache.set(self.name, self.value)
+        self._run_callbacks()
+        return self.value
+
+    def check(self) -> bool:
+        """저장소의 버전이 이 워커가 아는 값과 다르면 콜백 실행"""
+        value = self._cache.get(self.name)
+        if value is None or value == self.value:
+            return False
+        self.value = value
+        print(f"[INFO] 다른 워커의 무효화 반영 : {self.name} → {value}")
+        self._run_callbacks()
+        return True
+
+
+_versions = []
+_versions_lock = threading.Lock()
+_version_watcher = None
+
+
+def _start_version_watcher():
+    global _version_watcher
+    if isinstance(_backend, LocalLRUBackend):
+        return  # 공유 저장소가 아니면 다른 워커의 신호를 받을 수 없음
+    with _versions_lock:
+        if _version_watcher is not None:
+            return
+
+        def run():
+            while True:
+                time.sleep(VERSION_CHECK_INTERVAL)
+                for version in list(_versions):
+                    try:
+                        version.check()
+                    except Exception as e:
+                        print(f"[WARN] 버전 확인 실패({version.name}) : {e}")
+
+        _version_watcher = threading.Thread(target=run, name="cache-version-watcher", daemon=True)
+        _version_watcher.start()
+
+
+metrics.register_provider("cache", lambda: {
+    "backend": type(_backend).__name__ if _backend else None,
+    **{ns: c.stats() for ns, c in list(_caches.items())},
+})
@@ -0,0 +1,133 @@
+# 외부 API 서킷 브레이커 (OpenWeather, OpenAI)
+# - closed    : 정상 호출. 최근 WINDOW 회 호출 중 실패 비율 또는 느린 호출 비율이 기준을 넘으면 open
+# - open      : OPEN_SECONDS 동안 호출하지 않고 바로 CircuitOpenError → 호출한 쪽은 캐시/빈 값/대기열 등 대체 응답
+# - half_open : OPEN_SECONDS 가 지나면 시험 호출 HALF_OPEN_CALLS 개만 통과. 모두 성공하면 closed, 하나라도 실패하면 다시 open
+# - /admin/metrics 의 "circuit_breakers" 항목으로 상태/실패율/차단 횟수 노출 (워커별)
+from collections import deque
+from typing import Any, Callable, Dict, Optional
+import threading, time
+
+from . import metrics
+
+CLOSED, OPEN, HALF_OPEN = "closed", "open", "half_open"
+
+
+class CircuitOpenError(Exception):
+    """브레이커가 열려 있어 호출하지 않음"""
+
+
+class CircuitBreaker:
+    def __init__(self, name: str, window: int = 20, min_calls: int = 5, failure_rate: float = 0.5,
+                 slow_call_seconds: float = 2.0, slow_call_rate: float = 0.8, open_seconds: float = 30.0,
+                 half_open_calls: int = 1):
+        """
+        window            : 실패율 계산에 쓰는 최근 호출 수
+        min_calls         : 이보다 적게 호출됐으면 판정하지 않음
+        failure_rate      : 실패(예외) 비율이 이 이상이면 open
+        slow_call_seconds : 이보다 오래 걸린 성공 호출은 느린 호출
+        slow_call_rate    : 느린 호출 비율이 이 이상이면 open (응답은 오지만 워커를 오래 붙잡는 경우)
+        """
+        self.name = name
+        self.min_calls = min_calls
+        self.failure_rate = failure_rate
+        self.slow_call_seconds = slow_call_seconds
+        self.slow_call_rate = slow_call_rate
+        self.open_seconds = open_seconds
+        self.half_open_calls = half_open_calls
+        self._calls = deque(maxlen=window)  # (실패 여부, 느린 호출 여부)
+        self._lock = threading.Lock()
+        self.state = CLOSED
+        self.changed_at = time.time()
+        self._trials = 0      # half_open 에서 진행 중/성공한 시험 호출 수
+        self.opened = 0       # open 으로 바뀐 횟수
+        self.rejected = 0     # open 이라 바로 거절한 호출 수
+
+    def _transition(self, state: str):
+        if state != self.state:
+            print(f"[WARN] 서킷 브레이커 {self.name} : {self.state} → {state}")
+            self.state, self.changed_at = state, time.time()
+            self._trials = 0
+            if state == OPEN:
+                self.opened += 1
+            if state == CLOSED:
+                self._calls.clear()
+
+    def allow(self) -> bool:
+        """호출해도 되는지. True 를 받았으면 반드시 record() 로 결과를 알려야 함"""
+        with self._lock:
+            if self.state == OPEN and time.time() - self.changed_at >= self.open_seconds:
+                self._transition(HALF_OPEN)
+            if self.state == CLOSED:
+                return True
+            if self.state == HALF_OPEN and self._trials < self.half_open_calls:
+                self._trials += 1
+                return True
+            self.rejected += 1
+            return False
+
+    def record(self, ok: bool, seconds: float):
+        with self._lock:
+            slow = ok and seconds >= self.slow_call_seconds
+            if self.state == HALF_OPEN:
+                if not ok or slow:
+                    self._transition(OPEN)
+                elif self._trials >= self.half_open_calls:
+                    self._transition(CLOSED)
+                return
+            if self.state == OPEN:
+                return  # open 전에 출발한 호출의 결과
+            self._calls.append((not ok, slow))
+            n = len(self._calls)
+            if n < self.min_calls:
+                return
+            failures = sum(1 for failed, _ in self._calls if failed)
+            slows = sum(1 for _, s in self._calls if s)
+            if failures / n >= self.failure_rate or slows / n >= self.slow_call_rate:
+                self._transition(OPEN)
+
+    def call(self, fn: Callable[..., Any], *args, is_failure: Callable[[BaseException], bool] = lambda e: True,
+             **kwargs) -> Any:
+        """fn 실행 + 결과 기록. is_failure(e) 가 False 인 예외(입력 오류 등)는 성공으로 기록하고 그대로 전달"""
+        if not self.allow():
+            raise CircuitOpenError(f"{self.name} 서킷 브레이커 open")
+        t0 = time.perf_counter()
+        try:
+            result = fn(*args, **kwargs)
+        except BaseException as e:
+            self.record(not is_failure(e), time.perf_counter() - t0)
+            raise
+        self.record(True, time.perf_counter() - t0)
+        return result
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            n = len(self._calls)
+            return {
+                "state": self.state,
+                "since": self.changed_at,
+                "calls": n,
+                "failure_rate": round(sum(1 for f, _ in self._calls if f) / n, 3) if n else 0.0,
+                "slow_rate": round(sum(1 for _, s in self._calls if s) / n, 3) if n else 0.0,
+                "opened": self.opened,
+                "rejected": self.rejected,
+            }
+
+
+_breakers: Dict[str, CircuitBreaker] = {}
+_breakers_lock = threading.Lock()
+
+
+def get_breaker(name: str, **config) -> CircuitBreaker:
+    """이름별 브레이커 하나 (처음 만들 때만 config 사용)"""
+    with _breakers_lock:
+        breaker = _breakers.get(name)
+        if breaker is None:
+            breaker = _breakers[name] = CircuitBreaker(name, **config)
+        return breaker
+
+
+def stats() -> Dict[str, Any]:
+    return {name: breaker.stats() for name, breaker in list(_breakers.items())}
+
+
+metrics.register_provider("circuit_breakers", stats)
@@ -1,7 +1,10 @@
-import os
-from sqlalchemy import create_engine
+import os, time, threading
+import pymysql
+from sqlalchemy import create_engine, text
 from dotenv import load_dotenv
 from pathlib import Path
+from .sql_trace import instrument_engine, InstrumentedConnection
+from .cache import get_cache
 
 # .env 경로 지정 (backend 폴더 기준)
 env_path = Path(__file__).parent / ".env"
@@ -14,9 +17,127 @@ DB_PORT = int(os.getenv("DB_PORT", 3306))  # 문자열 → int
 DB_NAME = os.getenv("DB_NAME")
 DB_CHARSET = os.getenv("DB_CHARSET", "utf8mb4")
 
-# SQLAlchemy 엔진 생성
+# 읽기 전용 replica (없으면 primary 하나만 사용)
+DB_READ_HOST = os.getenv("DB_READ_HOST")
+DB_READ_PORT = int(os.getenv("DB_READ_PORT", DB_PORT))
+DB_READ_USER = os.getenv("DB_READ_USER", DB_USER)
+DB_READ_PASSWORD = os.getenv("DB_READ_PASSWORD", DB_PASSWORD)
+
+REPLICA_MAX_LAG = float(os.getenv("REPLICA_MAX_LAG", 5))        # 허용 복제 지연(초), 넘으면 primary
+REPLICA_LAG_CHECK_INTERVAL = 5                                  # 복제 지연 확인 주기(초)
+READ_YOUR_WRITES_SECONDS = float(os.getenv("READ_YOUR_WRITES_SECONDS", 10))  # 쓰기 후 primary 고정 시간(초)
+
+# SQLAlchemy 엔진 생성 (쓰기 = primary)
 engine = create_engine(
     f"mysql+pymysql://{DB_USER}:{DB_PASSWORD}@{DB_HOST}:{DB_PORT}/{DB_NAME}?charset={DB_CHARSET}",
     echo=False,
     future=True
 )
+
+# 읽기 엔진 (replica)
+if DB_READ_HOST:
+    read_engine = create_engine(
+        f"mysql+pymysql://{DB_READ_USER}:{DB_READ_PASSWORD}@{DB_READ_HOST}:{DB_READ_PORT}/{DB_NAME}?charset={DB_CHARSET}",
+        echo=False,
+        future=True,
+        pool_pre_ping=True
+    )
+else:
+    read_engine = engine
+
+# SQL 실행 시간 / slow query 계측
+instrument_engine(engine)
+if read_engine is not engine:
+    instrument_engine(read_engine)
+
+
+# ---------------------------
+# 읽기/쓰기 라우팅
+# ---------------------------
+_recent_writes = {}  # nickname -> 마지막 쓰기 시각 (이 워커)
+_writes_lock = threading.Lock()
+# 다른 워커에서 쓴 경우도 알 수 있도록 공용 캐시(CACHE_BACKEND)에도 기록 (memory 이면 워커별)
+_shared_writes = get_cache("recent_writes", ttl=READ_YOUR_WRITES_SECONDS)
+_lag = {"value": None, "checked": 0.0}
+_lag_lock = threading.Lock()
+
+
+def mark_write(nickname):
+    """사용자가 쓰기를 했음을 기록 → 일정 시간 동안 해당 사용자 읽기는 primary에서 (read-your-writes)"""
+    if not nickname:
+        return
+    now = time.time()
+    with _writes_lock:
+        _recent_writes[nickname] = now
+        if len(_recent_writes) > 10000:
+            for k in [k for k, t in _recent_writes.items() if now - t > READ_YOUR_WRITES_SECONDS]:
+                del _recent_writes[k]
+    if read_engine is not engine:
+        _shared_writes.set(nickname, now)
+
+
+def _is_sticky(nickname) -> bool:
+    if not nickname:
+        return False
+    now = time.time()
+    t = _recent_writes.get(nickname)
+    if t is not None and now - t < READ_YOUR_WRITES_SECONDS:
+        return True
+    # 이 워커의 기록이 없거나 오래됐어도 다른 워커에서 더 최근에 썼을 수 있음 → 둘 중 늦은 시각 기준
+    shared = _shared_writes.get(nickname) if read_engine is not engine else None
+    t = max((x for x in (t, shared) if x is not None), default=None)
+    return t is not None and now - t < READ_YOUR_WRITES_SECONDS
+
+
+def replica_lag():
+    """
+    replica 복제 지연(초). 확인 실패 시 None.
+    복제 설정이 없는 서버(로컬 DB 두 개로 테스트하는 경우 등)는 0으로 취급
+    """
+    now = time.time()
+    if now - _lag["checked"] < REPLICA_LAG_CHECK_INTERVAL:
+        return _lag["value"]
+    with _lag_lock:
+        if now - _lag["checked"] < REPLICA_LAG_CHECK_INTERVAL:
+            return _lag["value"]
+        lag = None
+        try:
+            with read_engine.connect() as conn:
+                try:
+                    row = conn.execute(text("SHOW REPLICA STATUS")).mappings().first()
+                except Exception:
+                    row = conn.execute(text("SHOW SLAVE STATUS")).mappings().first()
+            if row is None:
+                lag = 0.0
+            else:
+                behind = row.get("Seconds_Behind_Master", row.get("Seconds_Behind_Source"))
+                lag = None if behind is None else float(behind)  # NULL = 복제 중단
+        except Exception as e:
+            print(f"[WARN] replica 상태 확인 실패 : {e}")
+        _lag["value"], _lag["checked"] = lag, time.time()
+        return lag
+
+
+def use_replica(nickname=None) -> bool:
+    if read_engine is engine or _is_sticky(nickname):
+        return False
+    lag = replica_lag()
+    return lag is not None and lag <= REPLICA_MAX_LAG
+
+
+def get_read_engine(nickname=None):
+    """읽기 전용 쿼리용 엔진: replica 지연이 크거나 방금 쓴 사용자면 primary"""
+    return read_engine if use_replica(nickname) else engine
+
+
+def connect_raw(read_only: bool = False, nickname=None, **kwargs):
+    """pymysql 직접 연결 (algorithm / llm 용, SQL 계측 포함). read_only면 replica 우선, 실패 시 primary"""
+    params = dict(host=DB_HOST, port=DB_PORT, user=DB_USER, password=DB_PASSWORD,
+                  db=DB_NAME, charset=DB_CHARSET, **kwargs)
+    if read_only and use_replica(nickname):
+        try:
+            return InstrumentedConnection(**{**params, "host": DB_READ_HOST, "port": DB_READ_PORT,
+                                      "user": DB_READ_USER, "password": DB_READ_PASSWORD})
+        except pymysql.MySQLError as e:
+            print(f"[WARN] replica 연결 실패, primary 사용 : {e}")
+    return InstrumentedConnection(**params)
@@ -0,0 +1,409 @@
+# 감정 롤업 (증분 갱신)
+# - 체크인 INSERT 와 같은 트랜잭션에서 주간/일간 롤업(합계/최소/최대/횟수) 갱신
+# - 요약 저장 시 주간 요약 횟수 + 추천 녹지 유형/공원 횟수 갱신
+# - 주간 총평은 원본 행 대신 롤업 한 행 + 상위 추천 항목만 읽음
+# - 감정 추세(일/주/월 평균, 이동평균)는 일간 롤업(1년 = 최대 366행)을 numpy 로 집계
+#
+# - 롤업 테이블(V004/V005)이 없으면 경고 후 롤업 끔 → 체크인/요약 저장은 그대로, 추세는 데이터 없음으로
+#   (주간 총평은 롤업이 꺼졌거나 해당 주 롤업 행이 없으면(--rebuild 전) 원본 행에서 같은 형식으로 집계)
+#
+#   python -m backend.emotion_rollups --rebuild : 원본 테이블에서 롤업 전체 재계산 (최초 배포 / 불일치 시)
+from collections import defaultdict
+from datetime import date, datetime, timedelta
+from typing import Any, Dict, Iterable, List, Optional
+from sqlalchemy import text
+from . import metrics
+import json
+import numpy as np
+
+EMOTIONS = ("depression", "anxiety", "stress", "happiness", "achievement", "energy")
+ITEM_KINDS = {"category": "categories", "park": "parks"}  # kind -> 결과 키
+ER_NO_SUCH_TABLE = 1146  # MySQL "Table doesn't exist"
+
+_disabled_reason: Optional[str] = None  # 롤업 테이블이 없어 꺼졌으면 그 오류
+
+
+def rollups_enabled() -> bool:
+    return _disabled_reason is None
+
+
+def _missing_table(e: Exception) -> bool:
+    """pymysql 오류 또는 그걸 감싼 SQLAlchemy 오류가 테이블 없음인지"""
+    args = getattr(getattr(e, "orig", e), "args", ())
+    return bool(args) and args[0] == ER_NO_SUCH_TABLE
+
+
+def _disable(e: Exception):
+    """마이그레이션이 덜 된 DB → 롤업만 끄고 원래 요청(체크인/요약 저장)은 계속 (MySQL 은 문장 오류로 트랜잭션이 끝나지 않음)"""
+    global _disabled_reason
+    if _disabled_reason is None:
+        print(f"[WARN] 롤업 테이블이 없어 롤업을 끕니다 : {getattr(e, 'orig', e)}\n"
+              f"       python -m backend.migrate → python -m backend.emotion_rollups --rebuild 후 재시작하세요.")
+    _disabled_reason = str(getattr(e, "orig", e))
+
+
+def stats() -> Dict[str, Any]:
+    return {"enabled": rollups_enabled(), "disabled_reason": _disabled_reason}
+
+
+metrics.register_provider("emotion_rollups", stats)
+
+
+def _to_date(day) -> date:
+    if isinstance(day, str):
+        day = datetime.strptime(day[:10], "%Y-%m-%d")
+    if isinstance(day, datetime):
+        day = day.date()
+    return day
+
+
+def week_start(day) -> date:
+    """해당 날짜가 속한 주의 월요일 (weekly_chain 과 같은 기준)"""
+    day = _to_date(day)
+    return day - timedelta(days=day.weekday())
+
+
+def _upsert_sql(table: str, key: str):
+    # LEAST/GREATEST 는 NULL 이 섞이면 NULL → 요약만 먼저 들어온 행(최소/최대 NULL) 대비 COALESCE
+    cols = ["checkins"] + [f"{e}_{agg}" for e in EMOTIONS for agg in ("sum", "min", "max")]
+    updates = ["checkins = checkins + VALUES(checkins)"]
+    for e in EMOTIONS:
+        updates.append(f"{e}_sum = {e}_sum + VALUES({e}_sum)")
+        updates.append(f"{e}_min = COALESCE(LEAST({e}_min, VALUES({e}_min)), VALUES({e}_min), {e}_min)")
+        updates.append(f"{e}_max = COALESCE(GREATEST({e}_max, VALUES({e}_max)), VALUES({e}_max), {e}_max)")
+    return text(f"""
+        INSERT INTO {table} (nickname, {key}, {", ".join(cols)})
+        VALUES (:nickname, :{key}, {", ".join(":" + c for c in cols)})
+        ON DUPLICATE KEY UPDATE {", ".join(updates)}
+    """)
+
+
+WEEKLY_UPSERT_SQL = _upsert_sql("tb_users_weekly_rollup", "week_start")
+DAILY_UPSERT_SQL = _upsert_sql("tb_users_emotion_daily", "day")
+
+SUMMARY_UPSERT_SQL = """
+    INSERT INTO tb_users_weekly_rollup (nickname, week_start, summaries)
+    VALUES (%s, %s, 1)
+    ON DUPLICATE KEY UPDATE summaries = summaries + 1
+"""
+
+ITEM_UPSERT_SQL = """
+    INSERT INTO tb_users_weekly_items (nickname, week_start, kind, item, cnt)
+    VALUES (%s, %s, %s, %s, 1)
+    ON DUPLICATE KEY UPDATE cnt = cnt + 1
+"""
+
+WEEKLY_ITEMS_SQL = """
+    SELECT kind, item, cnt FROM tb_users_weekly_items
+    WHERE nickname = %s AND week_start = %s
+    ORDER BY kind, cnt DESC, item
+"""
+
+
+def _aggregate(rows: Iterable[Dict[str, Any]], bucket) -> List[Dict[str, Any]]:
+    """체크인들을 (nickname, 구간) 별로 미리 합쳐서 upsert 한 번에 한 행씩"""
+    groups = {}
+    for row in rows:
+        key = (row["nickname"], bucket(row["create_date"]))
+        g = groups.get(key)
+        if g is None:
+            g = groups[key] = {"nickname": key[0], "bucket": key[1], "checkins": 0}
+            for e in EMOTIONS:
+                g[f"{e}_sum"], g[f"{e}_min"], g[f"{e}_max"] = 0, None, None
+        g["checkins"] += 1
+        for e in EMOTIONS:
+            v = int(row[e])
+            g[f"{e}_sum"] += v
+            g[f"{e}_min"] = v if g[f"{e}_min"] is None else min(g[f"{e}_min"], v)
+            g[f"{e}_max"] = v if g[f"{e}_max"] is None else max(g[f"{e}_max"], v)
+    return list(groups.values())
+
+
+def record_checkins(conn, rows: Iterable[Dict[str, Any]]):
+    """감정 체크인 INSERT 와 같은 SQLAlchemy 트랜잭션(conn)에서 호출"""
+    rows = list(rows)
+    if not rows or not rollups_enabled():
+        return
+    weekly = _aggregate(rows, week_start)
+    for g in weekly:
+        g["week_start"] = g.pop("bucket")
+    daily = _aggregate(rows, _to_date)
+    for g in daily:
+        g["day"] = g.pop("bucket")
+    try:
+        conn.execute(WEEKLY_UPSERT_SQL, weekly)
+        conn.execute(DAILY_UPSERT_SQL, daily)
+    except Exception as e:
+        if not _missing_table(e):
+            raise
+        _disable(e)
+
+
+def record_summary(cur, nickname: str, create_date, categories: List[Any], parks: List[Any]):
+    """summary() 의 요약 INSERT 와 같은 pymysql 트랜잭션(cursor)에서 호출"""
+    if not rollups_enabled():
+        return
+    week = week_start(create_date)
+    items = [(nickname, week, "category", str(c)) for c in categories if c] + \
+            [(nickname, week, "park", str(p)) for p in parks if p]
+    try:
+        cur.execute(SUMMARY_UPSERT_SQL, (nickname, week))
+        if items:
+            cur.executemany(ITEM_UPSERT_SQL, items)
+    except Exception as e:
+        if not _missing_table(e):
+            raise
+        _disable(e)
+
+
+def weekly_rollup(cur, nickname: str, week: date, top_items: int = 3) -> Optional[Dict[str, Any]]:
+    """주간 롤업 한 행 → 감정별 평균/최소/최대 + 많이 추천된 항목 (pymysql DictCursor). 롤업이 꺼져 있으면 None"""
+    if not rollups_enabled():
+        return None
+    try:
+        cur.execute("SELECT * FROM tb_users_weekly_rollup WHERE nickname = %s AND week_start = %s",
+                    (nickname, week))
+        row = cur.fetchone()
+    except Exception as e:
+        if not _missing_table(e):
+            raise
+        _disable(e)
+        return None
+    if not row:
+        return None
+
+    checkins = row["checkins"]
+    result = {
+        "week_start": row["week_start"],
+        "checkins": checkins,
+        "summaries": row["summaries"],
+        "emotions": {
+            e: {
+                "mean": round(row[f"{e}_sum"] / checkins, 2) if checkins else None,
+                "min": row[f"{e}_min"],
+                "max": row[f"{e}_max"],
+            }
+            for e in EMOTIONS
+        },
+    }
+
+    cur.execute(WEEKLY_ITEMS_SQL, (nickname, week))
+    for key in ITEM_KINDS.values():
+        result[key] = []
+    for item in cur.fetchall():
+        bucket = result[ITEM_KINDS[item["kind"]]]
+        if len(bucket) < top_items:
+            bucket.append({"item": item["item"], "count": item["cnt"]})
+    return result
+
+
+WEEK_EMOTIONS_SQL = f"""
+    SELECT COUNT(*) AS checkins, {", ".join(f"SUM({e}) AS {e}_sum, MIN({e}) AS {e}_min, MAX({e}) AS {e}_max"
+                                           for e in EMOTIONS)}
+    FROM tb_users_emotions
+    WHERE nickname = %s AND create_date BETWEEN %s AND %s
+"""
+
+WEEK_SUMMARIES_SQL = """
+    SELECT RecommandCates, RecommandParks
+    FROM tb_users_summary
+    WHERE nickname = %s AND Create_date BETWEEN %s AND %s
+"""
+
+
+def weekly_from_source(cur, nickname: str, start: datetime, end: datetime, top_items: int = 3) -> Dict[str, Any]:
+    """롤업이 꺼져 있거나 아직 없을 때 : 원본 행(체크인, 요약)에서 weekly_rollup() 과 같은 형식으로 집계"""
+    cur.execute(WEEK_EMOTIONS_SQL, (nickname, start, end))
+    row = cur.fetchone()
+    checkins = row["checkins"] or 0
+    cur.execute(WEEK_SUMMARIES_SQL, (nickname, start, end))
+    summaries = cur.fetchall()
+
+    counts = {key: defaultdict(int) for key in ITEM_KINDS.values()}
+    for s in summaries:
+        for key, column in (("categories", "RecommandCates"), ("parks", "RecommandParks")):
+            for item in json.loads(s[column] or "[]"):
+                if item:
+                    counts[key][str(item)] += 1
+
+    result = {
+        "week_start": week_start(start),
+        "checkins": checkins,
+        "summaries": len(summaries),
+        "emotions": {
+            e: {
+                "mean": round(float(row[f"{e}_sum"]) / checkins, 2) if checkins else None,
+                "min": row[f"{e}_min"],
+                "max": row[f"{e}_max"],
+            }
+            for e in EMOTIONS
+        },
+    }
+    for key, items in counts.items():
+        ranked = sorted(items.items(), key=lambda kv: (-kv[1], kv[0]))[:top_items]  # WEEKLY_ITEMS_SQL 과 같은 순서
+        result[key] = [{"item": item, "count": count} for item, count in ranked]
+    return result
+
+
+DAILY_TREND_SQL = text(f"""
+    SELECT day, checkins, {", ".join(f"{e}_sum, {e}_min, {e}_max" for e in EMOTIONS)}
+    FROM tb_users_emotion_daily
+    WHERE nickname = :nickname AND day BETWEEN :since AND :until
+    ORDER BY day
+""")
+
+
+def daily_rows(conn, nickname: str, since: date, until: date) -> Optional[list]:
+    """일간 롤업 행 (SQLAlchemy). 롤업이 꺼져 있으면 None"""
+    if not rollups_enabled():
+        return None
+    try:
+        return conn.execute(DAILY_TREND_SQL, {"nickname": nickname, "since": since, "until": until}).mappings().all()
+    except Exception as e:
+        if not _missing_table(e):
+            raise
+        _disable(e)
+        return None
+
+
+def _means(sums: np.ndarray, counts: np.ndarray) -> list:
+    """합계/횟수 → 감정별 평균 dict 목록 (횟수 0 이면 None)"""
+    with np.errstate(invalid="ignore", divide="ignore"):
+        means = np.round(sums / counts[:, None], 2)
+    return [dict(zip(EMOTIONS, row)) if c else None for row, c in zip(means.tolist(), counts.tolist())]
+
+
+def _grouped(keys: np.ndarray, counts, sums, mins, maxs, labels) -> List[Dict[str, Any]]:
+    """달력 일 단위 배열을 keys(주/월 번호) 기준으로 합침 → 체크인 있는 구간만"""
+    uniq, inverse = np.unique(keys, return_inverse=True)
+    g_counts = np.zeros(len(uniq), dtype=np.int64)
+    g_sums = np.zeros((len(uniq), len(EMOTIONS)))
+    g_mins = np.full((len(uniq), len(EMOTIONS)), np.inf)
+    g_maxs = np.full((len(uniq), len(EMOTIONS)), -np.inf)
+    np.add.at(g_counts, inverse, counts)
+    np.add.at(g_sums, inverse, sums)
+    np.minimum.at(g_mins, inverse, mins)
+    np.maximum.at(g_maxs, inverse, maxs)
+
+    result = []
+    for i, mean in enumerate(_means(g_sums, g_counts)):
+        if mean is None:
+            continue
+        result.append({
+            **labels(uniq[i]),
+            "checkins": int(g_counts[i]),
+            "mean": mean,
+            "min": dict(zip(EMOTIONS, g_mins[i].astype(int).tolist())),
+            "max": dict(zip(EMOTIONS, g_maxs[i].astype(int).tolist())),
+        })
+    return result
+
+
+def emotion_trends(rows, start: date, end: date, windows=(7, 30)) -> Dict[str, Any]:
+    """일간 롤업 행 → 일/주/월 평균 + 체크인 가중 이동평균
+    rows 는 start - (max(windows) - 1)일 부터 end 까지 (이동평균 앞부분 계산용)"""
+    lead = max(windows) - 1 if windows else 0
+    origin = start - timedelta(days=lead)
+    n = (end - origin).days + 1
+
+    # 달력 일 단위 배열 (체크인 없는 날은 0)
+    counts = np.zeros(n, dtype=np.int64)
+    sums = np.zeros((n, len(EMOTIONS)))
+    mins = np.full((n, len(EMOTIONS)), np.inf)
+    maxs = np.full((n, len(EMOTIONS)), -np.inf)
+    for r in rows:
+        i = (_to_date(r["day"]) - origin).days
+        if 0 <= i < n:
+            counts[i] = r["checkins"]
+            sums[i] = [r[f"{e}_sum"] for e in EMOTIONS]
+            mins[i] = [r[f"{e}_min"] for e in EMOTIONS]
+            maxs[i] = [r[f"{e}_max"] for e in EMOTIONS]
+
+    days = np.arange(np.datetime64(origin), np.datetime64(end) + 1)
+
+    # 이동평균 : 누적합 차이로 창 합계를 한 번에 계산
+    cum_counts = np.concatenate([[0], np.cumsum(counts)])
+    cum_sums = np.vstack([np.zeros(len(EMOTIONS)), np.cumsum(sums, axis=0)])
+    idx = np.arange(lead, n) + 1
+    rolling = {}
+    for w in windows:
+        lo = np.maximum(idx - w, 0)
+        means = _means(cum_sums[idx] - cum_sums[lo], cum_counts[idx] - cum_counts[lo])
+        rolling[str(w)] = [{"date": str(d), "mean": m} for d, m in zip(days[lead:], means) if m is not None]
+
+    # 여기부터는 요청 기간만
+    counts, sums, mins, maxs, days = counts[lead:], sums[lead:], mins[lead:], maxs[lead:], days[lead:]
+    has = counts > 0
+    daily = [{"date": str(d), "checkins": int(c), "mean": m}
+             for d, c, m in zip(days[has], counts[has], _means(sums[has], counts[has]))]
+
+    # 주 번호: 1970-01-05(월) 기준 주 수 / 월 번호: 1970-01 기준 개월 수
+    day_numbers = days.astype("datetime64[D]").astype(np.int64)
+    weeks = (day_numbers - 4) // 7
+    months = days.astype("datetime64[M]").astype(np.int64)
+    weekly = _grouped(weeks[has], counts[has], sums[has], mins[has], maxs[has],
+                      lambda k: {"week_start": str(np.datetime64(int(k) * 7 + 4, "D"))})
+    monthly = _grouped(months[has], counts[has], sums[has], mins[has], maxs[has],
+                       lambda k: {"month": str(np.datetime64(int(k), "M"))})
+
+    return {
+        "from": str(start),
+        "to": str(end),
+        "checkins": int(counts.sum()),
+        "daily": daily,
+        "weekly": weekly,
+        "monthly": monthly,
+        "rolling": rolling,
+    }
+
+
+def rebuild(engine):
+    """원본(tb_users_emotions, tb_users_summary)에서 롤업 전체 재계산"""
+    with engine.begin() as conn:
+        emotions = conn.execute(text(f"""
+            SELECT nickname, create_date, {", ".join(EMOTIONS)} FROM tb_users_emotions
+        """)).mappings().all()
+        summaries = conn.execute(text("""
+            SELECT nickname, Create_date, RecommandCates, RecommandParks FROM tb_users_summary
+        """)).mappings().all()
+
+        conn.execute(text("DELETE FROM tb_users_weekly_rollup"))
+        conn.execute(text("DELETE FROM tb_users_weekly_items"))
+        conn.execute(text("DELETE FROM tb_users_emotion_daily"))
+        record_checkins(conn, emotions)
+
+        counts = defaultdict(int)
+        summary_counts = defaultdict(int)
+        for s in summaries:
+            week = week_start(s["Create_date"])
+            summary_counts[(s["nickname"], week)] += 1
+            for kind, column in (("category", "RecommandCates"), ("park", "RecommandParks")):
+                for item in json.loads(s[column] or "[]"):
+                    if item:
+                        counts[(s["nickname"], week, kind, str(item))] += 1
+        if summary_counts:
+            conn.execute(text("""
+                INSERT INTO tb_users_weekly_rollup (nickname, week_start, summaries)
+                VALUES (:nickname, :week_start, :summaries)
+                ON DUPLICATE KEY UPDATE summaries = VALUES(summaries)
+            """), [{"nickname": n, "week_start": w, "summaries": c} for (n, w), c in summary_counts.items()])
+        if counts:
+            conn.execute(text("""
+                INSERT INTO tb_users_weekly_items (nickname, week_start, kind, item, cnt)
+                VALUES (:nickname, :week_start, :kind, :item, :cnt)
+            """), [{"nickname": n, "week_start": w, "kind": k, "item": i, "cnt": c}
+                   for (n, w, k, i), c in counts.items()])
+    print(f"[INFO] 롤업 재계산 : 체크인 {len(emotions)}건, 요약 {len(summaries)}건")
+
+
+if __name__ == "__main__":
+    import argparse
+    from .db import engine
+
+    parser = argparse.ArgumentParser(description="감정 롤업 관리")
+    parser.add_argument("--rebuild", action="store_true", help="원본 테이블에서 롤업 전체 재계산")
+    args = parser.parse_args()
+    if args.rebuild:
+        rebuild(engine)
+    else:
+        parser.print_help()
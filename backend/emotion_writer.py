@@ -0,0 +1,262 @@
+# 감정 체크인 write-behind 저장 (EMOTION_WRITE_BEHIND=1 일 때만 사용)
+# - /emotions 요청은 로컬 로그 파일에 한 줄 추가(fsync) 후 바로 응답
+# - 백그라운드 스레드가 모아서 tb_users_emotions 에 multi-row INSERT
+# - 서버가 죽어도 재시작 시 로그의 미반영 구간을 다시 INSERT (crash recovery)
+# - 체크인마다 고유 ID(write_id, V007) → 같은 초에 들어온 체크인도 따로 저장, 복구 시 이미 들어간 행은 ID 로 건너뜀
+# - 아직 DB에 안 들어간 체크인은 메모리에 보관 → recommend_for_user 가 바로 읽을 수 있음 (read-your-writes)
+#   ※ 같은 사용자의 /emotions → /recommend_for_user 가 같은 워커로 가야 함 (워커 1개 또는 sticky 라우팅)
+from collections import deque
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+from typing import Dict, Any, Optional
+from sqlalchemy import text
+from dotenv import load_dotenv
+from .db import engine
+from .emotion_rollups import record_checkins
+import fcntl, json, os, threading, time, traceback, uuid
+
+load_dotenv()
+
+WRITE_BEHIND_ENABLED = os.getenv("EMOTION_WRITE_BEHIND", "0") == "1"
+LOG_DIR = Path(os.getenv("EMOTION_LOG_DIR", Path(__file__).parent / "data" / "emotion_log"))
+FLUSH_INTERVAL = float(os.getenv("EMOTION_FLUSH_INTERVAL", 0.5))  # 초
+FLUSH_BATCH_SIZE = 500
+MAX_SLOTS = 64                      # 워커별 로그 파일 수 상한
+ROTATE_SIZE = 1024 * 1024           # 모두 반영된 로그가 1MB 넘으면 비움
+KST = timezone(timedelta(hours=9))
+
+COLUMNS = ("nickname", "create_date", "depression", "anxiety", "stress", "happiness",
+           "achievement", "energy", "latitude", "longitude", "write_id")
+
+INSERT_SQL = text(f"""
+    INSERT INTO tb_users_emotions ({", ".join(COLUMNS)})
+    VALUES ({", ".join(":" + c for c in COLUMNS)})
+""")
+
+
+def write_key(rec: Dict[str, Any]):
+    """같은 체크인인지 판단하는 키. write_id 가 없는 예전 로그 줄은 (nickname, create_date)"""
+    return rec.get("write_id") or (rec["nickname"], rec["create_date"])
+
+
+class EmotionWriteBehind:
+    def __init__(self, log_dir: Path = LOG_DIR):
+        self.log_dir = log_dir
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()   # flush 중에는 위치 갱신 대기 (중복 INSERT 방지)
+        self._wakeup = threading.Event()
+        self._pending = deque()                       # (record, 로그 끝 offset)
+        self._latest: Dict[str, Dict[str, Any]] = {}  # nickname -> 미반영 최신 체크인
+        self._log = None
+        self._slot_fd = None
+        self._offset = 0
+        self._thread = None
+        self._stopping = False
+        self.flushed = self.batches = self.failures = 0
+
+    # ---------------------------
+    # 시작 / 종료
+    # ---------------------------
+    def start(self):
+        self.log_dir.mkdir(parents=True, exist_ok=True)
+        self._claim_slot()
+        self._recover()
+        self._thread = threading.Thread(target=self._run, name="emotion-flusher", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stopping = True
+        self._wakeup.set()
+        if self._thread:
+            self._thread.join(timeout=10)
+        self.flush()
+
+    def _claim_slot(self):
+        """비어 있는 슬롯(로그 파일)을 잠금 → 워커마다 다른 파일, 죽은 워커의 파일은 다음 워커가 이어받음"""
+        for slot in range(MAX_SLOTS):
+            fd = os.open(self.log_dir / f"slot-{slot}.lock", os.O_CREAT | os.O_RDWR)
+            try:
+                fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            except BlockingIOError:
+                os.close(fd)
+                continue
+            self._slot_fd = fd
+            self.log_path = self.log_dir / f"slot-{slot}.log"
+            self.checkpoint_path = self.log_dir / f"slot-{slot}.offset"
+            self._log = open(self.log_path, "ab")
+            return
+        raise RuntimeError("사용 가능한 감정 로그 슬롯이 없습니다.")
+
+    def _read_checkpoint(self) -> int:
+        try:
+            return int(self.checkpoint_path.read_text() or 0)
+        except (FileNotFoundError, ValueError):
+            return 0
+
+    def _write_checkpoint(self, offset: int):
+        tmp = self.checkpoint_path.with_suffix(".tmp")
+        tmp.write_text(str(offset))
+        os.replace(tmp, self.checkpoint_path)
+
+    def _recover(self):
+        """체크포인트 이후 로그(= DB 미반영 가능성 있음)를 다시 큐에 넣음"""
+        start = self._read_checkpoint()
+        self._offset = self.log_path.stat().st_size
+        if start >= self._offset:
+            return
+
+        records = []
+        with open(self.log_path, "rb") as f:
+            f.seek(start)
+            pos = start
+            for line in f:
+                pos += len(line)
+                try:
+                    records.append((json.loads(line), pos))
+                except ValueError:
+                    break  # 쓰다가 죽은 마지막 줄
+        if not records:
+            return
+
+        # INSERT 후 체크포인트 저장 전에 죽은 경우 → 이미 들어간 행은 건너뜀 (write_id 기준)
+        existing = set()
+        with engine.connect() as conn:
+            write_ids = tuple({rec["write_id"] for rec, _ in records if rec.get("write_id")})
+            if write_ids:
+                existing.update(r._mapping["write_id"] for r in conn.execute(text("""
+                    SELECT write_id FROM tb_users_emotions WHERE write_id IN :write_ids
+                """), {"write_ids": write_ids}))
+            legacy = [rec for rec, _ in records if not rec.get("write_id")]  # write_id 도입 전 로그 줄
+            if legacy:
+                existing.update(
+                    (r._mapping["nickname"], r._mapping["create_date"].strftime("%Y-%m-%d %H:%M:%S"))
+                    for r in conn.execute(text("""
+                        SELECT nickname, create_date FROM tb_users_emotions
+                        WHERE nickname IN :nicknames AND create_date >= :since
+                    """), {"nicknames": tuple({rec["nickname"] for rec in legacy}),
+                           "since": min(rec["create_date"] for rec in legacy)}))
+        with self._lock:
+            for rec, end in records:
+                if write_key(rec) in existing:
+                    continue
+                rec.setdefault("write_id", None)
+                self._pending.append((rec, end))
+                self._latest[rec["nickname"]] = rec
+            if not self._pending:
+                self._write_checkpoint(records[-1][1])
+        print(f"[INFO] 감정 로그 복구 : {len(self._pending)}건 재반영 예정 ({self.log_path.name})")
+
+    # ---------------------------
+    # 쓰기 / 읽기
+    # ---------------------------
+    def enqueue(self, nickname: str, emotions: Dict[str, int], latitude=None, longitude=None) -> Dict[str, Any]:
+        record = {
+            "nickname": nickname,
+            "create_date": datetime.now(KST).strftime("%Y-%m-%d %H:%M:%S"),
+            "depression": emotions["depression"],
+            "anxiety": emotions["anxiety"],
+            "stress": emotions["stress"],
+            "happiness": emotions["happiness"],
+            "achievement": emotions["achievement"],
+            "energy": emotions["energy"],
+            "latitude": latitude,
+            "longitude": longitude,
+            "write_id": uuid.uuid4().hex,
+        }
+        self._append(record)
+        return record
+
+    def _append(self, record: Dict[str, Any]):
+        line = (json.dumps(record, ensure_ascii=False) + "\n").encode("utf-8")
+        with self._lock:
+            self._log.write(line)
+            self._log.flush()
+            os.fsync(self._log.fileno())
+            self._offset += len(line)
+            self._pending.append((record, self._offset))
+            self._latest[record["nickname"]] = record
+            full = len(self._pending) >= FLUSH_BATCH_SIZE
+        if full:
+            self._wakeup.set()
+
+    def latest_pending(self, nickname: str) -> Optional[Dict[str, Any]]:
+        """아직 DB에 반영 안 된 최신 체크인 (없으면 None)"""
+        with self._lock:
+            rec = self._latest.get(nickname)
+            return dict(rec) if rec else None
+
+    def update_pending_location(self, nickname: str, latitude, longitude) -> bool:
+        """미반영 체크인이 있으면 위치를 로그에 다시 기록 (같은 write_id 로 덮어씀)"""
+        with self._flush_lock:
+            with self._lock:
+                rec = self._latest.get(nickname)
+                if rec is None:
+                    return False
+                updated = {**rec, "latitude": latitude, "longitude": longitude}
+                # 큐에 남아 있는 원본은 flush 때 건너뛰도록 교체
+                self._pending = deque((updated if r is rec else r, end) for r, end in self._pending)
+            self._append(updated)
+        return True
+
+    # ---------------------------
+    # 백그라운드 flush
+    # ---------------------------
+    def _run(self):
+        while not self._stopping:
+            self._wakeup.wait(FLUSH_INTERVAL)
+            self._wakeup.clear()
+            try:
+                self.flush()
+            except Exception:
+                self.failures += 1
+                traceback.print_exc()
+                time.sleep(min(30, FLUSH_INTERVAL * 2 ** min(self.failures, 6)))
+
+    def flush(self) -> int:
+        """큐에 쌓인 체크인을 배치로 INSERT. 반영한 건수 반환"""
+        with self._flush_lock:
+            return self._flush()
+
+    def _flush(self) -> int:
+        total = 0
+        while True:
+            with self._lock:
+                batch = list(self._pending)[:FLUSH_BATCH_SIZE]
+            if not batch:
+                return total
+
+            # 같은 체크인(write_id)이 여러 번 있으면 마지막 것만 (위치 갱신)
+            rows = {}
+            for rec, _ in batch:
+                rows[write_key(rec)] = rec
+            with engine.begin() as conn:
+                conn.execute(INSERT_SQL, list(rows.values()))  # pymysql executemany → multi-row INSERT
+                record_checkins(conn, rows.values())             # 같은 트랜잭션에서 롤업 갱신
+
+            with self._lock:
+                for _ in batch:
+                    self._pending.popleft()
+                for rec in rows.values():
+                    if self._latest.get(rec["nickname"]) is rec:
+                        del self._latest[rec["nickname"]]
+                self._write_checkpoint(batch[-1][1])
+                self._maybe_rotate()
+            self.flushed += len(rows)
+            self.batches += 1
+            self.failures = 0
+            total += len(rows)
+
+    def _maybe_rotate(self):
+        if not self._pending and self._offset > ROTATE_SIZE:
+            self._log.truncate(0)
+            self._log.seek(0)
+            self._offset = 0
+            self._write_checkpoint(0)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {"pending": len(self._pending), "flushed": self.flushed,
+                    "batches": self.batches, "failures": self.failures}
+
+
+emotion_writer = EmotionWriteBehind() if WRITE_BEHIND_ENABLED else None
@@ -2,9 +2,22 @@ from fastapi import FastAPI
 from backend.routers import auth, parks, emotions, visit
 from backend.routers import recommend_parks, recommend_category, recommend_for_user
 from backend.routers import generate_summary, generate_weekly_review
+from backend.routers import admin, health
+from backend.emotion_writer import emotion_writer
+from backend.park_documents import park_documents
+from backend.readiness import warmup
+from backend import metrics
+from backend.db import connect_raw
+from backend.park_snapshot import current_snapshot
+from algorithm import parks_algorithm
+from backend.request_context import RequestContextMiddleware
+from backend.profiling import ProfilingMiddleware, bind_request_threads
 from fastapi.middleware.cors import CORSMiddleware
 import logging
 
+# algorithm 패키지의 공원 검색에 replica 라우팅 + SQL 계측이 들어간 연결 사용, 공원 스냅샷이 있으면 후보 검색은 스냅샷에서
+parks_algorithm.configure(connect=lambda **kwargs: connect_raw(read_only=True, **kwargs), snapshot=current_snapshot)
+
 # FastAPI 앱 실행
 app = FastAPI()
 
@@ -20,6 +33,13 @@ app.include_router(recommend_for_user.router) # recommend_parks 라우터
 app.include_router(visit.router) # visit 라우터
 app.include_router(generate_summary.router) 
 app.include_router(generate_weekly_review.router)
+app.include_router(admin.router) # 운영용 admin 라우터
+app.include_router(health.router) # readiness 점검
+
+# 요청 ID / 요청 단위 프로파일링 (X-Profile 서명 헤더 또는 PROFILE_SAMPLE_RATE)
+bind_request_threads(app)  # 프로파일러가 요청을 처리하는 스레드만 샘플링하도록
+app.add_middleware(ProfilingMiddleware)
+app.add_middleware(RequestContextMiddleware)
 
 # CORS 설정
 app.add_middleware(
@@ -30,6 +50,34 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# write-behind 감정 저장 (EMOTION_WRITE_BEHIND=1)
+@app.on_event("startup")
+def start_emotion_writer():
+    if emotion_writer:
+        emotion_writer.start()
+        metrics.register_provider("emotion_writer", emotion_writer.stats)
+
+@app.on_event("shutdown")
+def stop_emotion_writer():
+    if emotion_writer:
+        emotion_writer.stop()
+
+# 워밍업 (DB 풀 연결, 공원 상세 문서/스냅샷/인덱스 적재, 무거운 모듈 import) - 끝날 때까지(최대 WARMUP_TIMEOUT)
+# 이 워커는 요청을 받지 않음 (startup 이 끝나야 연결을 받기 시작), 끝나기 전까지 /ready 는 503
+# 공원 상세 문서 생성이 실패해도 /parks/{id} 요청 시 한 건씩 조회
+@app.on_event("startup")
+def start_warmup():
+    metrics.register_provider("park_documents", park_documents.stats)
+    metrics.register_provider("warmup", warmup.stats)
+    warmup.start()
+
+# 재시작 전에 남은 로컬 요약(NeedsUpgrade = 1)이 있으면 LLM 요약 교체 작업 시작
+# (langchain 은 교체할 기록이 있을 때만 import - 서버 시작 시간 단축)
+@app.on_event("startup")
+def start_summary_upgrader():
+    from llm.summary_upgrade import summary_upgrader
+    summary_upgrader.start_if_pending()
+
 # 테스트용 루트 라우트 추가
 @app.get("/")
 def root():
@@ -0,0 +1,30 @@
+# 프로세스 단위 메트릭 (카운터 + 각 모듈 통계)
+from collections import defaultdict
+from typing import Callable, Dict, Any
+import threading
+
+_lock = threading.Lock()
+_counters: Dict[str, int] = defaultdict(int)
+_providers: Dict[str, Callable[[], Dict[str, Any]]] = {}
+
+
+def inc(name: str, value: int = 1):
+    """카운터 증가"""
+    with _lock:
+        _counters[name] += value
+
+
+def register_provider(name: str, fn: Callable[[], Dict[str, Any]]):
+    """모듈별 통계 함수 등록 (캐시 적중률 등) - /admin/metrics 에서 호출됨"""
+    _providers[name] = fn
+
+
+def snapshot() -> Dict[str, Any]:
+    with _lock:
+        result: Dict[str, Any] = {"counters": dict(_counters)}
+    for name, fn in list(_providers.items()):
+        try:
+            result[name] = fn()
+        except Exception as e:
+            result[name] = {"error": str(e)}
+    return result
@@ -0,0 +1,159 @@
+# 버전 관리되는 스키마 마이그레이션 + 주요 쿼리 실행 계획 점검
+#
+#   python -m backend.migrate                : 미적용 마이그레이션 적용
+#   python -m backend.migrate --status       : 적용 현황
+#   python -m backend.migrate --check-plans  : 주요 쿼리 EXPLAIN → full scan 이면 실패(exit 1)
+#                                              (실제 데이터가 있는 DB 에서 실행해야 의미 있음, 배포 전 점검용)
+#   TEST_DATABASE_URL=... python -m pytest tests/test_query_plans.py : 테스트용 DB 에 행을 채워 같은 점검 (CI)
+#
+# 마이그레이션 파일: backend/migrations/V<번호>__<설명>.sql (번호 순서대로 한 번만 적용)
+from pathlib import Path
+from typing import List, Dict, Any
+from sqlalchemy import text
+from .db import engine
+import argparse, hashlib, re, sys
+
+MIGRATIONS_DIR = Path(__file__).parent / "migrations"
+_FILE_RE = re.compile(r"^V(\d+)__(.+)\.sql$")
+
+def hot_queries() -> List[tuple]:
+    """(이름, 쿼리, 파라미터, EXPLAIN 의 table 값(별칭이 있으면 별칭), 커버링 인덱스 기대 여부)
+    쿼리는 실제로 실행하는 모듈의 상수를 그대로 사용 (무거운 모듈이 많아 점검할 때만 import)
+    - SQLAlchemy text() : 이름 파라미터 dict / pymysql 문자열(%s) : 순서 파라미터 tuple"""
+    from .routers.recommend_for_user import LATEST_EMOTION_SQL, LATEST_CATEGORIES_SQL, LATEST_PARKS_SQL
+    from .routers.visit import VISIT_LOOKUP_SQL, USER_VISITS_SQL, DISTRICT_HEATMAP_SQL
+    from .emotion_rollups import WEEKLY_ITEMS_SQL, DAILY_TREND_SQL
+    from llm.weekly_chain import EXISTING_REVIEW_SQL
+    nickname = {"nickname": "plan_check"}
+    return [
+        ("recommend_for_user: 최신 감정", LATEST_EMOTION_SQL, nickname, "tb_users_emotions", True),
+        ("latest_recommendation: 녹지 유형", LATEST_CATEGORIES_SQL, nickname, "tb_users_category_recommend", False),
+        ("latest_recommendation: 추천 공원", LATEST_PARKS_SQL, nickname, "tb_users_parks_recommend", False),
+        ("weekly_review: 주간 추천 항목", WEEKLY_ITEMS_SQL, ("plan_check", "2025-01-06"), "tb_users_weekly_items", True),
+        ("weekly_review: 기존 총평", EXISTING_REVIEW_SQL, ("plan_check", "2025-01-01"), "tb_weekly_review", False),
+        ("get_emotion_trends: 일간 롤업", DAILY_TREND_SQL,
+         {"nickname": "plan_check", "since": "2025-01-01", "until": "2025-12-31"}, "tb_users_emotion_daily", False),
+        ("toggle_visit_status: 방문 기록", VISIT_LOOKUP_SQL,
+         {"nickname": "plan_check", "park_id": 1, "create_date": "2025-01-01 00:00:00"}, "tb_parks_visit_log", False),
+        ("get_user_visits: 방문 횟수 집계", USER_VISITS_SQL, nickname, "tb_parks_visit_log", True),
+        ("get_district_heatmap: 방문 상태", DISTRICT_HEATMAP_SQL, nickname, "s", True),
+    ]
+
+
+def explain(conn, sql, params) -> List[Dict[str, Any]]:
+    if isinstance(sql, str):  # pymysql 형식 (%s)
+        result = conn.exec_driver_sql("EXPLAIN " + sql, params)
+    else:
+        result = conn.execute(text("EXPLAIN " + sql.text), params)
+    return [dict(r._mapping) for r in result]
+
+
+def discover() -> List[Dict[str, Any]]:
+    migrations = []
+    for path in sorted(MIGRATIONS_DIR.glob("V*.sql")):
+        m = _FILE_RE.match(path.name)
+        if not m:
+            continue
+        body = path.read_text(encoding="utf-8")
+        migrations.append({"version": int(m.group(1)), "name": m.group(2), "path": path,
+                           "sql": body, "checksum": hashlib.sha256(body.encode()).hexdigest()})
+    migrations.sort(key=lambda x: x["version"])
+    return migrations
+
+
+def split_statements(sql: str) -> List[str]:
+    """주석 줄 제거 후 ; 기준으로 분리"""
+    lines = [line for line in sql.splitlines() if not line.strip().startswith("--")]
+    return [s.strip() for s in "\n".join(lines).split(";") if s.strip()]
+
+
+def _ensure_table(conn):
+    conn.execute(text("""
+        CREATE TABLE IF NOT EXISTS tb_schema_migrations (
+            version INT PRIMARY KEY,
+            name VARCHAR(200) NOT NULL,
+            checksum CHAR(64) NOT NULL,
+            applied_at DATETIME NOT NULL DEFAULT CURRENT_TIMESTAMP
+        )
+    """))
+
+
+def applied_versions(conn) -> Dict[int, str]:
+    _ensure_table(conn)
+    rows = conn.execute(text("SELECT version, checksum FROM tb_schema_migrations")).fetchall()
+    return {r[0]: r[1] for r in rows}
+
+
+def migrate() -> int:
+    """미적용 마이그레이션 적용. 적용한 개수 반환 (DDL 은 자동 커밋이므로 파일 단위로 기록)"""
+    count = 0
+    with engine.begin() as conn:
+        applied = applied_versions(conn)
+    for mig in discover():
+        if mig["version"] in applied:
+            if applied[mig["version"]] != mig["checksum"]:
+                print(f"[WARN] V{mig['version']:03d} 파일이 적용 후 변경되었습니다: {mig['path'].name}")
+            continue
+        print(f"[INFO] 적용: {mig['path'].name}")
+        with engine.begin() as conn:
+            for stmt in split_statements(mig["sql"]):
+                conn.execute(text(stmt))
+            conn.execute(text("""
+                INSERT INTO tb_schema_migrations (version, name, checksum) VALUES (:v, :n, :c)
+            """), {"v": mig["version"], "n": mig["name"], "c": mig["checksum"]})
+        count += 1
+    return count
+
+
+def status():
+    with engine.begin() as conn:
+        applied = applied_versions(conn)
+    for mig in discover():
+        state = "적용됨" if mig["version"] in applied else "미적용"
+        if mig["version"] in applied and applied[mig["version"]] != mig["checksum"]:
+            state = "적용됨 (파일 변경됨)"
+        print(f"V{mig['version']:03d} {mig['name']:<45} {state}")
+
+
+def check_plans() -> List[str]:
+    """hot_queries() 를 EXPLAIN 해서 full scan / 인덱스 미사용 / 커버링 아님을 문제 목록으로 반환"""
+    problems = []
+    with engine.connect() as conn:
+        for name, sql, params, table, covering in hot_queries():
+            plan = explain(conn, sql, params)
+            rows = [p for p in plan if p.get("table") == table]
+            if not rows:
+                problems.append(f"{name}: 실행 계획에 {table} 이(가) 없습니다.")
+                continue
+            for p in rows:
+                extra = p.get("Extra") or ""
+                line = f"{name}: type={p.get('type')} key={p.get('key')} extra={extra}"
+                print(line)
+                notes = [x.strip() for x in extra.split(";")]
+                if p.get("type") is None and any("Impossible" in x or "no matching" in x for x in notes):
+                    continue  # 빈 테이블 등으로 옵티마이저가 미리 결과 없음 판단 - 계획 판단 불가
+                if p.get("type") == "ALL" or not p.get("key"):
+                    problems.append(f"{line}  → full scan")
+                elif covering and "Using index" not in notes:  # "Using index condition" 은 커버링 아님
+                    problems.append(f"{line}  → 커버링 인덱스 아님")
+    return problems
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--status", action="store_true")
+    parser.add_argument("--check-plans", action="store_true")
+    args = parser.parse_args()
+
+    if args.status:
+        status()
+    elif args.check_plans:
+        problems = check_plans()
+        if problems:
+            print("\n[FAIL] 실행 계획 회귀:")
+            for p in problems:
+                print("  " + p)
+            sys.exit(1)
+        print("\n[OK] 모든 주요 쿼리가 인덱스를 사용합니다.")
+    else:
+        print(f"[INFO] {migrate()}개 적용 완료")
@@ -0,0 +1,17 @@
+-- 사용자별 최신순 조회 (WHERE nickname = ? ORDER BY create_date DESC) 용 복합 인덱스
+-- (tb_users_emotions 는 V002 의 커버링 인덱스가 같은 역할)
+CREATE INDEX IF NOT EXISTS idx_category_recommend_nickname_date
+    ON tb_users_category_recommend (nickname, create_date);
+
+CREATE INDEX IF NOT EXISTS idx_parks_recommend_nickname_date
+    ON tb_users_parks_recommend (nickname, create_date);
+
+CREATE INDEX IF NOT EXISTS idx_summary_nickname_date
+    ON tb_users_summary (nickname, Create_date);
+
+CREATE INDEX IF NOT EXISTS idx_weekly_review_nickname_date
+    ON tb_weekly_review (nickname, create_date);
+
+-- 방문 토글 (nickname, park_id, create_date) 조회 + 방문 횟수 집계
+CREATE INDEX IF NOT EXISTS idx_visit_log_nickname_park_date
+    ON tb_parks_visit_log (nickname, park_id, create_date);
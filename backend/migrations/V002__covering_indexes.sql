@@ -0,0 +1,12 @@
+-- recommend_for_user 최신 감정 조회: 필요한 컬럼을 모두 포함 → 테이블 접근 없이 인덱스만 읽음
+CREATE INDEX IF NOT EXISTS idx_emotions_latest_covering
+    ON tb_users_emotions (nickname, create_date, depression, anxiety, stress, happiness,
+                          achievement, energy, latitude, longitude);
+
+-- 구별 방문 히트맵 (WHERE nickname = ? AND is_visited = 1 → park_id, visit_count)
+CREATE INDEX IF NOT EXISTS idx_parks_status_covering
+    ON tb_users_parks_status (nickname, is_visited, park_id, visit_count);
+
+-- 적응형 반경 검색의 위경도 박스 조건
+CREATE INDEX IF NOT EXISTS idx_parks_lat_lon
+    ON tb_parks (Latitude, Longitude);
@@ -0,0 +1,7 @@
+-- 지연 예산 초과 / 형식 오류로 로컬 요약이 저장된 기록 → 백그라운드 작업이 LLM 요약으로 교체
+ALTER TABLE tb_users_summary
+    ADD COLUMN IF NOT EXISTS NeedsUpgrade TINYINT(1) NOT NULL DEFAULT 0;
+
+-- 교체 대상 조회 (WHERE NeedsUpgrade = 1 ORDER BY Create_date)
+CREATE INDEX IF NOT EXISTS idx_summary_needs_upgrade
+    ON tb_users_summary (NeedsUpgrade, Create_date);
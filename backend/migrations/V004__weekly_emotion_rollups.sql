@@ -0,0 +1,25 @@
+-- 사용자별 주간 감정 롤업 (감정 체크인 / 요약 저장 시 증분 갱신, week_start = 월요일)
+-- 기존 데이터 채우기: python -m backend.emotion_rollups --rebuild
+CREATE TABLE IF NOT EXISTS tb_users_weekly_rollup (
+    nickname VARCHAR(50) NOT NULL,
+    week_start DATE NOT NULL,
+    checkins INT NOT NULL DEFAULT 0,
+    summaries INT NOT NULL DEFAULT 0,
+    depression_sum INT NOT NULL DEFAULT 0, depression_min TINYINT NULL, depression_max TINYINT NULL,
+    anxiety_sum INT NOT NULL DEFAULT 0, anxiety_min TINYINT NULL, anxiety_max TINYINT NULL,
+    stress_sum INT NOT NULL DEFAULT 0, stress_min TINYINT NULL, stress_max TINYINT NULL,
+    happiness_sum INT NOT NULL DEFAULT 0, happiness_min TINYINT NULL, happiness_max TINYINT NULL,
+    achievement_sum INT NOT NULL DEFAULT 0, achievement_min TINYINT NULL, achievement_max TINYINT NULL,
+    energy_sum INT NOT NULL DEFAULT 0, energy_min TINYINT NULL, energy_max TINYINT NULL,
+    PRIMARY KEY (nickname, week_start)
+);
+
+-- 주간 추천 횟수 (kind = 'category' / 'park')
+CREATE TABLE IF NOT EXISTS tb_users_weekly_items (
+    nickname VARCHAR(50) NOT NULL,
+    week_start DATE NOT NULL,
+    kind VARCHAR(10) NOT NULL,
+    item VARCHAR(100) NOT NULL,
+    cnt INT NOT NULL DEFAULT 0,
+    PRIMARY KEY (nickname, week_start, kind, item)
+);
@@ -0,0 +1,14 @@
+-- 사용자별 일간 감정 롤업 (체크인 저장 시 증분 갱신) → 추세 분석 /emotions/{nickname}/trends
+-- 기존 데이터 채우기: python -m backend.emotion_rollups --rebuild
+CREATE TABLE IF NOT EXISTS tb_users_emotion_daily (
+    nickname VARCHAR(50) NOT NULL,
+    day DATE NOT NULL,
+    checkins INT NOT NULL DEFAULT 0,
+    depression_sum INT NOT NULL DEFAULT 0, depression_min TINYINT NULL, depression_max TINYINT NULL,
+    anxiety_sum INT NOT NULL DEFAULT 0, anxiety_min TINYINT NULL, anxiety_max TINYINT NULL,
+    stress_sum INT NOT NULL DEFAULT 0, stress_min TINYINT NULL, stress_max TINYINT NULL,
+    happiness_sum INT NOT NULL DEFAULT 0, happiness_min TINYINT NULL, happiness_max TINYINT NULL,
+    achievement_sum INT NOT NULL DEFAULT 0, achievement_min TINYINT NULL, achievement_max TINYINT NULL,
+    energy_sum INT NOT NULL DEFAULT 0, energy_min TINYINT NULL, energy_max TINYINT NULL,
+    PRIMARY KEY (nickname, day)
+);
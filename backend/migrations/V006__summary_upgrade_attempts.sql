@@ -0,0 +1,5 @@
+-- 요약 교체 실패 기록 → 실패한 기록은 점점 늦게 다시 시도, UPGRADE_MAX_ATTEMPTS 번 실패하면 로컬 요약 그대로 둠
+-- (계속 실패하는 오래된 기록이 배치 앞자리를 차지해 새 기록이 교체되지 않는 문제 방지)
+ALTER TABLE tb_users_summary
+    ADD COLUMN IF NOT EXISTS UpgradeAttempts TINYINT NOT NULL DEFAULT 0,
+    ADD COLUMN IF NOT EXISTS UpgradeNextAt DATETIME NULL;
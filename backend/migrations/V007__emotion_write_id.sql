@@ -0,0 +1,8 @@
+-- write-behind 체크인 고유 ID (EMOTION_WRITE_BEHIND=1)
+-- 같은 초에 들어온 체크인도 따로 저장하고, 복구 시 이미 INSERT 된 행은 (nickname, create_date) 대신 이 ID 로 건너뜀
+-- 직접 INSERT 한 행은 NULL (UNIQUE 인덱스는 NULL 여러 개 허용)
+ALTER TABLE tb_users_emotions
+    ADD COLUMN IF NOT EXISTS write_id CHAR(32) NULL;
+
+CREATE UNIQUE INDEX IF NOT EXISTS uq_emotions_write_id
+    ON tb_users_emotions (write_id);
@@ -0,0 +1,202 @@
+# 공원 상세 문서 (기본정보 + 시설물 한글 라벨 + 키워드) 미리 계산해서 메모리에 보관
+# 공원/시설물 데이터는 거의 안 바뀌므로 시작 시(또는 /admin/reload_park_documents) 한 번만 조회
+# → /parks/{id} 는 DB 조회 없이 문서 + 실시간 날씨만 합침
+# 공원 스냅샷(park_snapshot)이 있으면 워커별 dict 없이 스냅샷(mmap)에서 바로 읽음
+# 없는 park_id 도 MISS_TTL 동안 기억 (잘못된 ID 요청마다 DB 조회하지 않도록)
+# /admin/reload_park_documents 는 park_documents_version 으로 모든 워커에 전달
+from typing import Dict, Any, Optional, Tuple
+from sqlalchemy import text
+from .db import get_read_engine
+from .cache import SharedVersion
+import threading, time
+
+MISS_TTL = 300          # 없는 공원 기억 시간(초)
+MAX_MISSES = 10000
+
+# 시설물 컬럼 → 한글 라벨 (순서 = 화면 표시 순서)
+FACILITY_LABELS = (
+    ("Square", "광장"),
+    ("Trail", "산책로"),
+    ("Pond", "연못"),
+    ("Fountain", "분수"),
+    ("Campground", "야영장"),
+    ("Pavilion", "정자"),
+    ("Playground", "놀이터"),
+    ("Sports_ground", "운동장"),
+    ("Fitness_facility", "운동기구"),
+    ("Cultural_facility", "문화시설"),
+    ("Zoo", "동물원"),
+    ("Botanical_garden", "식물원"),
+    ("Toilet", "화장실"),
+    ("Parking", "주차장"),
+    ("Convenience", "편의시설"),
+)
+
+DOCUMENT_SQL = f"""
+    SELECT 
+        p.ID AS park_id,
+        p.Park AS ParkName,
+        p.Address,
+        p.Tel AS PhoneNumber,
+        p.Latitude,
+        p.Longitude,
+        {", ".join("f." + col for col, _ in FACILITY_LABELS)},
+        k.Keyword_1, k.Keyword_2, k.Keyword_3
+    FROM tb_parks p
+    LEFT JOIN tb_parks_facilities f ON f.ParkID = p.ID
+    LEFT JOIN tb_parks_keywords k ON k.ParkID = p.ID
+"""
+
+
+class ParkDocumentStore:
+    """
+    park_id -> (이름, 주소, 전화, 위도, 경도, 시설 라벨 튜플, 키워드 튜플)
+    시설 라벨 튜플은 조합(bitmask)별로 하나만 만들어서 공유
+    """
+    def __init__(self):
+        self._docs: Dict[int, Tuple] = {}
+        self._labels_by_mask: Dict[int, Tuple[str, ...]] = {}
+        self._lock = threading.Lock()
+        self._misses: Dict[int, float] = {}  # park_id -> 만료 시각
+        self.loaded_at = None
+        self.source = None  # "db" 또는 "snapshot <버전>"
+        self.negative_hits = 0
+
+    def _labels(self, mask: int) -> Tuple[str, ...]:
+        labels = self._labels_by_mask.get(mask)
+        if labels is None:
+            labels = tuple(label for i, (_, label) in enumerate(FACILITY_LABELS) if mask & (1 << i))
+            self._labels_by_mask[mask] = labels
+        return labels
+
+    def _compile(self, row) -> Tuple:
+        mask = 0
+        for i, (col, _) in enumerate(FACILITY_LABELS):
+            if row[col]:
+                mask |= 1 << i
+        keywords = tuple(kw for kw in (row["Keyword_1"], row["Keyword_2"], row["Keyword_3"]) if kw)
+        return (row["ParkName"], row["Address"], row["PhoneNumber"],
+                row["Latitude"], row["Longitude"], self._labels(mask), keywords)
+
+    def load(self) -> int:
+        """전체 공원 문서 다시 생성 (새 dict 로 통째 교체 → 읽는 쪽은 잠금 불필요)
+        스냅샷을 쓰는 중이면 DB 를 읽지 않고 스냅샷 링크만 다시 확인 (DB 변경은 스냅샷을 다시 내보내야 반영)"""
+        from .park_snapshot import refresh
+        snapshot = refresh()
+        if snapshot is not None:
+            self.source = f"snapshot {snapshot.version}"
+            print(f"[INFO] 공원 상세 문서 : 스냅샷 {snapshot.version} 사용 (DB 조회 생략)")
+            return len(snapshot)
+        with get_read_engine().connect() as conn:
+            rows = conn.execute(text(DOCUMENT_SQL)).mappings().all()
+        with self._lock:
+            docs = {int(row["park_id"]): self._compile(row) for row in rows}
+            self._docs = docs
+            self._misses = {}
+            self.loaded_at = time.time()
+            self.source = "db"
+        print(f"[INFO] 공원 상세 문서 {len(docs)}개 생성")
+        return len(docs)
+
+    def _load_one(self, park_id: int) -> Optional[Tuple]:
+        """시작 시 로드 실패 / 새로 추가된 공원 → 한 건만 조회해서 보관 (없으면 MISS_TTL 동안 기억)"""
+        expires = self._misses.get(park_id)
+        if expires is not None and expires > time.time():
+            self.negative_hits += 1
+            return None
+        with get_read_engine().connect() as conn:
+            row = conn.execute(text(DOCUMENT_SQL + " WHERE p.ID = :park_id"),
+                               {"park_id": park_id}).mappings().first()
+        if not row:
+            with self._lock:
+                if len(self._misses) >= MAX_MISSES:
+                    self._misses = {}
+                self._misses[park_id] = time.time() + MISS_TTL
+            return None
+        with self._lock:
+            doc = self._compile(row)
+            self._docs[park_id] = doc
+        return doc
+
+    def get(self, park_id: int) -> Optional[Dict[str, Any]]:
+        from .park_snapshot import current_snapshot
+        snapshot = current_snapshot()
+        if snapshot is not None:
+            doc = snapshot.document(park_id)
+            if doc is not None:
+                return doc
+        doc = self._docs.get(park_id)
+        if doc is None:
+            doc = self._load_one(park_id)
+            if doc is None:
+                return None
+        name, address, tel, lat, lon, facilities, keywords = doc
+        return {
+            "id": park_id,
+            "name": name,
+            "address": address,
+            "tel": tel,
+            "lat": lat,
+            "lon": lon,
+            "facilities": list(facilities),
+            "keywords": list(keywords),
+        }
+
+    def stats(self) -> Dict[str, Any]:
+        return {"parks": len(self._docs), "source": self.source, "facility_sets": len(self._labels_by_mask),
+                "loaded_at": self.loaded_at, "misses": len(self._misses), "negative_hits": self.negative_hits}
+
+
+park_documents = ParkDocumentStore()
+
+# 공원/시설물/키워드 갱신 신호 - bump() 하면 모든 워커에서 문서 다시 생성
+park_documents_version = SharedVersion("park_documents")
+park_documents_version.on_change(park_documents.load)
+
+
+# ========================= 벤치마크 =========================
+# python -m backend.park_documents          : 더미 데이터로 파이썬 처리 시간 비교
+# python -m backend.park_documents --live 1 : 실제 DB로 (기존 2회 조회 방식 vs 문서 조회) 비교
+if __name__ == "__main__":
+    import argparse, random, statistics
+
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--live", type=int, default=None, help="실제 DB 에서 측정할 park_id")
+    parser.add_argument("-n", type=int, default=200)
+    args = parser.parse_args()
+
+    def timed(fn, n):
+        samples = []
+        for _ in range(n):
+            t = time.perf_counter()
+            fn()
+            samples.append((time.perf_counter() - t) * 1e6)
+        return statistics.median(samples), sorted(samples)[int(n * 0.99) - 1]
+
+    if args.live is None:
+        fake_row = {col: random.randint(0, 1) for col, _ in FACILITY_LABELS}
+
+        def before():  # 기존: 요청마다 facility_map dict + 라벨 리스트 생성
+            facility_map = {col: label for col, label in FACILITY_LABELS}
+            return [label for key, label in facility_map.items() if fake_row[key]]
+
+        store = ParkDocumentStore()
+        store._docs[1] = store._compile({**fake_row, "ParkName": "서울숲", "Address": "서울특별시 성동구",
+                                         "PhoneNumber": "02", "Latitude": 37.5, "Longitude": 127.0,
+                                         "Keyword_1": "산책", "Keyword_2": None, "Keyword_3": None})
+        for name, fn in (("before (dict 재생성)", before), ("after (문서 조회)", lambda: store.get(1))):
+            med, p99 = timed(fn, 100000)
+            print(f"{name:<22} median={med:7.2f} us  p99={p99:7.2f} us")
+    else:
+        from .db import engine
+
+        def before():  # 기존: 공원 + 시설물 2회 조회
+            with engine.connect() as conn:
+                conn.execute(text("SELECT ID, Park, Address, Tel, Latitude, Longitude FROM tb_parks WHERE ID = :id"),
+                             {"id": args.live}).first()
+                conn.execute(text("SELECT * FROM tb_parks_facilities WHERE ParkID = :id"), {"id": args.live}).first()
+
+        park_documents.load()
+        for name, fn in (("before (DB 2회)", before), ("after (문서 조회)", lambda: park_documents.get(args.live))):
+            med, p99 = timed(fn, args.n)
+            print(f"{name:<22} median={med / 1000:8.3f} ms  p99={p99 / 1000:8.3f} ms")
@@ -0,0 +1,204 @@
+# 지도 화면용 공원 클러스터 (뷰포트 + 줌 레벨)
+# - 카카오맵 레벨(1 = 가장 확대 ~ 14 = 가장 축소) 기준으로 레벨별 격자 클러스터를 한 번에 미리 계산
+#   격자 한 칸 = 화면 약 CELL_PX 픽셀 → 레벨이 1 올라갈 때마다 칸 크기 2배
+# - 요청 시에는 뷰포트(bbox)에 걸치는 칸만 잘라서 반환 → 응답 크기가 화면 크기에 비례 (전체 공원 수와 무관)
+# - INDIVIDUAL_MAX_LEVEL 이하로 확대했거나 뷰포트 안 공원이 적으면 개별 공원 반환 (최대 MAX_INDIVIDUAL 개)
+# - 공원 스냅샷(mmap)이 있으면 거기서, 없으면 DB 에서 만들고, 스냅샷 버전이 바뀌면 다시 만듦
+from typing import Any, Dict, List, Optional, Tuple
+from sqlalchemy import text
+from .park_documents import park_documents_version
+import math, threading, time
+import numpy as np
+
+MIN_LEVEL, MAX_LEVEL = 1, 14
+INDIVIDUAL_MAX_LEVEL = 4     # 이 레벨 이하(충분히 확대)는 개별 공원
+INDIVIDUAL_LIMIT = 150       # 뷰포트 안 공원이 이 수 이하이면 레벨과 무관하게 개별 공원
+MAX_INDIVIDUAL = 1000        # 확대 레벨이라도 bbox 가 지나치게 넓어 이보다 많으면 클러스터로
+CELL_PX = 64                 # 클러스터 격자 한 칸의 화면 크기(픽셀)
+METERS_PER_PX_LEVEL1 = 0.25  # 카카오맵 레벨 1 의 픽셀당 거리(m), 레벨마다 2배
+REFERENCE_LAT = 37.55        # 경도 방향 칸 크기 계산 기준 위도 (서울)
+
+MAP_SQL = "SELECT ID, Park, Latitude, Longitude FROM tb_parks"
+
+
+def cell_size(level: int) -> Tuple[float, float]:
+    """레벨별 격자 칸 크기 (위도, 경도 도 단위) - 서울 기준으로 화면상 정사각형"""
+    meters = CELL_PX * METERS_PER_PX_LEVEL1 * 2 ** (level - 1)
+    return meters / 111_320, meters / (111_320 * math.cos(math.radians(REFERENCE_LAT)))
+
+
+class ClusterLevel:
+    """한 레벨의 격자 클러스터. 칸은 경도 칸 번호(ix) 순으로 정렬 → bbox 조회는 이진 탐색 + 위도 마스크"""
+    def __init__(self, level: int, lats: np.ndarray, lons: np.ndarray):
+        self.level = level
+        self.cell_lat, self.cell_lon = cell_size(level)
+        iy = np.floor(lats / self.cell_lat).astype(np.int64)
+        ix = np.floor(lons / self.cell_lon).astype(np.int64)
+        keys, inverse, counts = np.unique(np.stack([ix, iy], axis=1), axis=0,
+                                          return_inverse=True, return_counts=True)
+        inverse = inverse.reshape(-1)
+        self.ix, self.iy = keys[:, 0], keys[:, 1]
+        self.counts = counts.astype(np.int32)
+        self.lats = np.bincount(inverse, weights=lats, minlength=len(keys)) / counts
+        self.lons = np.bincount(inverse, weights=lons, minlength=len(keys)) / counts
+        # 공원이 하나뿐인 칸은 클러스터 대신 그 공원으로 표시
+        self.single = np.full(len(keys), -1, dtype=np.int64)
+        single_cells = counts[inverse] == 1
+        self.single[inverse[single_cells]] = np.nonzero(single_cells)[0]
+
+    def __len__(self):
+        return len(self.counts)
+
+    def select(self, min_lat: float, min_lon: float, max_lat: float, max_lon: float) -> np.ndarray:
+        """뷰포트에 걸치는 칸 번호"""
+        lo = np.searchsorted(self.ix, math.floor(min_lon / self.cell_lon), side="left")
+        hi = np.searchsorted(self.ix, math.floor(max_lon / self.cell_lon), side="right")
+        iy = self.iy[lo:hi]
+        mask = (iy >= math.floor(min_lat / self.cell_lat)) & (iy <= math.floor(max_lat / self.cell_lat))
+        return lo + np.nonzero(mask)[0]
+
+
+class ClusterPyramid:
+    """레벨 MIN_LEVEL ~ MAX_LEVEL 클러스터 전체 (한 번 만들면 바뀌지 않음, 교체는 ParkMap 이)"""
+    def __init__(self, ids, names: List[str], lats, lons, version: Optional[str] = None):
+        lats, lons = np.asarray(lats, dtype=np.float64), np.asarray(lons, dtype=np.float64)
+        valid = ~(np.isnan(lats) | np.isnan(lons))
+        order = np.argsort(lons[valid], kind="stable")  # 개별 공원 bbox 조회용 (경도 순)
+        self.ids = np.asarray(ids, dtype=np.int64)[valid][order]
+        self.names = [names[i] for i in np.nonzero(valid)[0][order]]
+        self.lats, self.lons = lats[valid][order], lons[valid][order]
+        self.version = version
+        self.levels = {level: ClusterLevel(level, self.lats, self.lons)
+                       for level in range(MIN_LEVEL, MAX_LEVEL + 1)}
+
+    def __len__(self):
+        return len(self.ids)
+
+    def _park(self, i: int) -> Dict[str, Any]:
+        return {"type": "park", "id": int(self.ids[i]), "name": self.names[i],
+                "lat": float(self.lats[i]), "lon": float(self.lons[i])}
+
+    def parks_in(self, min_lat: float, min_lon: float, max_lat: float, max_lon: float) -> np.ndarray:
+        lo = np.searchsorted(self.lons, min_lon, side="left")
+        hi = np.searchsorted(self.lons, max_lon, side="right")
+        lats = self.lats[lo:hi]
+        return lo + np.nonzero((lats >= min_lat) & (lats <= max_lat))[0]
+
+    def query(self, min_lat: float, min_lon: float, max_lat: float, max_lon: float, level: int) -> Dict[str, Any]:
+        level = min(max(level, MIN_LEVEL), MAX_LEVEL)
+        clusters = self.levels[level]
+        cells = clusters.select(min_lat, min_lon, max_lat, max_lon)
+        # 칸 단위로 자르므로 뷰포트 가장자리 칸의 공원까지 포함 (지도를 조금 움직여도 클러스터 숫자가 안 바뀜)
+        total = int(clusters.counts[cells].sum())
+
+        if total <= INDIVIDUAL_LIMIT or (level <= INDIVIDUAL_MAX_LEVEL and total <= MAX_INDIVIDUAL):
+            parks = self.parks_in(min_lat, min_lon, max_lat, max_lon)
+            if len(parks) <= MAX_INDIVIDUAL:
+                return {"level": level, "clustered": False, "total": len(parks),
+                        "items": [self._park(i) for i in parks.tolist()]}
+
+        items = []
+        for c in cells.tolist():
+            single = int(clusters.single[c])
+            if single >= 0:
+                items.append(self._park(single))
+            else:
+                items.append({"type": "cluster", "count": int(clusters.counts[c]),
+                              "lat": round(float(clusters.lats[c]), 6), "lon": round(float(clusters.lons[c]), 6)})
+        return {"level": level, "clustered": True, "total": total, "items": items}
+
+
+class ParkMap:
+    def __init__(self):
+        self._pyramid: Optional[ClusterPyramid] = None
+        self._lock = threading.Lock()
+        self.built_at = None
+        self.build_ms = None
+        self.builds = 0
+
+    def build(self) -> ClusterPyramid:
+        from .park_snapshot import current_snapshot
+        t0 = time.perf_counter()
+        snapshot = current_snapshot()
+        if snapshot is not None:
+            names = [snapshot.string(i, "Park") for i in range(snapshot.count)]
+            pyramid = ClusterPyramid(snapshot.ids, names, snapshot.lat, snapshot.lon, snapshot.version)
+        else:
+            from .db import get_read_engine
+            with get_read_engine().connect() as conn:
+                rows = conn.execute(text(MAP_SQL)).mappings().all()
+            nan = float("nan")
+            pyramid = ClusterPyramid([r["ID"] for r in rows], [r["Park"] for r in rows],
+                                     [nan if r["Latitude"] is None else float(r["Latitude"]) for r in rows],
+                                     [nan if r["Longitude"] is None else float(r["Longitude"]) for r in rows])
+        self.build_ms = round((time.perf_counter() - t0) * 1000, 1)
+        self._pyramid, self.built_at = pyramid, time.time()
+        self.builds += 1
+        print(f"[INFO] 지도 클러스터 : 공원 {len(pyramid)}개, {self.build_ms}ms")
+        return pyramid
+
+    def pyramid(self) -> ClusterPyramid:
+        from .park_snapshot import current_snapshot
+        pyramid = self._pyramid
+        snapshot = current_snapshot()
+        if pyramid is None or (snapshot is not None and snapshot.version != pyramid.version):
+            with self._lock:
+                pyramid = self._pyramid
+                if pyramid is None or (snapshot is not None and snapshot.version != pyramid.version):
+                    pyramid = self.build()
+        return pyramid
+
+    def invalidate(self):
+        """공원 데이터 갱신 후 호출 → 다음 요청 때 다시 만듦"""
+        self._pyramid = None
+
+    def query(self, min_lat: float, min_lon: float, max_lat: float, max_lon: float, level: int) -> Dict[str, Any]:
+        return self.pyramid().query(min_lat, min_lon, max_lat, max_lon, level)
+
+    def stats(self) -> Dict[str, Any]:
+        pyramid = self._pyramid
+        return {"parks": 0 if pyramid is None else len(pyramid), "version": None if pyramid is None else pyramid.version,
+                "cells": {} if pyramid is None else {lv: len(c) for lv, c in pyramid.levels.items()},
+                "built_at": self.built_at, "build_ms": self.build_ms, "builds": self.builds}
+
+
+park_map = ParkMap()
+park_documents_version.on_change(park_map.invalidate)  # 공원 데이터 갱신 시 모든 워커에서 다시 만듦
+
+
+# 벤치마크 : python -m backend.park_map --parks 3000
+if __name__ == "__main__":
+    import argparse, random, statistics
+    from .responses import dumps
+
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--parks", type=int, default=3000)
+    parser.add_argument("-n", type=int, default=5000)
+    args = parser.parse_args()
+
+    random.seed(0)
+    ids = list(range(args.parks))
+    names = [f"공원{i}" for i in ids]
+    lats = [37.43 + random.random() * 0.27 for _ in ids]
+    lons = [126.76 + random.random() * 0.43 for _ in ids]
+    t0 = time.perf_counter()
+    pyramid = ClusterPyramid(ids, names, lats, lons)
+    print(f"build : {args.parks} parks, {(time.perf_counter() - t0) * 1000:.1f} ms")
+
+    full = [pyramid._park(i) for i in range(len(pyramid))]
+    print(f"전체 목록 : {len(full)} items, {len(dumps(full)) / 1024:.1f} KB")
+    for level in (3, 5, 7, 9):
+        # 가로 1000px x 세로 700px 화면
+        lat_span = 700 * METERS_PER_PX_LEVEL1 * 2 ** (level - 1) / 111_320
+        lon_span = lat_span * 1000 / 700 / math.cos(math.radians(REFERENCE_LAT))
+        samples, sizes, counts = [], [], []
+        for _ in range(args.n // 4):
+            lat, lon = random.uniform(37.45, 37.68), random.uniform(126.8, 127.15)
+            t = time.perf_counter()
+            result = pyramid.query(lat - lat_span / 2, lon - lon_span / 2, lat + lat_span / 2, lon + lon_span / 2, level)
+            samples.append((time.perf_counter() - t) * 1e6)
+            counts.append(len(result["items"]))
+            sizes.append(len(dumps(result)))
+        samples.sort()
+        print(f"level {level:>2} : items={statistics.mean(counts):6.1f}  body={statistics.mean(sizes) / 1024:5.1f} KB  "
+              f"median={statistics.median(samples):7.1f} us  p99={samples[int(len(samples) * 0.99)]:7.1f} us")
@@ -0,0 +1,278 @@
+# 공원 카탈로그 + 점수 스냅샷 (메모리 맵 바이너리 파일)
+# - 내보내기: tb_parks / tb_parks_score / tb_parks_facilities / tb_parks_keywords 를 열(column) 단위 고정폭 배열 + 문자열 테이블로 저장
+# - 읽기: mmap → numpy 뷰 (복사 없음). 모든 uvicorn 워커가 같은 페이지 캐시를 공유하고 시작 시 DB 조회 불필요
+# - 버전: parks-<시각>-<해시>.snap 파일 + current 심볼릭 링크를 os.replace 로 교체 (원자적 전환)
+#   읽는 쪽은 RELOAD_CHECK_INTERVAL 마다 링크 대상이 바뀌었는지 확인해서 새 파일로 갈아탐
+#
+#   python -m backend.park_snapshot --export : DB → 새 스냅샷 생성 후 current 전환
+#   python -m backend.park_snapshot --info   : 현재 스냅샷 정보
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional
+from dotenv import load_dotenv
+from sqlalchemy import text
+import hashlib, json, mmap, os, struct, threading, time
+import numpy as np
+
+from .park_documents import FACILITY_LABELS
+
+load_dotenv()
+
+SNAPSHOT_DIR = Path(os.getenv("PARK_SNAPSHOT_DIR", Path(__file__).parent / "data" / "park_snapshot"))
+CURRENT_LINK = "current"
+KEEP_SNAPSHOTS = 3          # 이전 버전은 최근 몇 개만 보관 (이미 열어 둔 워커는 계속 읽을 수 있음)
+RELOAD_CHECK_INTERVAL = 5   # current 링크 확인 주기(초)
+
+MAGIC = b"PKSNAP01"
+HEADER = struct.Struct("<8sIId")  # magic, 공원 수, 메타데이터(JSON) 길이, 생성 시각
+ALIGN = 8
+
+INDICATORS = ("Nature", "Convenience", "Safety", "Activity", "Social")
+STRING_FIELDS = ("Park", "Address", "Tel", "Class", "Description", "Keyword_1", "Keyword_2", "Keyword_3")
+
+SNAPSHOT_SQL = f"""
+    SELECT
+        p.ID, p.Park, p.Address, p.Tel, p.Class, p.Description, p.Latitude, p.Longitude,
+        s.ParkID AS ScoreParkID, {", ".join("s." + c for c in INDICATORS)}, s.Coverage,
+        {", ".join("f." + col for col, _ in FACILITY_LABELS)},
+        k.Keyword_1, k.Keyword_2, k.Keyword_3
+    FROM tb_parks p
+    LEFT JOIN tb_parks_score s ON s.ParkID = p.ID
+    LEFT JOIN tb_parks_facilities f ON f.ParkID = p.ID
+    LEFT JOIN tb_parks_keywords k ON k.ParkID = p.ID
+    ORDER BY p.ID
+"""
+
+
+# ---------------------------
+# 내보내기
+# ---------------------------
+def _float(value) -> float:
+    return float(value) if value is not None else np.nan
+
+
+def build_columns(rows: List[Dict[str, Any]]) -> Dict[str, np.ndarray]:
+    """DB 행 → 열 배열 (ID 오름차순). 결측 숫자는 NaN, 결측 문자열은 빈 문자열"""
+    rows = sorted(rows, key=lambda r: int(r["ID"]))
+    n = len(rows)
+    mask = np.zeros(n, dtype=np.uint16)
+    for i, row in enumerate(rows):
+        for bit, (col, _) in enumerate(FACILITY_LABELS):
+            if row.get(col):
+                mask[i] |= 1 << bit
+
+    # 문자열 테이블: 모든 문자열을 UTF-8 로 이어 붙이고 (공원 x 필드 + 1) 개의 끝 위치 저장
+    blob, offsets = bytearray(), [0]
+    for row in rows:
+        for field in STRING_FIELDS:
+            blob += (row.get(field) or "").encode("utf-8")
+            offsets.append(len(blob))
+
+    return {
+        "ids": np.array([int(r["ID"]) for r in rows], dtype=np.int64),
+        "lat": np.array([_float(r["Latitude"]) for r in rows], dtype=np.float64),
+        "lon": np.array([_float(r["Longitude"]) for r in rows], dtype=np.float64),
+        "indicators": np.array([[_float(r.get(c)) for c in INDICATORS] for r in rows],
+                               dtype=np.float64).reshape(n, len(INDICATORS)),
+        "coverage": np.array([_float(r.get("Coverage")) for r in rows], dtype=np.float64),
+        "has_score": np.array([r.get("ScoreParkID") is not None for r in rows], dtype=np.uint8),
+        "facility_mask": mask,
+        "string_offsets": np.array(offsets, dtype=np.uint32),
+        "strings": np.frombuffer(bytes(blob), dtype=np.uint8),
+    }
+
+
+def write_snapshot(columns: Dict[str, np.ndarray], directory: Path = SNAPSHOT_DIR) -> Path:
+    """열 배열 → 새 스냅샷 파일 → current 링크 원자적 교체. 새 파일 경로 반환"""
+    directory.mkdir(parents=True, exist_ok=True)
+    meta, body, offset = {"columns": {}, "string_fields": STRING_FIELDS,
+                          "facilities": [col for col, _ in FACILITY_LABELS]}, bytearray(), 0
+    for name, array in columns.items():
+        array = np.ascontiguousarray(array)
+        pad = (-offset) % ALIGN
+        body += b"\0" * pad
+        offset += pad
+        meta["columns"][name] = {"dtype": array.dtype.str, "shape": list(array.shape), "offset": offset}
+        body += array.tobytes()
+        offset += array.nbytes
+
+    digest = hashlib.sha256(bytes(body)).hexdigest()[:12]
+    meta["version"] = f"{datetime.now():%Y%m%d%H%M%S}-{digest}"
+    meta_bytes = json.dumps(meta).encode("utf-8")
+    head = HEADER.pack(MAGIC, len(columns["ids"]), len(meta_bytes), time.time()) + meta_bytes
+    head += b"\0" * ((-len(head)) % ALIGN)  # 열 offset 은 본문 기준 → 본문 시작도 8바이트 정렬
+
+    path = directory / f"parks-{meta['version']}.snap"
+    tmp = path.with_suffix(".tmp")
+    with open(tmp, "wb") as f:
+        f.write(head)
+        f.write(body)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp, path)
+
+    link_tmp = directory / (CURRENT_LINK + ".tmp")
+    if link_tmp.is_symlink() or link_tmp.exists():
+        link_tmp.unlink()
+    link_tmp.symlink_to(path.name)
+    os.replace(link_tmp, directory / CURRENT_LINK)  # 읽는 쪽은 이전/새 파일 중 하나만 봄
+
+    others = sorted((p for p in directory.glob("parks-*.snap") if p != path), key=lambda p: p.stat().st_mtime)
+    for old in others[:max(len(others) - (KEEP_SNAPSHOTS - 1), 0)]:
+        old.unlink()
+    return path
+
+
+def export_snapshot(directory: Path = SNAPSHOT_DIR) -> Path:
+    from .db import get_read_engine
+    with get_read_engine().connect() as conn:
+        rows = [dict(r) for r in conn.execute(text(SNAPSHOT_SQL)).mappings().all()]
+    path = write_snapshot(build_columns(rows), directory)
+    print(f"[INFO] 공원 스냅샷 생성 : {path.name} ({len(rows)}개)")
+    return path
+
+
+# ---------------------------
+# 읽기 (mmap)
+# ---------------------------
+class ParkSnapshot:
+    """스냅샷 파일 하나. 배열은 모두 mmap 위의 읽기 전용 뷰"""
+    def __init__(self, path: Path):
+        self.path = Path(path)
+        with open(self.path, "rb") as f:
+            self._mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, count, meta_len, self.created_at = HEADER.unpack_from(self._mm, 0)
+        if magic != MAGIC:
+            raise ValueError(f"공원 스냅샷 형식이 아닙니다: {self.path}")
+        meta = json.loads(self._mm[HEADER.size:HEADER.size + meta_len])
+        base = HEADER.size + meta_len
+        base += (-base) % ALIGN
+
+        self.version = meta["version"]
+        self.string_fields = tuple(meta["string_fields"])
+        self._field_index = {name: i for i, name in enumerate(self.string_fields)}
+        self.facility_columns = tuple(meta["facilities"])
+        for name, col in meta["columns"].items():
+            dtype = np.dtype(col["dtype"])
+            size = int(np.prod(col["shape"]))
+            view = np.frombuffer(self._mm, dtype=dtype, count=size, offset=base + col["offset"])
+            setattr(self, name, view.reshape(col["shape"]))
+        self.count = count
+        self._labels_by_mask: Dict[int, tuple] = {}
+        self._strings = memoryview(self.strings)
+
+    def __len__(self):
+        return self.count
+
+    def row(self, park_id: int) -> Optional[int]:
+        """ID 는 오름차순 저장 → 이진 탐색 (워커마다 dict 를 만들지 않음)"""
+        i = int(np.searchsorted(self.ids, park_id))
+        return i if i < self.count and self.ids[i] == park_id else None
+
+    def string(self, row: int, field: str) -> Optional[str]:
+        k = row * len(self.string_fields) + self._field_index[field]
+        start, end = int(self.string_offsets[k]), int(self.string_offsets[k + 1])
+        return bytes(self._strings[start:end]).decode("utf-8") or None
+
+    def facilities(self, row: int) -> tuple:
+        mask = int(self.facility_mask[row])
+        labels = self._labels_by_mask.get(mask)
+        if labels is None:
+            labels = tuple(label for i, (_, label) in enumerate(FACILITY_LABELS) if mask & (1 << i))
+            self._labels_by_mask[mask] = labels
+        return labels
+
+    def document(self, park_id: int) -> Optional[Dict[str, Any]]:
+        """ParkDocumentStore.get 과 같은 형태"""
+        i = self.row(park_id)
+        if i is None:
+            return None
+        s = lambda field: self.string(i, field)
+        return {
+            "id": park_id,
+            "name": s("Park"),
+            "address": s("Address"),
+            "tel": s("Tel"),
+            "lat": float(self.lat[i]),
+            "lon": float(self.lon[i]),
+            "facilities": list(self.facilities(i)),
+            "keywords": [kw for kw in (s("Keyword_1"), s("Keyword_2"), s("Keyword_3")) if kw],
+        }
+
+    def catalog(self) -> Iterator[Dict[str, Any]]:
+        """tb_parks + 키워드 행 형태 (/parks, /park_emotion 용)"""
+        for i in range(self.count):
+            yield {"ID": int(self.ids[i]), "Latitude": float(self.lat[i]), "Longitude": float(self.lon[i]),
+                   **{field: self.string(i, field) for field in self.string_fields}}
+
+    def score_rows(self) -> List[Dict[str, Any]]:
+        """tb_parks_score JOIN tb_parks 행 형태 (점수 있는 공원만)"""
+        rows = []
+        for i in np.nonzero(self.has_score)[0].tolist():
+            values = self.indicators[i].tolist()
+            coverage = float(self.coverage[i])
+            rows.append({"ParkID": int(self.ids[i]), "Park": self.string(i, "Park"),
+                         **{c: (None if v != v else v) for c, v in zip(INDICATORS, values)},
+                         "Coverage": None if coverage != coverage else coverage,
+                         "Latitude": float(self.lat[i]), "Longitude": float(self.lon[i])})
+        return rows
+
+    def info(self) -> Dict[str, Any]:
+        return {"version": self.version, "parks": self.count, "path": self.path.name,
+                "bytes": len(self._mm), "created_at": self.created_at}
+
+
+_snapshot: Optional[ParkSnapshot] = None
+_snapshot_target: Optional[str] = None
+_last_check = 0.0
+_lock = threading.Lock()
+
+
+def current_snapshot() -> Optional[ParkSnapshot]:
+    """current 링크가 가리키는 스냅샷 (없으면 None → 호출한 쪽은 DB 사용)"""
+    global _snapshot, _snapshot_target, _last_check
+    if time.time() - _last_check < RELOAD_CHECK_INTERVAL:
+        return _snapshot
+    with _lock:
+        _last_check = time.time()
+        link = SNAPSHOT_DIR / CURRENT_LINK
+        try:
+            target = os.readlink(link)
+        except OSError:
+            return _snapshot
+        if target != _snapshot_target:
+            try:
+                snapshot = ParkSnapshot(SNAPSHOT_DIR / target)
+            except Exception as e:
+                print(f"[WARN] 공원 스냅샷 로드 실패, 기존 유지 : {e}")
+                return _snapshot
+            # 이전 스냅샷의 mmap 은 참조가 모두 사라지면 해제됨
+            _snapshot, _snapshot_target = snapshot, target
+            print(f"[INFO] 공원 스냅샷 사용 : {snapshot.version} ({snapshot.count}개)")
+        return _snapshot
+
+
+def refresh() -> Optional[ParkSnapshot]:
+    """확인 주기를 기다리지 않고 current 링크를 바로 다시 확인 (내보내기 직후 / 갱신 신호를 받은 워커)"""
+    global _last_check
+    with _lock:
+        _last_check = 0.0
+    return current_snapshot()
+
+
+def stats() -> Dict[str, Any]:
+    return _snapshot.info() if _snapshot else {"version": None}
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="공원 스냅샷 관리")
+    parser.add_argument("--export", action="store_true", help="DB 에서 새 스냅샷 생성 후 current 전환")
+    parser.add_argument("--info", action="store_true", help="현재 스냅샷 정보")
+    args = parser.parse_args()
+    if args.export:
+        export_snapshot()
+    if args.info or not args.export:
+        snap = current_snapshot()
+        print(json.dumps(snap.info() if snap else {"version": None}, ensure_ascii=False, indent=2))
@@ -0,0 +1,195 @@
+# 요청 단위 프로파일링 (필요할 때만)
+# - 관리자 서명 헤더(X-Profile) 또는 PROFILE_SAMPLE_RATE 비율로 선택된 요청만 샘플링 프로파일러 실행
+# - 결과는 flamegraph 용 folded stack 형식 ("a;b;c 12") 으로 저장 → /admin/profiles/{request_id}
+# - 꺼져 있을 때는 헤더 한 번 확인하는 것 외에 비용 없음
+#
+# 서명 헤더 만들기: python -m backend.profiling --ttl 300
+from collections import Counter, OrderedDict
+from pathlib import Path
+from typing import Dict, Any, Optional
+from dotenv import load_dotenv
+from .request_context import header, request_id_var, request_state, valid_request_id
+import functools, hashlib, hmac, inspect, os, random, sys, threading, time
+
+load_dotenv()
+
+ADMIN_API_KEY = os.getenv("ADMIN_API_KEY")
+PROFILE_SAMPLE_RATE = float(os.getenv("PROFILE_SAMPLE_RATE", 0))  # 0~1, 무작위 프로파일 비율
+PROFILE_INTERVAL = float(os.getenv("PROFILE_INTERVAL", 0.005))     # 샘플링 간격(초)
+PROFILE_DIR = os.getenv("PROFILE_DIR")                              # 지정 시 .folded 파일로도 저장
+MAX_PROFILES = 100
+
+
+def sign(expires: int) -> str:
+    mac = hmac.new(ADMIN_API_KEY.encode(), str(expires).encode(), hashlib.sha256).hexdigest()
+    return f"{expires}.{mac}"
+
+
+def verify(value: str) -> bool:
+    """X-Profile: <만료 unix time>.<HMAC-SHA256(ADMIN_API_KEY, 만료시각)>"""
+    if not ADMIN_API_KEY:
+        return False
+    try:
+        expires, _ = value.split(".", 1)
+        if int(expires) < time.time():
+            return False
+    except ValueError:
+        return False
+    return hmac.compare_digest(value, sign(int(expires)))
+
+
+class StackSampler(threading.Thread):
+    """이 요청을 처리 중인 스레드의 스택만 주기적으로 수집
+    - 동기 엔드포인트 : 스레드풀에서 엔드포인트를 실행 중인 스레드 (bind_request_threads 가 요청 상태에 기록)
+    - 그 외(라우팅, 의존성, async 엔드포인트) : 이벤트 루프 스레드 중 엔드포인트 함수가 스택에 있을 때만
+      (이벤트 루프는 다른 요청도 처리하므로)"""
+    def __init__(self, scope, state: Dict[str, Any], loop_thread: int, interval: float = PROFILE_INTERVAL):
+        super().__init__(name="request-profiler", daemon=True)
+        self.scope = scope
+        self.state = state
+        self.loop_thread = loop_thread
+        self.interval = interval
+        self.stacks = Counter()
+        self.samples = 0
+        self._stop_event = threading.Event()
+
+    def run(self):
+        names = {}
+        while not self._stop_event.wait(self.interval):
+            ident, code = self.state.get("thread"), None
+            if ident is None:
+                code = getattr(self.scope.get("endpoint"), "__code__", None)
+                if code is None:  # 아직 라우팅 전
+                    continue
+                ident = self.loop_thread
+            frame = sys._current_frames().get(ident)
+            stack = []
+            found = code is None
+            while frame is not None:
+                c = frame.f_code
+                if c is code:
+                    found = True
+                stack.append(f"{c.co_name} ({os.path.basename(c.co_filename)}:{c.co_firstlineno})")
+                frame = frame.f_back
+            if found:
+                if ident not in names:
+                    names[ident] = next((t.name for t in threading.enumerate() if t.ident == ident), str(ident))
+                stack.append(names[ident])
+                self.stacks[";".join(reversed(stack))] += 1
+                self.samples += 1
+
+    def stop(self):
+        self._stop_event.set()
+        self.join()
+
+    def folded(self) -> str:
+        return "\n".join(f"{stack} {count}" for stack, count in self.stacks.most_common())
+
+
+def _bind_thread(endpoint):
+    @functools.wraps(endpoint)
+    def wrapper(*args, **kwargs):
+        state = request_state()
+        if state is None:
+            return endpoint(*args, **kwargs)
+        state["thread"] = threading.get_ident()
+        try:
+            return endpoint(*args, **kwargs)
+        finally:
+            state.pop("thread", None)
+    return wrapper
+
+
+def bind_request_threads(app):
+    """동기 엔드포인트가 실행되는 스레드풀 스레드를 요청 상태에 기록 (라우터 등록 후 호출)"""
+    for route in app.routes:
+        dependant = getattr(route, "dependant", None)
+        call = getattr(dependant, "call", None)
+        if call is not None and not inspect.iscoroutinefunction(call) and not hasattr(call, "__wrapped__"):
+            dependant.call = _bind_thread(call)
+
+
+class ProfileStore:
+    def __init__(self, max_profiles: int = MAX_PROFILES):
+        self._profiles: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.max_profiles = max_profiles
+
+    @staticmethod
+    def _path(request_id: str) -> Optional[Path]:
+        """PROFILE_DIR 안의 파일 경로. 요청 ID 형식이 아니면 None (경로 조작 방지)"""
+        if not PROFILE_DIR or not valid_request_id(request_id):
+            return None
+        return Path(PROFILE_DIR) / f"{request_id}.folded"
+
+    def save(self, request_id: str, info: Dict[str, Any], folded: str):
+        with self._lock:
+            self._profiles[request_id] = {**info, "folded": folded}
+            while len(self._profiles) > self.max_profiles:
+                self._profiles.popitem(last=False)
+        path = self._path(request_id)
+        if path is not None:
+            path.parent.mkdir(parents=True, exist_ok=True)
+            path.write_text(folded, encoding="utf-8")
+
+    def get(self, request_id: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            profile = self._profiles.get(request_id)
+        path = self._path(request_id)
+        if profile is None and path is not None:
+            if path.exists():
+                return {"request_id": request_id, "folded": path.read_text(encoding="utf-8")}
+        return profile
+
+    def list(self):
+        with self._lock:
+            return [{k: v for k, v in p.items() if k != "folded"} for p in self._profiles.values()]
+
+
+profile_store = ProfileStore()
+
+
+class ProfilingMiddleware:
+    """RequestContextMiddleware 안쪽에 등록 (요청 ID 사용)"""
+    def __init__(self, app):
+        self.app = app
+
+    def _should_profile(self, scope) -> bool:
+        value = header(scope, b"x-profile")
+        if value is not None:
+            return verify(value)
+        return PROFILE_SAMPLE_RATE > 0 and random.random() < PROFILE_SAMPLE_RATE
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not self._should_profile(scope):
+            return await self.app(scope, receive, send)
+
+        state = request_state()
+        sampler = StackSampler(scope, {} if state is None else state, threading.get_ident())
+        start = time.perf_counter()
+        sampler.start()
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            sampler.stop()
+            route = scope.get("route")
+            request_id = request_id_var.get()
+            profile_store.save(request_id, {
+                "request_id": request_id,
+                "route": getattr(route, "path", scope.get("path")),
+                "path": scope.get("path"),
+                "query": scope.get("query_string", b"").decode("latin-1"),
+                "duration_ms": round((time.perf_counter() - start) * 1000, 2),
+                "samples": sampler.samples,
+                "created": time.time(),
+            }, sampler.folded())
+
+
+if __name__ == "__main__":
+    import argparse
+    parser = argparse.ArgumentParser(description="X-Profile 헤더 값 생성")
+    parser.add_argument("--ttl", type=int, default=300, help="유효 시간(초)")
+    args = parser.parse_args()
+    if not ADMIN_API_KEY:
+        sys.exit("ADMIN_API_KEY 가 설정되어 있지 않습니다.")
+    print(f"X-Profile: {sign(int(time.time()) + args.ttl)}")
@@ -0,0 +1,158 @@
+# 비싼 API(LLM 요약/총평, 사용자 추천) 사용자별 요청 제한
+# - 토큰 버킷: (엔드포인트 종류, 경로, 사용자)별 초당 refill / 최대 burst → 초과 시 429 + Retry-After
+# - 동시 실행 상한: 엔드포인트 종류별 워커당 동시 처리 수 → 초과 시 503 + Retry-After
+# - 버킷 저장소는 교체 가능: 기본은 프로세스 메모리, RATE_LIMIT_REDIS_URL 설정 시 Redis (워커 간 공유)
+from collections import OrderedDict
+from typing import Dict, Tuple
+from fastapi import HTTPException, Request
+from fastapi.concurrency import run_in_threadpool
+from dotenv import load_dotenv
+from . import metrics
+from .resp_client import RespClient
+import math, os, threading, time
+
+load_dotenv()
+
+# 종류: (초당 refill, burst, 워커당 동시 실행 수)
+LIMITS: Dict[str, Tuple[float, int, int]] = {
+    "llm": (1 / 20, 3, 4),          # 20초에 1회, 최대 3회 연속
+    "recommend": (1 / 2, 5, 16),    # 2초에 1회, 최대 5회 연속
+}
+REDIS_URL = os.getenv("RATE_LIMIT_REDIS_URL")
+
+
+class MemoryBucketStore:
+    """프로세스 메모리 토큰 버킷 (워커마다 따로 셈)
+    max_keys 를 넘으면 가장 오래 안 쓴 버킷부터 지움 (LRU, O(1)) - 오래 안 쓴 버킷은 대개 다시 가득 차 있어 지워도 동작 동일"""
+    def __init__(self, max_keys: int = 100000):
+        self._buckets: "OrderedDict[str, Tuple[float, float]]" = OrderedDict()  # key -> (tokens, 마지막 갱신 시각), 사용 순
+        self._lock = threading.Lock()
+        self.max_keys = max_keys
+
+    def take(self, key: str, rate: float, capacity: int) -> Tuple[bool, float]:
+        now = time.monotonic()
+        with self._lock:
+            tokens, ts = self._buckets.get(key, (capacity, now))
+            tokens = min(capacity, tokens + (now - ts) * rate)
+            if tokens >= 1:
+                allowed, retry_after = True, 0.0
+                tokens -= 1
+            else:
+                allowed, retry_after = False, (1 - tokens) / rate
+            self._buckets[key] = (tokens, now)
+            self._buckets.move_to_end(key)
+            while len(self._buckets) > self.max_keys:
+                self._buckets.popitem(last=False)
+        return allowed, retry_after
+
+
+class RedisBucketStore:
+    """Redis 토큰 버킷 (Lua 스크립트로 원자적 처리, 서버 시각 사용) → 여러 워커/서버가 공유"""
+    SCRIPT = """
+    local rate = tonumber(ARGV[1])
+    local capacity = tonumber(ARGV[2])
+    local t = redis.call('TIME')
+    local now = tonumber(t[1]) + tonumber(t[2]) / 1000000
+    local b = redis.call('HMGET', KEYS[1], 'tokens', 'ts')
+    local tokens = tonumber(b[1]) or capacity
+    local ts = tonumber(b[2]) or now
+    tokens = math.min(capacity, tokens + (now - ts) * rate)
+    local allowed = 0
+    local retry = 0
+    if tokens >= 1 then
+        tokens = tokens - 1
+        allowed = 1
+    else
+        retry = (1 - tokens) / rate
+    end
+    redis.call('HSET', KEYS[1], 'tokens', tostring(tokens), 'ts', tostring(now))
+    redis.call('PEXPIRE', KEYS[1], math.ceil(capacity / rate * 1000) + 1000)
+    return {allowed, tostring(retry)}
+    """
+
+    def __init__(self, url: str):
+        self.client = RespClient(url)
+        self.fallback = MemoryBucketStore()
+
+    def take(self, key: str, rate: float, capacity: int) -> Tuple[bool, float]:
+        try:
+            allowed, retry = self.client.execute("EVAL", self.SCRIPT, 1, f"ratelimit:{key}", rate, capacity)
+            return bool(allowed), float(retry)
+        except Exception as e:
+            # Redis 장애 시 워커 단위 제한으로 대체 (요청 자체는 막지 않음)
+            metrics.inc("rate_limit.backend_errors")
+            print(f"[WARN] rate limit 저장소 오류, 메모리 버킷 사용 : {e}")
+            return self.fallback.take(key, rate, capacity)
+
+
+bucket_store = RedisBucketStore(REDIS_URL) if REDIS_URL else MemoryBucketStore()
+
+
+class ConcurrencyLimiter:
+    """엔드포인트 종류별 동시 실행 수 제한 (기다리지 않고 바로 거절)"""
+    def __init__(self):
+        self._active: Dict[str, int] = {}
+        self._lock = threading.Lock()
+
+    def try_acquire(self, name: str, limit: int) -> bool:
+        with self._lock:
+            if self._active.get(name, 0) >= limit:
+                return False
+            self._active[name] = self._active.get(name, 0) + 1
+            return True
+
+    def release(self, name: str):
+        with self._lock:
+            self._active[name] -= 1
+
+    def stats(self):
+        with self._lock:
+            return dict(self._active)
+
+
+concurrency = ConcurrencyLimiter()
+metrics.register_provider("rate_limit", lambda: {
+    "backend": type(bucket_store).__name__,
+    "active": concurrency.stats(),
+})
+
+
+async def _user_key(request: Request) -> str:
+    """사용자 식별: query(user_nickname / nickname) → JSON body(nickname) → 클라이언트 IP"""
+    nickname = request.query_params.get("user_nickname") or request.query_params.get("nickname")
+    if not nickname and request.headers.get("content-type", "").startswith("application/json"):
+        try:
+            body = await request.json()
+            if isinstance(body, dict):
+                nickname = body.get("nickname")
+        except Exception:
+            pass
+    if nickname:
+        return f"user:{nickname}"
+    return f"ip:{request.client.host if request.client else 'unknown'}"
+
+
+def rate_limited(endpoint_class: str):
+    """라우트 dependencies 에 추가: Depends(rate_limited("llm"))"""
+    rate, capacity, max_concurrent = LIMITS[endpoint_class]
+
+    async def dependency(request: Request):
+        user = await _user_key(request)
+        # Redis 저장소는 소켓 I/O (타임아웃 1초 + 재시도) → 이벤트 루프를 막지 않도록 스레드풀에서
+        allowed, retry_after = await run_in_threadpool(
+            bucket_store.take, f"{endpoint_class}:{request.url.path}:{user}", rate, capacity)
+        if not allowed:
+            metrics.inc(f"rate_limit.{endpoint_class}.rejected_429")
+            raise HTTPException(status_code=429, detail="요청이 너무 많습니다. 잠시 후 다시 시도해주세요.",
+                                headers={"Retry-After": str(max(1, math.ceil(retry_after)))})
+
+        if not concurrency.try_acquire(endpoint_class, max_concurrent):
+            metrics.inc(f"rate_limit.{endpoint_class}.rejected_503")
+            raise HTTPException(status_code=503, detail="요청이 많아 처리할 수 없습니다. 잠시 후 다시 시도해주세요.",
+                                headers={"Retry-After": "1"})
+        try:
+            yield
+        finally:
+            concurrency.release(endpoint_class)
+
+    return dependency
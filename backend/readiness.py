@@ -0,0 +1,228 @@
+# 준비 상태(readiness) + 워밍업
+# - 워밍업 (서버 시작 시 별도 스레드, startup 은 끝날 때까지 기다림): DB 커넥션 풀 미리 연결 → 공원 데이터(상세 문서, 스냅샷, 지도 클러스터,
+#   유사 공원 인덱스, 점수 모델) 미리 적재 → 첫 요청 때 import 하던 모듈(requests, langchain 체인) 미리 import
+#   필수 단계(db, parks)가 실패하면 WARMUP_RETRY_SECONDS 후 다시 시도, 끝나기 전까지 /ready 는 503
+# - 의존성 점검: DB / OpenWeather / OpenAI 응답 여부와 지연시간. 로드밸런서가 자주 호출하므로 결과를 잠시 재사용
+#   (OpenWeather, OpenAI 는 실패해도 대체 응답이 있으므로 ready 에는 영향 없이 degraded 로만 표시)
+# - 워커(프로세스)마다 따로 워밍업/판정. 워밍업이 끝날 때까지 서버 시작(startup)을 막음 → uvicorn 워커는 startup 이
+#   끝나야 소켓에서 연결을 받으므로, 한 워커의 /ready 200 을 보고 들어온 요청이 아직 차가운 다른 워커로 가지 않음
+#   (WARMUP_TIMEOUT 안에 안 끝나면 경고 후 요청을 받기 시작하고 워밍업은 백그라운드에서 계속, 그동안 /ready 는 503)
+from concurrent.futures import ThreadPoolExecutor, wait
+from typing import Any, Callable, Dict, Optional
+from sqlalchemy import text
+from dotenv import load_dotenv
+import os, threading, time
+
+load_dotenv()
+
+WARMUP_ENABLED = os.getenv("WARMUP_ENABLED", "1") == "1"
+WARMUP_DB_CONNECTIONS = int(os.getenv("WARMUP_DB_CONNECTIONS", "0"))  # 0 이면 풀 크기(pool_size)만큼
+WARMUP_RETRY_SECONDS = 5
+WARMUP_TIMEOUT = float(os.getenv("WARMUP_TIMEOUT", "120"))  # startup 에서 기다리는 최대 시간(초), 0 이면 기다리지 않음
+PROBE_TIMEOUT = float(os.getenv("READINESS_PROBE_TIMEOUT", "2"))
+PROBE_TTL = {"db": 2, "weather": 30, "llm": 30}  # 점검 결과 재사용 시간(초) - 외부 API 호출 횟수 제한
+REQUIRED_STEPS = ("db", "parks")
+PROBE_LAT, PROBE_LON = 37.5665, 126.9780  # 날씨 점검 좌표 (서울시청)
+
+
+def _timed(fn: Callable[[], Any]) -> Dict[str, Any]:
+    t0 = time.perf_counter()
+    try:
+        detail = fn()
+        result = {"ok": True}
+        if detail:
+            result.update(detail)
+    except Exception as e:
+        result = {"ok": False, "error": f"{type(e).__name__}: {e}"}
+    result["ms"] = round((time.perf_counter() - t0) * 1000, 1)
+    return result
+
+
+# ---------------------------
+# 워밍업 단계
+# ---------------------------
+def _fill_pool(engine, count: int):
+    """커넥션 count 개를 동시에 열었다가 반납 → 풀에 연결이 남아 첫 요청들이 연결을 기다리지 않음"""
+    conns = []
+    try:
+        for _ in range(count):
+            conn = engine.connect()
+            conns.append(conn)
+            conn.execute(text("SELECT 1"))
+    finally:
+        for conn in conns:
+            conn.close()
+
+
+def warm_db():
+    from .db import engine, read_engine
+    engines = [engine] if read_engine is engine else [engine, read_engine]
+    count = WARMUP_DB_CONNECTIONS
+    for e in engines:
+        _fill_pool(e, count or e.pool.size())
+    return {"connections": sum(count or e.pool.size() for e in engines)}
+
+
+def warm_parks():
+    from .park_documents import park_documents
+    from .park_snapshot import current_snapshot
+    from .park_map import park_map
+    from algorithm.model_registry import get_model
+    from algorithm.park_similarity import park_similarity
+    snapshot = current_snapshot()
+    parks = park_documents.load()
+    park_map.pyramid()
+    park_similarity.index()
+    get_model()
+    return {"parks": parks, "snapshot": snapshot.version if snapshot else None}
+
+
+def warm_imports():
+    """첫 요청 때 import 하던 무거운 모듈 (날씨: requests, 요약/주간 리뷰: langchain)"""
+    import requests  # noqa: F401
+    import llm.summary_chain  # noqa: F401
+    import llm.weekly_chain  # noqa: F401
+
+
+WARMUP_STEPS = (("db", warm_db), ("parks", warm_parks), ("imports", warm_imports))
+
+
+class WarmUp:
+    def __init__(self, steps=WARMUP_STEPS):
+        self.steps = steps
+        self.state = "pending"   # pending → running → ready (필수 단계 실패 시 running 상태로 재시도)
+        self.attempts = 0
+        self.started_at = None
+        self.finished_at = None
+        self.results: Dict[str, Dict[str, Any]] = {}
+        self._thread: Optional[threading.Thread] = None
+        self._done = threading.Event()
+
+    @property
+    def ready(self) -> bool:
+        return self._done.is_set()
+
+    def run(self):
+        self.state, self.started_at = "running", time.time()
+        pending = [name for name, _ in self.steps]
+        while pending:
+            self.attempts += 1
+            for name, fn in self.steps:
+                if name not in pending:
+                    continue
+                self.results[name] = _timed(fn)
+                if self.results[name]["ok"] or name not in REQUIRED_STEPS:
+                    pending.remove(name)
+                else:
+                    print(f"[WARN] 워밍업 실패 ({name}) : {self.results[name]['error']}")
+            if pending:
+                time.sleep(WARMUP_RETRY_SECONDS)
+        self.state, self.finished_at = "ready", time.time()
+        self._done.set()
+        print(f"[INFO] 워밍업 완료 : {round(self.finished_at - self.started_at, 2)}s "
+              + ", ".join(f"{k}={v['ms']}ms" for k, v in self.results.items()))
+
+    def start(self, timeout: float = WARMUP_TIMEOUT):
+        """워밍업 시작 후 끝날 때까지(최대 timeout 초) 기다림 - startup 에서 호출하면 그동안 요청을 받지 않음"""
+        if not WARMUP_ENABLED:
+            self.state = "ready"
+            self._done.set()
+            return
+        if self._thread is None:
+            self._thread = threading.Thread(target=self.run, name="warmup", daemon=True)
+            self._thread.start()
+        if timeout > 0 and not self.wait(timeout):
+            print(f"[WARN] 워밍업이 {timeout:g}초 안에 끝나지 않아 요청을 받기 시작합니다 (/ready 는 완료 전까지 503)")
+
+    def wait(self, timeout: Optional[float] = None) -> bool:
+        return self._done.wait(timeout)
+
+    def stats(self) -> Dict[str, Any]:
+        duration = None
+        if self.started_at and self.finished_at:
+            duration = round(self.finished_at - self.started_at, 3)
+        return {"state": self.state, "attempts": self.attempts, "seconds": duration, "steps": dict(self.results)}
+
+
+warmup = WarmUp()
+
+
+# ---------------------------
+# 의존성 점검
+# ---------------------------
+def probe_db():
+    from .db import engine, read_engine, replica_lag
+    with engine.connect() as conn:
+        conn.execute(text("SELECT 1"))
+    if read_engine is engine:
+        return None
+    with read_engine.connect() as conn:
+        conn.execute(text("SELECT 1"))
+    return {"replica_lag": replica_lag()}
+
+
+def probe_weather():
+    import requests
+    from .routers.parks import API_KEY, BASE_URL
+    if not API_KEY:
+        raise RuntimeError("OPENWEATHER_API_KEY 미설정")
+    res = requests.get(BASE_URL, params={"lat": PROBE_LAT, "lon": PROBE_LON, "appid": API_KEY},
+                       timeout=PROBE_TIMEOUT)
+    res.raise_for_status()
+    return {"status": res.status_code}
+
+
+def probe_llm():
+    """모델 목록 조회 (토큰 비용 없음). 요약 체인과 같은 커넥션 풀을 써서 TLS 연결도 미리 맺어 둠"""
+    from llm.client import http_client
+    base_url = (os.getenv("OPENAI_BASE_URL") or os.getenv("OPENAI_API_BASE") or "https://api.openai.com/v1").rstrip("/")
+    res = http_client().get(f"{base_url}/models", timeout=PROBE_TIMEOUT,
+                            headers={"Authorization": f"Bearer {os.getenv('OPENAI_API_KEY', '')}"})
+    res.raise_for_status()
+    return {"status": res.status_code}
+
+
+PROBES = {"db": probe_db, "weather": probe_weather, "llm": probe_llm}
+
+
+class DependencyChecker:
+    def __init__(self, probes=PROBES, ttl=PROBE_TTL):
+        self.probes = probes
+        self.ttl = ttl
+        self._results: Dict[str, Dict[str, Any]] = {}
+        self._running: Dict[str, Any] = {}
+        self._lock = threading.Lock()
+        self._executor = ThreadPoolExecutor(max_workers=len(probes), thread_name_prefix="readiness-probe")
+
+    def _probe(self, name: str):
+        result = _timed(self.probes[name])
+        result["checked_at"] = time.time()
+        self._results[name] = result
+        return result
+
+    def check(self) -> Dict[str, Dict[str, Any]]:
+        """오래된 점검만 동시에 다시 실행. PROBE_TIMEOUT 안에 안 끝나면 끝난 결과만 (늦은 점검은 다음 호출 때 반영)"""
+        now = time.time()
+        with self._lock:
+            for name in self.probes:
+                last = self._results.get(name)
+                running = self._running.get(name)
+                if (last is None or now - last["checked_at"] >= self.ttl.get(name, 10)) and \
+                        (running is None or running.done()):
+                    self._running[name] = self._executor.submit(self._probe, name)
+            futures = [f for f in self._running.values() if not f.done()]
+        if futures:
+            wait(futures, timeout=PROBE_TIMEOUT + 0.5)
+        return {name: self._results.get(name) or {"ok": False, "error": "점검 중", "ms": None}
+                for name in self.probes}
+
+
+dependency_checker = DependencyChecker()
+
+
+def readiness() -> Dict[str, Any]:
+    """ready = 워밍업 완료 + DB 응답. 외부 API 실패는 degraded 로만 표시"""
+    checks = dependency_checker.check()
+    ready = warmup.ready and bool(checks["db"]["ok"])
+    degraded = [name for name, result in checks.items() if name != "db" and not result["ok"]]
+    return {"ready": ready, "degraded": degraded, "warmup": warmup.stats(), "checks": checks}
@@ -0,0 +1,120 @@
+# /recommend_parks 결과 캐시
+# 결과는 (위치, 감정, top_n)에만 의존 → 위치를 격자(cell)로 맞추고 감정 정수 벡터와 묶어서 키로 사용
+# 점수 재적재는 park_scores_version 으로 모든 워커에 전달 (CACHE_BACKEND 가 공유 저장소일 때.
+# memory 이면 요청을 받은 워커만 바로 비우고 다른 워커는 CACHE_TTL 이 상한)
+from collections import OrderedDict
+from concurrent.futures import Future
+from typing import Dict, Any, Callable, Tuple
+import math, threading, time
+
+from algorithm.parks_algorithm import recommend_from_scored_parks, on_scores_reloaded, notify_scores_reloaded
+from algorithm.model_registry import model_version
+from . import metrics
+from .cache import SharedVersion
+
+CELL_SIZE_DEG = 0.005   # 약 500m 격자
+CACHE_TTL = 300         # 캐시 유효 시간(초) 5분
+CACHE_MAX_ENTRIES = 2048
+EMOTION_KEYS = ("우울", "불안", "스트레스", "행복", "에너지", "성취감")
+
+
+class RecommendCache:
+    """
+    TTL + LRU 캐시.
+    같은 키로 동시에 miss가 나면 첫 요청만 계산하고 나머지는 그 결과를 기다림 (request coalescing)
+    """
+    def __init__(self, maxsize: int = CACHE_MAX_ENTRIES, ttl: float = CACHE_TTL):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._data: "OrderedDict[Tuple, Tuple[float, Any]]" = OrderedDict()
+        self._inflight: Dict[Tuple, Future] = {}
+        self._lock = threading.Lock()
+        self._generation = 0
+        self.hits = self.misses = self.coalesced = self.evictions = self.invalidations = 0
+
+    def get_or_compute(self, key: Tuple, compute: Callable[[], Any]) -> Any:
+        with self._lock:
+            entry = self._data.get(key)
+            if entry and entry[0] > time.time():
+                self._data.move_to_end(key)
+                self.hits += 1
+                return entry[1]
+            fut = self._inflight.get(key)
+            if fut is not None:
+                self.coalesced += 1
+                owner = False
+            else:
+                self.misses += 1
+                fut = Future()
+                self._inflight[key] = fut
+                owner = True
+            generation = self._generation
+
+        if not owner:
+            return fut.result()
+
+        try:
+            value = compute()
+        except Exception as e:
+            with self._lock:
+                self._inflight.pop(key, None)
+            fut.set_exception(e)
+            raise
+
+        with self._lock:
+            self._inflight.pop(key, None)
+            # 계산 중에 점수가 다시 로드됐으면 저장하지 않음
+            if generation == self._generation:
+                self._data[key] = (time.time() + self.ttl, value)
+                self._data.move_to_end(key)
+                while len(self._data) > self.maxsize:
+                    self._data.popitem(last=False)
+                    self.evictions += 1
+        fut.set_result(value)
+        return value
+
+    def invalidate(self):
+        with self._lock:
+            self._data.clear()
+            self._generation += 1
+            self.invalidations += 1
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            lookups = self.hits + self.misses + self.coalesced
+            return {
+                "entries": len(self._data),
+                "hits": self.hits,
+                "misses": self.misses,
+                "coalesced": self.coalesced,
+                "evictions": self.evictions,
+                "invalidations": self.invalidations,
+                "hit_ratio": round((self.hits + self.coalesced) / lookups, 4) if lookups else 0.0,
+            }
+
+
+recommend_cache = RecommendCache()
+on_scores_reloaded(recommend_cache.invalidate)
+metrics.register_provider("recommend_cache", recommend_cache.stats)
+
+# tb_parks_score 갱신 신호 - bump() 하면 모든 워커에서 notify_scores_reloaded (추천 캐시, 정렬 결과, 유사 공원 인덱스)
+park_scores_version = SharedVersion("park_scores")
+park_scores_version.on_change(notify_scores_reloaded)
+
+
+def snap_to_cell(lat: float, lon: float) -> Tuple[int, int]:
+    return math.floor(lat / CELL_SIZE_DEG), math.floor(lon / CELL_SIZE_DEG)
+
+
+def cached_recommend_parks(lat: float, lon: float, emotions: Dict[str, int], top_n: int = 6):
+    """격자 중심 좌표로 계산 → 같은 격자/감정이면 항상 같은 결과"""
+    cell = snap_to_cell(lat, lon)
+    levels = tuple(int(emotions.get(k, 0)) for k in EMOTION_KEYS)
+    key = (cell, levels, top_n, model_version(), park_scores_version.value)  # 모델/점수가 바뀌면 자연스럽게 다른 키
+
+    center_lat = (cell[0] + 0.5) * CELL_SIZE_DEG
+    center_lon = (cell[1] + 0.5) * CELL_SIZE_DEG
+    return recommend_cache.get_or_compute(
+        key,
+        lambda: recommend_from_scored_parks(center_lat, center_lon, dict(zip(EMOTION_KEYS, levels)), top_n=top_n)
+    )
@@ -0,0 +1,203 @@
+# 감정 제출 시 추천 미리 계산 (이벤트 기반)
+# - POST /emotions, PUT /emotions/{nickname}/location 에서 위치가 있는 체크인이면 백그라운드 작업 등록
+#   (화면 흐름: 감정 제출 → 위치 갱신 → 대기 화면에서 /recommend_for_user)
+# - 작업 = 녹지 유형 추천 + Content 조회 + 5km 공원 검색/점수 계산. 결과는 공용 캐시(CACHE_BACKEND)에도 저장 → 다른 워커도 사용
+# - 작업 = (체크인 create_date, 위치) → 위치가 바뀌면 새 작업, /recommend_for_user 는 시각이 같고 위치가 COORD_TOLERANCE
+#   안인 결과만 사용 (좌표는 DB 를 거치며 자릿수가 바뀔 수 있어 반올림 문자열 대신 허용 오차로 비교)
+# - /recommend_for_user 는 결과가 있으면 바로, 계산 중이면 RECOMMEND_WAIT_SECONDS 까지 기다리고, 없거나 늦으면 직접 계산
+#   (추천 기록 INSERT 는 기존처럼 /recommend_for_user 에서 한 번만 → 위치가 바뀌어 버려진 작업이 기록을 남기지 않음)
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeout
+from typing import Any, Dict, Optional, Tuple
+from sqlalchemy import text
+from dotenv import load_dotenv
+import os, threading, time
+
+from .db import get_read_engine
+from .cache import get_cache
+from . import metrics
+from algorithm.parks_algorithm import recommend_from_scored_parks
+from algorithm.category_algorithm import recommend_category_by_mind
+from algorithm.model_registry import model_version
+
+load_dotenv()
+
+RECOMMEND_JOB_WORKERS = int(os.getenv("RECOMMEND_JOB_WORKERS", "4"))
+RECOMMEND_WAIT_SECONDS = float(os.getenv("RECOMMEND_WAIT_SECONDS", "3"))
+RESULT_TTL = 600            # 미리 계산한 결과 보관 시간(초)
+PENDING_TTL = 30            # "계산 중" 표시 보관 시간(초) - 작업하던 워커가 죽어도 다른 워커가 계속 기다리지 않도록
+POLL_INTERVAL = 0.05        # 다른 워커의 결과를 기다릴 때 캐시 확인 간격(초)
+TOP_N_PARKS, TOP_N_CATEGORIES = 6, 3  # 미리 계산하는 개수 (화면 기본값)
+COORD_TOLERANCE = 1e-6      # 같은 위치로 보는 좌표 차이(도, 약 0.1m)
+
+CONTENT_SQL = text("""
+    SELECT Category, Content
+    FROM tb_parks_categorys
+    WHERE Category IN :categories
+""")
+
+
+def emotion_levels(latest: Dict[str, Any]) -> Dict[str, int]:
+    return {
+        "우울": latest["depression"],
+        "불안": latest["anxiety"],
+        "스트레스": latest["stress"],
+        "행복": latest["happiness"],
+        "에너지": latest["energy"],
+        "성취감": latest["achievement"]
+    }
+
+
+def job_key(latest: Dict[str, Any]) -> str:
+    """체크인 시각 (DB 행의 datetime / write-behind 로그의 문자열 모두 같은 형식으로)"""
+    return str(latest["create_date"])[:19]
+
+
+def job_location(latest: Dict[str, Any]) -> Tuple[float, float]:
+    return float(latest["latitude"]), float(latest["longitude"])
+
+
+def same_job(key: str, location, other_key: Optional[str], other_location) -> bool:
+    """체크인 시각이 같고 위치가 COORD_TOLERANCE 안이면 같은 작업"""
+    if key != other_key or not location or not other_location:
+        return False
+    return all(abs(float(a) - float(b)) <= COORD_TOLERANCE for a, b in zip(location, other_location))
+
+
+def compute_recommendation(latest: Dict[str, Any], top_n_parks: int = TOP_N_PARKS,
+                           top_n_categories: int = TOP_N_CATEGORIES) -> Dict[str, Any]:
+    """최신 체크인(감정 + 위치) → 녹지 유형(Content 포함) + 공원 추천. DB 쓰기 없음"""
+    nickname = latest["nickname"]
+    emotions = emotion_levels(latest)
+    lat, lon = latest["latitude"], latest["longitude"]
+    print(f"[{nickname}] 최신 감정:", emotions, "위치:", (lat, lon))
+
+    # 녹지 유형 추천
+    recommended_categories = recommend_category_by_mind(emotions, top_n=top_n_categories)
+    print(f"[{nickname}] 추천 녹지 유형 (이름만):", recommended_categories)
+
+    # Content 포함해서 DB와 반환용으로 한 번에 가져오기
+    categories = [rc["category"] for rc in recommended_categories]
+    with get_read_engine().connect() as conn:
+        content_rows = conn.execute(CONTENT_SQL, {"categories": tuple(categories)}).fetchall()
+    content_map = {r._mapping["Category"]: r._mapping["Content"] for r in content_rows}
+
+    cat_with_content = []
+    for rc in recommended_categories:
+        cat_name = rc["category"]
+        sentences = [s.strip() for s in content_map.get(cat_name, "").split("/") if s.strip()]
+        cat_with_content.append({"category": cat_name, "content": sentences})
+    print(f"[{nickname}] 추천 녹지 유형 + Content:", cat_with_content)
+
+    # 공원 추천
+    recommended_parks = recommend_from_scored_parks(lat, lon, emotions, top_n=top_n_parks)
+    print(f"[{nickname}] 추천 공원:", [park.get("Park", "") for park in recommended_parks])
+
+    return {
+        "recommended_categories": cat_with_content,
+        "recommended_parks": recommended_parks,
+        "model_version": model_version()
+    }
+
+
+class RecommendJobs:
+    def __init__(self, workers: int = RECOMMEND_JOB_WORKERS):
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="recommend-job")
+        self._jobs: Dict[str, tuple] = {}  # nickname -> (작업 키, 위치, Future)
+        self._lock = threading.Lock()
+        self.cache = get_cache("recommend_jobs", ttl=RESULT_TTL)
+        self.submitted = self.failed = 0
+        self.ready_hits = self.waited_hits = self.misses = self.timeouts = 0
+
+    def submit(self, latest: Dict[str, Any]):
+        """위치가 있는 최신 체크인 → 추천 계산 작업 등록 (같은 키 작업이 이미 있으면 무시)"""
+        if latest.get("latitude") is None or latest.get("longitude") is None:
+            return
+        nickname, key, location = latest["nickname"], job_key(latest), job_location(latest)
+        with self._lock:
+            current = self._jobs.get(nickname)
+            if current and same_job(key, location, current[0], current[1]):
+                return
+            if len(self._jobs) > 10000:  # 끝난 작업 정리
+                self._jobs = {n: job for n, job in self._jobs.items() if not job[2].done()}
+            self.cache.set(nickname, {"key": key, "location": location, "pending": True}, ttl=PENDING_TTL)
+            future = self._executor.submit(self._run, nickname, key, location, dict(latest))
+            self._jobs[nickname] = (key, location, future)
+            self.submitted += 1
+
+    def _is_current(self, nickname: str, key: str, location) -> bool:
+        """그 사이 위치가 바뀌어 새 작업이 등록되지 않았는지 (이 워커 기준)"""
+        current = self._jobs.get(nickname)
+        return current is None or same_job(key, location, current[0], current[1])
+
+    def _run(self, nickname: str, key: str, location, latest: Dict[str, Any]) -> Dict[str, Any]:
+        try:
+            result = compute_recommendation(latest)
+        except Exception as e:
+            self.failed += 1
+            print(f"[WARN] 추천 미리 계산 실패 ({nickname}) : {e}")
+            # 공용 캐시가 이 작업의 "계산 중" 표시일 때만 지움 (새 작업/다른 워커 작업의 항목은 그대로)
+            value = self.cache.get(nickname)
+            if value and same_job(key, location, value.get("key"), value.get("location")) \
+                    and self._is_current(nickname, key, location):
+                self.cache.delete(nickname)
+            raise
+        # 그 사이 위치가 바뀌어 새 작업이 등록됐으면 공용 캐시는 새 작업 것으로 둠
+        if self._is_current(nickname, key, location):
+            self.cache.set(nickname, {"key": key, "location": location, "result": result})
+        return result
+
+    def wait_for(self, latest: Dict[str, Any], timeout: float = RECOMMEND_WAIT_SECONDS) -> Optional[Dict[str, Any]]:
+        """최신 체크인에 대해 미리 계산한 결과. 없거나 timeout 안에 안 끝나면 None (호출한 쪽이 직접 계산)"""
+        if latest.get("latitude") is None or latest.get("longitude") is None:
+            self.misses += 1
+            return None
+        nickname, key, location = latest["nickname"], job_key(latest), job_location(latest)
+        deadline = time.monotonic() + timeout
+
+        # 1) 이 워커에서 돌린 작업
+        with self._lock:
+            job = self._jobs.get(nickname)
+        if job and same_job(key, location, job[0], job[1]):
+            done = job[2].done()
+            try:
+                result = job[2].result(timeout=timeout)
+            except FutureTimeout:
+                self.timeouts += 1
+                return None
+            except Exception:
+                return None  # 실패는 _run 에서 기록
+            if done:
+                self.ready_hits += 1
+            else:
+                self.waited_hits += 1
+            return result
+
+        # 2) 다른 워커가 돌린 작업 (공용 캐시)
+        waited = False
+        while True:
+            value = self.cache.get(nickname)
+            if not value or not same_job(key, location, value.get("key"), value.get("location")):
+                self.misses += 1
+                return None
+            if "result" in value:
+                if waited:
+                    self.waited_hits += 1
+                else:
+                    self.ready_hits += 1
+                return value["result"]
+            if time.monotonic() >= deadline:
+                self.timeouts += 1
+                return None
+            waited = True
+            time.sleep(POLL_INTERVAL)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            running = sum(1 for _, _, f in self._jobs.values() if not f.done())
+        return {"submitted": self.submitted, "running": running, "failed": self.failed,
+                "ready_hits": self.ready_hits, "waited_hits": self.waited_hits,
+                "misses": self.misses, "timeouts": self.timeouts}
+
+
+recommend_jobs = RecommendJobs()
+metrics.register_provider("recommend_jobs", recommend_jobs.stats)
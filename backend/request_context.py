@@ -0,0 +1,70 @@
+# 요청 단위 컨텍스트 (요청 ID, 라우트) - 로그/프로파일/SQL 계측에서 공통 사용
+# 순수 ASGI 미들웨어라 응답 본문을 감싸지 않음 (스트리밍/압축 응답에 영향 없음)
+from contextvars import ContextVar
+from typing import Optional
+import re, uuid
+
+REQUEST_ID_PATTERN = re.compile(r"[A-Za-z0-9-]{1,64}")  # 클라이언트가 보낸 X-Request-ID 허용 형식 (파일 이름 등에 사용)
+
+request_id_var: ContextVar[Optional[str]] = ContextVar("request_id", default=None)
+scope_var: ContextVar[Optional[dict]] = ContextVar("request_scope", default=None)
+state_var: ContextVar[Optional[dict]] = ContextVar("request_state", default=None)
+
+
+def current_request_id() -> Optional[str]:
+    return request_id_var.get()
+
+
+def current_route() -> Optional[str]:
+    """라우트 템플릿 (예: /parks/{park_id}). 라우팅 전이거나 요청 밖이면 None"""
+    scope = scope_var.get()
+    if scope is None:
+        return None
+    route = scope.get("route")
+    return getattr(route, "path", None) or scope.get("path")
+
+
+def request_state() -> Optional[dict]:
+    """요청마다 새로 만드는 dict (스레드풀에서도 같은 객체) - 요청 밖이면 None"""
+    return state_var.get()
+
+
+def valid_request_id(value: Optional[str]) -> bool:
+    return value is not None and REQUEST_ID_PATTERN.fullmatch(value) is not None
+
+
+def header(scope, name: bytes) -> Optional[str]:
+    for key, value in scope.get("headers", ()):
+        if key == name:
+            return value.decode("latin-1")
+    return None
+
+
+class RequestContextMiddleware:
+    """X-Request-ID 를 받거나 (형식이 맞지 않으면) 새로 만들어서 컨텍스트에 저장하고 응답 헤더로 돌려줌"""
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+
+        request_id = header(scope, b"x-request-id")
+        if not valid_request_id(request_id):
+            request_id = uuid.uuid4().hex
+        id_token = request_id_var.set(request_id)
+        scope_token = scope_var.set(scope)
+        state_token = state_var.set({})
+
+        async def send_with_id(message):
+            if message["type"] == "http.response.start":
+                message.setdefault("headers", [])
+                message["headers"] = list(message["headers"]) + [(b"x-request-id", request_id.encode("latin-1"))]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_id)
+        finally:
+            request_id_var.reset(id_token)
+            scope_var.reset(scope_token)
+            state_var.reset(state_token)
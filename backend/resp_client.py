@@ -0,0 +1,92 @@
+# 최소한의 Redis 프로토콜(RESP2) 클라이언트
+# redis 패키지 없이 Redis / 호환 서버(로컬 대체 서버 포함)에 명령 전송
+from urllib.parse import urlparse
+import socket, threading
+
+
+class RespError(Exception):
+    """서버가 -ERR 로 응답한 경우"""
+
+
+class RespClient:
+    def __init__(self, url: str, timeout: float = 1.0):
+        parsed = urlparse(url)  # redis://[:password@]host:port/db
+        self.host = parsed.hostname or "127.0.0.1"
+        self.port = parsed.port or 6379
+        self.password = parsed.password
+        self.db = int(parsed.path.lstrip("/") or 0)
+        self.timeout = timeout
+        self._sock = None
+        self._file = None
+        self._lock = threading.Lock()
+
+    def _connect(self):
+        self._sock = socket.create_connection((self.host, self.port), timeout=self.timeout)
+        self._sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        self._file = self._sock.makefile("rb")
+        if self.password:
+            self._call("AUTH", self.password)
+        if self.db:
+            self._call("SELECT", self.db)
+
+    def close(self):
+        if self._sock:
+            try:
+                self._sock.close()
+            finally:
+                self._sock = self._file = None
+
+    @staticmethod
+    def _encode(args) -> bytes:
+        out = [b"*%d\r\n" % len(args)]
+        for arg in args:
+            if isinstance(arg, bytes):
+                data = arg
+            else:
+                data = str(arg).encode("utf-8")
+            out.append(b"$%d\r\n%s\r\n" % (len(data), data))
+        return b"".join(out)
+
+    def _read(self):
+        line = self._file.readline()
+        if not line:
+            raise ConnectionError("Redis 연결이 끊어졌습니다.")
+        kind, body = line[:1], line[1:-2]
+        if kind == b"+":
+            return body.decode()
+        if kind == b"-":
+            raise RespError(body.decode())
+        if kind == b":":
+            return int(body)
+        if kind == b"$":
+            size = int(body)
+            if size < 0:
+                return None
+            data = self._file.read(size + 2)
+            return data[:-2]
+        if kind == b"*":
+            size = int(body)
+            return None if size < 0 else [self._read() for _ in range(size)]
+        raise ConnectionError(f"알 수 없는 응답: {line!r}")
+
+    def _call(self, *args):
+        self._sock.sendall(self._encode(args))
+        return self._read()
+
+    def execute(self, *args):
+        """명령 실행. 명령을 보내기 전(연결/전송)에 실패했으면 한 번 재연결 후 재시도
+        - 보낸 뒤 응답을 읽다 실패(타임아웃 등)하면 서버가 이미 실행했을 수 있으므로 재시도하지 않음
+          (레이트 리밋 EVAL 이 두 번 실행되어 토큰을 두 개 쓰는 일 방지)"""
+        with self._lock:
+            for attempt in (0, 1):
+                sent = False
+                try:
+                    if self._sock is None:
+                        self._connect()
+                    self._sock.sendall(self._encode(args))
+                    sent = True
+                    return self._read()
+                except (OSError, ConnectionError):
+                    self.close()
+                    if sent or attempt:
+                        raise
@@ -0,0 +1,106 @@
+# 큰 목록 응답용 JSON 직렬화 + 압축
+# - orjson 이 있으면 바로 bytes 생성 (없으면 표준 json)
+# - Accept-Encoding 에 따라 brotli / gzip 압축 (COMPRESS_MIN_SIZE 이상일 때만)
+from datetime import date, datetime, time as dtime
+from decimal import Decimal
+from typing import Any
+from fastapi import Request
+from fastapi.responses import Response
+import gzip, json
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+COMPRESS_MIN_SIZE = 1024  # 1KB 미만은 압축 안 함
+GZIP_LEVEL = 6
+BROTLI_QUALITY = 5        # 응답마다 압축하므로 속도 우선
+
+
+def _default(o: Any):
+    if isinstance(o, Decimal):
+        return int(o) if o.as_tuple().exponent >= 0 else float(o)  # jsonable_encoder 와 동일
+    if isinstance(o, (datetime, date, dtime)):
+        return o.isoformat()
+    if hasattr(o, "keys"):  # SQLAlchemy RowMapping
+        return dict(o)
+    raise TypeError(f"JSON 변환 불가 타입: {type(o)}")
+
+
+def dumps(data: Any) -> bytes:
+    if orjson is not None:
+        return orjson.dumps(data, default=_default)
+    return json.dumps(data, default=_default, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+
+def _choose_encoding(accept_encoding: str) -> str | None:
+    accepted = {part.split(";")[0].strip().lower() for part in accept_encoding.split(",")}
+    if brotli is not None and "br" in accepted:
+        return "br"
+    if "gzip" in accepted:
+        return "gzip"
+    return None
+
+
+def compress(body: bytes, encoding: str | None) -> bytes:
+    if encoding == "br":
+        return brotli.compress(body, quality=BROTLI_QUALITY)
+    if encoding == "gzip":
+        return gzip.compress(body, compresslevel=GZIP_LEVEL)
+    return body
+
+
+def json_response(request: Request, data: Any, status_code: int = 200) -> Response:
+    """data → JSON bytes → (필요하면) 압축한 Response"""
+    body = dumps(data)
+    headers = {"Vary": "Accept-Encoding"}
+    encoding = None
+    if len(body) >= COMPRESS_MIN_SIZE:
+        encoding = _choose_encoding(request.headers.get("accept-encoding", ""))
+    if encoding:
+        body = compress(body, encoding)
+        headers["Content-Encoding"] = encoding
+    return Response(content=body, status_code=status_code, media_type="application/json", headers=headers)
+
+
+# ========================= 벤치마크 =========================
+# python -m backend.responses
+if __name__ == "__main__":
+    import random, timeit
+    from fastapi.encoders import jsonable_encoder
+
+    # 서울시 공원 목록과 비슷한 크기의 더미 데이터
+    rows = [
+        {
+            "id": i,
+            "name": f"서울숲{i}근린공원",
+            "address": f"서울특별시 성동구 뚝섬로 {i}",
+            "type": random.choice(["근린공원", "어린이공원", "소공원", "문화공원"]),
+            "des": "도심 속 녹지 공간으로 산책로와 운동시설이 있는 공원입니다. " * 3,
+            "lat": Decimal(f"{37.4 + random.random() * 0.3:.7f}"),
+            "lon": Decimal(f"{126.8 + random.random() * 0.4:.7f}"),
+            "tel": "02-123-4567",
+        }
+        for i in range(2500)
+    ]
+
+    n = 20
+    t_std = timeit.timeit(lambda: json.dumps(jsonable_encoder(rows), ensure_ascii=False).encode(), number=n) / n
+    t_fast = timeit.timeit(lambda: dumps(rows), number=n) / n
+    body = dumps(rows)
+    print(f"rows={len(rows)}  encoder={'orjson' if orjson else 'json'}")
+    print(f"jsonable_encoder + json : {t_std * 1000:8.2f} ms")
+    print(f"backend.responses.dumps : {t_fast * 1000:8.2f} ms")
+    print(f"identity : {len(body):>9,} bytes")
+    for enc in ("gzip", "br"):
+        if enc == "br" and brotli is None:
+            print("br       : (brotli 미설치)")
+            continue
+        t = timeit.timeit(lambda: compress(body, enc), number=n) / n
+        print(f"{enc:<8} : {len(compress(body, enc)):>9,} bytes  ({t * 1000:.2f} ms)")
@@ -0,0 +1,103 @@
+# 운영용 API (메트릭 조회, 캐시 무효화)
+from fastapi import APIRouter, Depends, Header, HTTPException
+from fastapi.responses import PlainTextResponse
+from algorithm.model_registry import reload_model, model_version
+from .. import metrics
+from ..park_documents import park_documents, park_documents_version
+from ..recommend_cache import park_scores_version
+from .. import park_snapshot
+from ..profiling import profile_store
+from ..sql_trace import sql_stats
+from dotenv import load_dotenv
+import hmac, os
+
+load_dotenv()
+ADMIN_API_KEY = os.getenv("ADMIN_API_KEY")
+
+
+def require_admin(x_admin_token: str | None = Header(default=None)):
+    """X-Admin-Token 헤더 검증 (ADMIN_API_KEY 미설정 시 관리자 API 비활성화)"""
+    if not ADMIN_API_KEY or not x_admin_token or not hmac.compare_digest(x_admin_token, ADMIN_API_KEY):
+        raise HTTPException(status_code=403, detail="관리자 권한이 필요합니다.")
+
+
+router = APIRouter(prefix="/admin", dependencies=[Depends(require_admin)])
+
+metrics.register_provider("scoring_model", lambda: {"version": model_version()})
+metrics.register_provider("park_snapshot", park_snapshot.stats)
+
+
+@router.get("/metrics")
+def get_metrics():
+    return metrics.snapshot()
+
+
+@router.post("/reload_park_scores")
+def reload_park_scores():
+    """tb_parks_score 갱신 후 호출 → 추천 캐시 등 무효화 (다른 워커는 CACHE_VERSION_CHECK_INTERVAL 안에 반영)
+    공원 스냅샷을 쓰는 중이면 후보 검색/유사 공원 인덱스가 스냅샷의 점수를 읽으므로 스냅샷을 다시 내보냄"""
+    if park_snapshot.current_snapshot() is not None:
+        path, snapshot = _export_snapshot()  # 점수 캐시 버전도 함께 올림
+        return {"message": "공원 스냅샷 다시 생성 완료 (점수는 스냅샷에서 읽음)", "source": "snapshot",
+                "file": path.name, "version": park_scores_version.value,
+                "snapshot_version": snapshot.version if snapshot else None}
+    return {"message": "공원 점수 캐시 무효화 완료", "source": "db", "version": park_scores_version.bump()}
+
+
+@router.post("/reload_scoring_model")
+def reload_scoring_model():
+    """scoring_model.json 즉시 다시 로드 (다른 워커는 파일 변경 확인 주기 내에 반영)"""
+    return {"message": "점수 모델 로드 완료", "model_version": reload_model(force=True)}
+
+
+def _export_snapshot():
+    """DB → 새 공원 스냅샷. 이 워커는 바로 전환하고, 다른 워커는 갱신 신호를 받아 링크를 다시 확인"""
+    path = park_snapshot.export_snapshot()
+    snapshot = park_snapshot.refresh()
+    park_documents_version.bump()  # 상세 문서/지도 클러스터
+    park_scores_version.bump()     # 점수가 바뀌었을 수 있으므로 점수 캐시/인덱스도
+    return path, snapshot
+
+
+@router.post("/reload_park_documents")
+def reload_park_documents():
+    """공원/시설물/키워드 데이터 갱신 후 호출 → 상세 문서 / 지도 클러스터 다시 생성
+    공원 스냅샷을 쓰는 중이면 문서도 스냅샷에서 읽으므로 스냅샷을 다시 내보냄
+    (다른 워커는 CACHE_VERSION_CHECK_INTERVAL 안에 반영)"""
+    if park_snapshot.current_snapshot() is not None:
+        path, snapshot = _export_snapshot()
+        return {"message": "공원 스냅샷 다시 생성 완료 (상세 문서는 스냅샷에서 읽음)", "source": "snapshot",
+                "file": path.name, "parks": len(snapshot) if snapshot else None,
+                "snapshot_version": snapshot.version if snapshot else None}
+    version = park_documents_version.bump()  # 이 워커는 바로 다시 생성
+    return {"message": "공원 상세 문서 생성 완료", "source": "db", "parks": park_documents.stats()["parks"],
+            "version": version}
+
+
+@router.post("/export_park_snapshot")
+def export_park_snapshot():
+    """DB → 새 공원 스냅샷 생성 후 전환"""
+    path, snapshot = _export_snapshot()
+    return {"message": "공원 스냅샷 생성 완료", "file": path.name,
+            "version": snapshot.version if snapshot else None}
+
+
+@router.get("/profiles")
+def list_profiles():
+    """저장된 요청 프로파일 목록 (최근 100개)"""
+    return {"profiles": profile_store.list()}
+
+
+@router.get("/profiles/{request_id}", response_class=PlainTextResponse)
+def get_profile(request_id: str):
+    """folded stack 형식 (flamegraph.pl / speedscope 에 바로 사용)"""
+    profile = profile_store.get(request_id)
+    if not profile:
+        raise HTTPException(status_code=404, detail="프로파일이 없습니다.")
+    return profile["folded"]
+
+
+@router.get("/slow_queries")
+def get_slow_queries(top: int = 20):
+    """느린 쿼리 / N+1 의심 쿼리 / 누적 시간 상위 fingerprint"""
+    return sql_stats.report(top=top)
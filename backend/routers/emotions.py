@@ -1,6 +1,10 @@
-from fastapi import APIRouter, HTTPException
+from fastapi import APIRouter, HTTPException, Query, Request
 from sqlalchemy import text
-from ..db import engine
+from ..db import engine, mark_write, get_read_engine
+from ..emotion_writer import emotion_writer, KST
+from ..emotion_rollups import record_checkins, emotion_trends, daily_rows
+from ..responses import json_response
+from ..recommend_jobs import recommend_jobs
 from datetime import datetime, timedelta, timezone
 import traceback
 
@@ -11,24 +15,37 @@ def save_emotions(data: dict):
     try:
         print("받은 데이터:", data)
 
+        # write-behind 모드: 로컬 로그에 기록 후 바로 응답 (DB 반영은 백그라운드)
+        if emotion_writer:
+            record = emotion_writer.enqueue(data["nickname"], data["emotions"], data.get("latitude"), data.get("longitude"))
+            mark_write(data["nickname"])
+            recommend_jobs.submit(record)  # 위치가 있으면 추천 미리 계산
+            return {"message": "User emotions saved"}
+
+        # 롤업과 같은 주/날짜로 묶이도록 작성 시각을 직접 지정 (write-behind 와 같은 KST 기준)
+        row = {
+            "nickname": data["nickname"],
+            "create_date": datetime.now(KST).replace(tzinfo=None, microsecond=0),
+            "depression": data["emotions"]["depression"],
+            "anxiety": data["emotions"]["anxiety"],
+            "stress": data["emotions"]["stress"],
+            "happiness": data["emotions"]["happiness"],
+            "achievement": data["emotions"]["achievement"],
+            "energy": data["emotions"]["energy"],
+            "latitude": data.get("latitude"),
+            "longitude": data.get("longitude")
+        }
         with engine.begin() as conn:
             conn.execute(text("""
                 INSERT INTO tb_users_emotions (
-                    nickname, depression, anxiety, stress, happiness, achievement, energy, latitude, longitude
+                    nickname, create_date, depression, anxiety, stress, happiness, achievement, energy, latitude, longitude
                 ) VALUES (
-                    :nickname, :depression, :anxiety, :stress, :happiness, :achievement, :energy, :latitude, :longitude
+                    :nickname, :create_date, :depression, :anxiety, :stress, :happiness, :achievement, :energy, :latitude, :longitude
                 )
-            """), {
-                "nickname": data["nickname"],
-                "depression": data["emotions"]["depression"],
-                "anxiety": data["emotions"]["anxiety"],
-                "stress": data["emotions"]["stress"],
-                "happiness": data["emotions"]["happiness"],
-                "achievement": data["emotions"]["achievement"],
-                "energy": data["emotions"]["energy"],
-                "latitude": data.get("latitude"),
-                "longitude": data.get("longitude")
-            })
+            """), row)
+            record_checkins(conn, [row])
+        mark_write(data["nickname"])
+        recommend_jobs.submit(row)  # 위치가 있으면 추천 미리 계산
 
         return {"message": "User emotions saved"}
 
@@ -39,6 +56,13 @@ def save_emotions(data: dict):
 
 @router.put("/emotions/{nickname}/location")
 def update_location(nickname: str, data: dict):
+    # 아직 DB에 반영 안 된 체크인이면 로그 쪽 위치만 갱신
+    # 위치가 정해지면 추천 미리 계산 (/recommend_for_user 보다 먼저 호출됨)
+    if emotion_writer and emotion_writer.update_pending_location(nickname, data["latitude"], data["longitude"]):
+        mark_write(nickname)
+        recommend_jobs.submit(emotion_writer.latest_pending(nickname))
+        return {"message": "Location updated"}
+
     with engine.begin() as conn:
         conn.execute(text("""
             UPDATE tb_users_emotions
@@ -57,5 +81,37 @@ def update_location(nickname: str, data: dict):
             "longitude": data["longitude"],
             "nickname": nickname
         })
+        latest = conn.execute(text("""
+            SELECT nickname, create_date, depression, anxiety, stress, happiness, achievement, energy, latitude, longitude
+            FROM tb_users_emotions
+            WHERE nickname = :nickname
+            ORDER BY id DESC
+            LIMIT 1
+        """), {"nickname": nickname}).mappings().first()
+    mark_write(nickname)
+    if latest:
+        recommend_jobs.submit(dict(latest))
     return {"message": "Location updated"}
 
+
+# 감정 추세 (일/주/월 평균 + 이동평균) — 일간 롤업 테이블만 읽음 (1년 = 최대 366+29행)
+@router.get("/emotions/{nickname}/trends")
+def get_emotion_trends(nickname: str, request: Request,
+                       days: int = Query(90, ge=1, le=366),
+                       rolling: str = Query("7,30", description="이동평균 창 크기(일), 쉼표 구분")):
+    try:
+        windows = tuple(sorted({int(w) for w in rolling.split(",") if w.strip()}))
+    except ValueError:
+        raise HTTPException(status_code=400, detail="rolling 은 쉼표로 구분한 숫자여야 합니다.")
+    if any(w < 2 or w > 90 for w in windows):
+        raise HTTPException(status_code=400, detail="이동평균 창은 2~90일 사이여야 합니다.")
+
+    end = datetime.now(KST).date()
+    start = end - timedelta(days=days - 1)
+    lead = max(windows) - 1 if windows else 0
+    with get_read_engine(nickname).connect() as conn:
+        rows = daily_rows(conn, nickname, start - timedelta(days=lead), end)
+    if rows is None:
+        raise HTTPException(status_code=503, detail="감정 추세를 사용할 수 없습니다. (롤업 테이블 없음 - 마이그레이션 필요)")
+
+    return json_response(request, {"nickname": nickname, **emotion_trends(rows, start, end, windows)})
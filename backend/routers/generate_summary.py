@@ -1,6 +1,7 @@
-from fastapi import APIRouter, HTTPException
+from fastapi import APIRouter, Depends, HTTPException
 from pydantic import BaseModel
-from llm.summary_chain import summary
+from ..rate_limit import rate_limited
+from llm.errors import LLMOutputError
 import traceback
 
 router = APIRouter()
@@ -9,7 +10,7 @@ router = APIRouter()
 class SummaryRequest(BaseModel):
     nickname: str
 
-@router.post("/generate_summary")
+@router.post("/generate_summary", dependencies=[Depends(rate_limited("llm"))])
 def generate_summary_api(request: SummaryRequest):
     """
     한 번 사용 요약 생성 API
@@ -17,9 +18,17 @@ def generate_summary_api(request: SummaryRequest):
     - 동작: LLM 실행 → 요약 DB 저장 → 완료 메시지 반환
     """
     try:
+        # langchain 은 무거워서 첫 호출 때 import (서버 시작 시간 단축)
+        from llm.summary_chain import summary
         summary_result = summary(request.nickname)
         return {"message": f"{request.nickname} 님의 요약이 성공적으로 생성되었습니다.",
                 "summary": summary_result}
+    except HTTPException:
+        raise
+    except LLMOutputError as e:
+        # LLM 응답 형식 오류(JSON 파싱 실패)는 502 로 구분
+        print(f"[WARN] {e}")
+        raise HTTPException(status_code=502, detail="요약 생성 중 LLM 응답 형식 오류가 발생했습니다. 다시 시도해주세요.")
     except Exception as e:
         print(traceback.format_exc())
         raise HTTPException(status_code=500, detail=f"요약 생성 중 오류 발생: {str(e)}")
@@ -1,6 +1,7 @@
-from fastapi import APIRouter, HTTPException
+from fastapi import APIRouter, Depends, HTTPException
 from pydantic import BaseModel
-from llm.weekly_chain import weekly_review
+from ..rate_limit import rate_limited
+from llm.errors import LLMOutputError, LLMUnavailableError
 import traceback
 
 router = APIRouter()
@@ -9,7 +10,7 @@ router = APIRouter()
 class WeeklyReviewRequest(BaseModel):
     nickname: str
 
-@router.post("/generate_weekly_review")
+@router.post("/generate_weekly_review", dependencies=[Depends(rate_limited("llm"))])
 def generate_weekly_review_api(request: WeeklyReviewRequest):
     """
     주간 총평 생성 API
@@ -17,6 +18,8 @@ def generate_weekly_review_api(request: WeeklyReviewRequest):
     - 동작: 일주일치 요약 불러오기 → LLM 총평 생성 → DB 저장 → 결과 반환
     """
     try:
+        # langchain 은 무거워서 첫 호출 때 import (서버 시작 시간 단축)
+        from llm.weekly_chain import weekly_review
         review = weekly_review(request.nickname)
 
         if review == "요약할 데이터가 충분하지 않습니다.":
@@ -27,6 +30,17 @@ def generate_weekly_review_api(request: WeeklyReviewRequest):
             "review": review
         }
 
+    except HTTPException:
+        raise
+    except LLMOutputError as e:
+        # LLM 응답 형식 오류(JSON 파싱 실패)는 502 로 구분
+        print(f"[WARN] {e}")
+        raise HTTPException(status_code=502, detail="주간 총평 생성 중 LLM 응답 형식 오류가 발생했습니다. 다시 시도해주세요.")
+    except LLMUnavailableError as e:
+        # OpenAI 장애로 서킷 브레이커가 열려 있음 → 기다리지 않고 바로 503
+        print(f"[WARN] {e}")
+        raise HTTPException(status_code=503, detail="주간 총평 생성이 일시적으로 불가능합니다. 잠시 후 다시 시도해주세요.",
+                            headers={"Retry-After": "60"})
     except Exception as e:
         print(traceback.format_exc())
         raise HTTPException(status_code=500, detail=f"주간 총평 생성 중 오류 발생: {str(e)}")
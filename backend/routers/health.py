@@ -0,0 +1,14 @@
+# 상태 점검 API (로드밸런서 / 배포 스크립트용)
+# - GET /      : 프로세스가 살아 있는지 (liveness)
+# - GET /ready : 워밍업 완료 + 의존성 점검 (readiness). 준비 전에는 503
+from fastapi import APIRouter
+from fastapi.responses import JSONResponse
+from ..readiness import readiness
+
+router = APIRouter()
+
+
+@router.get("/ready")
+def ready():
+    result = readiness()
+    return JSONResponse(result, status_code=200 if result["ready"] else 503)
@@ -1,7 +1,16 @@
-from fastapi import APIRouter, HTTPException
+from fastapi import APIRouter, HTTPException, Query, Request
+from typing import Optional
 from sqlalchemy import text
-from ..db import engine
-import os, requests, time, traceback
+from ..db import get_read_engine
+from ..responses import json_response
+from ..park_documents import park_documents
+from ..park_snapshot import current_snapshot
+from ..park_map import park_map, MIN_LEVEL, MAX_LEVEL
+from ..cache import get_cache
+from ..circuit_breaker import get_breaker, CircuitOpenError
+from .. import metrics
+from algorithm.park_similarity import park_similarity
+import os, traceback
 from dotenv import load_dotenv
 
 load_dotenv()
@@ -12,7 +21,13 @@ BASE_URL = "https://api.openweathermap.org/data/2.5/weather"
 AIR_URL = "http://api.openweathermap.org/data/2.5/air_pollution" # 미세먼지
 
 CACHE_DURATION = 180  # 캐시 유효 시간(초) 3분
-weather_cache = {}   
+STALE_DURATION = 6 * 3600  # OpenWeather 장애 시 대신 보여줄 마지막 조회 결과 보관 시간(초)
+WEATHER_TIMEOUT = (2, 3)   # (연결, 응답) 타임아웃(초) - 느린 OpenWeather 가 워커 스레드를 붙잡지 않도록
+weather_cache = get_cache("weather", ttl=CACHE_DURATION)  # 워커 간 공유 가능 (CACHE_BACKEND)
+weather_stale_cache = get_cache("weather_stale", ttl=STALE_DURATION)
+weather_breaker = get_breaker("openweather", slow_call_seconds=1.5, open_seconds=30)
+metrics.register_provider("park_similarity", park_similarity.stats)
+metrics.register_provider("park_map", park_map.stats)
 
 # 초미세먼지
 def get_pm25_label(pm2_5: float) -> str:
@@ -43,81 +58,99 @@ def get_pm10_label(pm10: float) -> str:
 # 공원 날씨 + 미세먼지 함수
 # -----------------
 def get_park_weather(lat: float, lon: float):
+    """
+    위도, 경도로 해당 위치의 실시간 날씨 + 미세먼지 정보를 가져옴
+    """
+    cache_key = f"{lat},{lon}"
     try:
-        """
-        위도, 경도로 해당 위치의 실시간 날씨 + 미세먼지 정보를 가져옴
-        """
-        cache_key = f"{lat},{lon}"
-        cached = weather_cache.get(cache_key)
-        if cached and time.time() - cached["timestamp"] < CACHE_DURATION:
-            return cached["data"]
-
-        weather_params = {
-            "lat": lat,
-            "lon": lon,
-            "appid": API_KEY,
-            "units": "metric",
-            "lang": "kr"
-        }
-
-        weather_res = requests.get(BASE_URL, params=weather_params)
-        weather_data = weather_res.json()
-
-        air_res = requests.get(AIR_URL, params=weather_params)
-        air_data = air_res.json()
-
-        pm2_5 = air_data["list"][0]["components"]["pm2_5"]
-        pm10 = air_data["list"][0]["components"]["pm10"]
-
-        data = {
-            "lat": lat,
-            "lon": lon,
-            "weather": {
-                "temp": round(weather_data["main"]["temp"], 1),
-                "humidity": weather_data["main"]["humidity"],
-                "icon": weather_data["weather"][0]["icon"]
-            },
-            "air": {
-                "pm2_5": pm2_5,
-                "pm2_5_label": get_pm25_label(pm2_5),
-                "pm10": pm10,
-                "pm10_label": get_pm10_label(pm10)
-            }
-        }
+        return weather_cache.get_or_compute(cache_key, lambda: _fetch_and_keep(cache_key, lat, lon))
 
-        weather_cache[cache_key] = {"timestamp": time.time(), "data": data}
-        return data
-        
+    except CircuitOpenError:
+        pass  # OpenWeather 장애 중 → 호출하지 않고 바로 대체 응답
     except Exception as e:
         print(f"[WARN] 날씨 API 오류 발생 : {e}")
-        # 날씨 정보가 없더라도 API 전체 실패 방지
-        return {"weather": None, "air": None}
+    # 마지막으로 조회했던 날씨가 있으면 그걸, 없으면 빈 값 (날씨 정보가 없더라도 API 전체 실패 방지)
+    return weather_stale_cache.get(cache_key) or {"weather": None, "air": None}
+
+
+def _fetch_and_keep(cache_key: str, lat: float, lon: float):
+    data = weather_breaker.call(fetch_park_weather, lat, lon)
+    weather_stale_cache.set(cache_key, data)
+    return data
+
+
+def fetch_park_weather(lat: float, lon: float):
+    """OpenWeather 날씨 + 미세먼지 조회 (캐시 없이)"""
+    import requests  # 상세 화면에서만 쓰므로 첫 호출 때 import
+
+    weather_params = {
+        "lat": lat,
+        "lon": lon,
+        "appid": API_KEY,
+        "units": "metric",
+        "lang": "kr"
+    }
+
+    weather_res = requests.get(BASE_URL, params=weather_params, timeout=WEATHER_TIMEOUT)
+    weather_res.raise_for_status()
+    weather_data = weather_res.json()
+
+    air_res = requests.get(AIR_URL, params=weather_params, timeout=WEATHER_TIMEOUT)
+    air_res.raise_for_status()
+    air_data = air_res.json()
+
+    pm2_5 = air_data["list"][0]["components"]["pm2_5"]
+    pm10 = air_data["list"][0]["components"]["pm10"]
+
+    data = {
+        "lat": lat,
+        "lon": lon,
+        "weather": {
+            "temp": round(weather_data["main"]["temp"], 1),
+            "humidity": weather_data["main"]["humidity"],
+            "icon": weather_data["weather"][0]["icon"]
+        },
+        "air": {
+            "pm2_5": pm2_5,
+            "pm2_5_label": get_pm25_label(pm2_5),
+            "pm10": pm10,
+            "pm10_label": get_pm10_label(pm10)
+        }
+    }
+
+    return data
 
 # --------------
 # 추천된 공원 리스트
 # --------------
+def _catalog_rows(query: str):
+    """공원 스냅샷(mmap)이 있으면 거기서, 없으면 DB 에서 공원 목록 행"""
+    snapshot = current_snapshot()
+    if snapshot is not None:
+        return list(snapshot.catalog())
+    with get_read_engine().connect() as conn:
+        return [dict(row._mapping) for row in conn.execute(text(query))]
+
+
 @router.get("/park_emotion")
-def get_parks_emotion():
-    with engine.connect() as conn:
-        query = text("""
-            SELECT 
-                p.ID,
-                p.Park,
-                p.Address,
-                p.Class,
-                p.Description,
-                p.Latitude,
-                p.Longitude,
-                p.Tel,
-                k.Keyword_1,
-                k.Keyword_2,
-                k.Keyword_3
-            FROM tb_parks p
-            LEFT JOIN tb_parks_keywords k
-            ON p.ID = k.ParkID
-        """)
-        result = conn.execute(query)
-        db_data = [dict(row._mapping) for row in result]
+def get_parks_emotion(request: Request):
+    db_data = _catalog_rows("""
+        SELECT 
+            p.ID,
+            p.Park,
+            p.Address,
+            p.Class,
+            p.Description,
+            p.Latitude,
+            p.Longitude,
+            p.Tel,
+            k.Keyword_1,
+            k.Keyword_2,
+            k.Keyword_3
+        FROM tb_parks p
+        LEFT JOIN tb_parks_keywords k
+        ON p.ID = k.ParkID
+    """)
 
     results = [
         {
@@ -134,19 +167,15 @@ def get_parks_emotion():
         }
         for row in db_data
     ]
-    return results
+    return json_response(request, results)
 
 
 # ------------------
 # 공원 전체 리스트 
 # ------------------
 @router.get("/parks")
-def get_parks():
-    with engine.connect() as conn:
-        result = conn.execute(
-            text("SELECT * FROM tb_parks")  
-        )
-        db_data = [dict(row._mapping) for row in result]  
+def get_parks(request: Request):
+    db_data = _catalog_rows("SELECT * FROM tb_parks")
 
     results = [
         {
@@ -161,7 +190,24 @@ def get_parks():
         }
         for row in db_data
     ]
-    return results
+    return json_response(request, results)
+
+# ------------------
+# 지도용 공원 / 클러스터 (/parks/{park_id} 보다 먼저 등록해야 "map" 이 ID 로 해석되지 않음)
+# ------------------
+@router.get("/parks/map")
+def get_parks_map(request: Request,
+                  sw_lat: float = Query(..., ge=-90, le=90), sw_lon: float = Query(..., ge=-180, le=180),
+                  ne_lat: float = Query(..., ge=-90, le=90), ne_lon: float = Query(..., ge=-180, le=180),
+                  level: int = Query(7, ge=MIN_LEVEL, le=MAX_LEVEL)):
+    """
+    지도 뷰포트(남서/북동 모서리) + 카카오맵 레벨 → 개별 공원 또는 격자 클러스터(count, 중심 좌표)
+    - items[].type : "park" (id, name, lat, lon) / "cluster" (count, lat, lon)
+    """
+    if sw_lat > ne_lat or sw_lon > ne_lon:
+        raise HTTPException(status_code=400, detail="sw 좌표는 ne 좌표보다 작아야 합니다.")
+    return json_response(request, park_map.query(sw_lat, sw_lon, ne_lat, ne_lon, level))
+
 
 # ------------------
 # 공원 세부정보 
@@ -170,75 +216,51 @@ def get_parks():
 def get_park_detail(park_id: int):
     """
     공원 상세정보: 기본정보 + 날씨 + 시설물
+    (기본정보/시설물/키워드는 미리 만들어 둔 문서 사용 → 날씨만 실시간)
     """
     try:
-        with engine.connect() as conn:
-            # 공원 기본정보
-            park_sql = text("""
-                SELECT 
-                    p.ID AS park_id,
-                    p.Park AS ParkName,
-                    p.Address,
-                    p.Tel AS PhoneNumber,
-                    p.Latitude,
-                    p.Longitude
-                FROM tb_parks p
-                WHERE p.ID = :park_id
-            """)
-            park = conn.execute(park_sql, {"park_id": park_id}).mappings().first()
-            if not park:
-                raise HTTPException(status_code=404, detail="Park not found")
-
-            # 시설물 정보
-            facilities_sql = text("""
-                SELECT 
-                    Square, Trail, Pond, Fountain, Campground, Pavilion, Playground,
-                    Sports_ground, Fitness_facility, Cultural_facility, Zoo,
-                    Botanical_garden, Toilet, Parking, Convenience
-                FROM tb_parks_facilities
-                WHERE ParkID = :park_id
-            """)
-            facilities_row = conn.execute(facilities_sql, {"park_id": park_id}).mappings().first()
-
-            facilities_kor = []
-            if facilities_row:
-                facility_map = {
-                    "Square": "광장",
-                    "Trail": "산책로",
-                    "Pond": "연못",
-                    "Fountain": "분수",
-                    "Campground": "야영장",
-                    "Pavilion": "정자",
-                    "Playground": "놀이터",
-                    "Sports_ground": "운동장",
-                    "Fitness_facility": "운동기구",
-                    "Cultural_facility": "문화시설",
-                    "Zoo": "동물원",
-                    "Botanical_garden": "식물원",
-                    "Toilet": "화장실",
-                    "Parking": "주차장",
-                    "Convenience": "편의시설",
-                }
-                for key, label in facility_map.items():
-                    if facilities_row[key]:
-                        facilities_kor.append(label)
-
-            # 날씨 정보
-            weather_data = get_park_weather(park["Latitude"], park["Longitude"])
-
-            # 결과 합치기
-            result = {
-                "id": park["park_id"],
-                "name": park["ParkName"],
-                "address": park["Address"],
-                "tel": park["PhoneNumber"],
-                "weather": weather_data["weather"],
-                "air": weather_data["air"],
-                "facilities": facilities_kor
-            }
-
-            return result
+        park = park_documents.get(park_id)
+        if not park:
+            raise HTTPException(status_code=404, detail="Park not found")
 
+        # 날씨 정보
+        weather_data = get_park_weather(park["lat"], park["lon"])
+
+        # 결과 합치기
+        result = {
+            "id": park["id"],
+            "name": park["name"],
+            "address": park["address"],
+            "tel": park["tel"],
+            "weather": weather_data["weather"],
+            "air": weather_data["air"],
+            "facilities": park["facilities"],
+            "keywords": park["keywords"]
+        }
+
+        return result
+
+    except HTTPException:
+        raise
     except Exception as e:
         traceback.print_exc()
-        raise HTTPException(status_code=500, detail=str(e))
\ No newline at end of file
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+# ------------------
+# 비슷한 공원
+# ------------------
+@router.get("/parks/{park_id}/similar")
+def get_similar_parks(park_id: int,
+                      k: int = Query(6, ge=1, le=30),
+                      distance_weight: float = Query(0.0, ge=0.0, le=1.0),
+                      max_km: Optional[float] = Query(None, gt=0)):
+    """
+    5지표가 비슷한 공원 (메모리 인덱스, DB 조회 없음)
+    - distance_weight : 0 = 지표만, 1 = 거리만
+    - max_km : 이 거리 안의 공원만
+    """
+    similar = park_similarity.similar(park_id, k=k, distance_weight=distance_weight, max_km=max_km)
+    if similar is None:
+        raise HTTPException(status_code=404, detail="Park not found")
+    return {"park_id": park_id, "similar": similar}
@@ -1,6 +1,7 @@
 from fastapi import APIRouter, Body, HTTPException
 from typing import Dict
 from algorithm.category_algorithm import recommend_category_by_mind
+from algorithm.model_registry import model_version
 import traceback
 
 router = APIRouter()
@@ -12,7 +13,7 @@ def recommend_mind_category_api(
     try:
         print("[녹지 추천 요청]")
         result = recommend_category_by_mind(emotions)
-        return {"recommended_categories": result}
+        return {"recommended_categories": result, "model_version": model_version()}
     except Exception as e:
         traceback.print_exc()
         raise HTTPException(status_code=500, detail=f"서버 오류: {str(e)}")
\ No newline at end of file
@@ -1,100 +1,95 @@
-from fastapi import APIRouter, HTTPException
+from fastapi import APIRouter, Depends, HTTPException
 from sqlalchemy import text
-from ..db import engine
-from algorithm.parks_algorithm import recommend_from_scored_parks
-from algorithm.category_algorithm import recommend_category_by_mind
+from ..db import engine, get_read_engine, mark_write
+from ..emotion_writer import emotion_writer
+from ..rate_limit import rate_limited
+from ..recommend_jobs import recommend_jobs, compute_recommendation, TOP_N_PARKS, TOP_N_CATEGORIES
 import traceback
 import time
 
 router = APIRouter()
 
-@router.post("/recommend_for_user")
-def recommend_for_user(user_nickname: str, top_n_parks: int = 6, top_n_categories: int = 3):
+LATEST_EMOTION_SQL = text("""
+    SELECT nickname, create_date, depression, anxiety, stress, happiness, achievement, energy, latitude, longitude
+    FROM tb_users_emotions
+    WHERE nickname = :nickname
+    ORDER BY create_date DESC
+    LIMIT 1
+""")
+
+LATEST_CATEGORIES_SQL = text("""
+    SELECT create_date, category_1, category_2, category_3
+    FROM tb_users_category_recommend
+    WHERE nickname = :nickname
+    ORDER BY create_date DESC
+""")
+
+LATEST_PARKS_SQL = text("""
+    SELECT create_date, park_1, park_2, park_3, park_4, park_5, park_6
+    FROM tb_users_parks_recommend
+    WHERE nickname = :nickname
+    ORDER BY create_date DESC
+""")
+
+@router.post("/recommend_for_user", dependencies=[Depends(rate_limited("recommend"))])
+def recommend_for_user(user_nickname: str, top_n_parks: int = TOP_N_PARKS, top_n_categories: int = TOP_N_CATEGORIES):
     """
     사용자 최근 감정 기반으로
     1) 녹지 유형 추천(top_n_categories, Content 포함)
     2) 공원 추천(top_n_parks)
     결과 반환 및 DB 저장
+    (감정/위치 제출 때 미리 계산해 둔 결과가 있으면 그걸 사용 - backend/recommend_jobs.py)
     로그는 그대로 출력
     """
     try:
-        with engine.begin() as conn:
-            # 1. 최근 감정과 위치 가져오기
-            query_emotion = text("""
-                SELECT nickname, create_date, depression, anxiety, stress, happiness, achievement, energy, latitude, longitude
-                FROM tb_users_emotions
-                WHERE nickname = :nickname
-                ORDER BY create_date DESC
-                LIMIT 1
-            """)
-            row = conn.execute(query_emotion, {"nickname": user_nickname}).fetchone()
+        # 1. 최근 감정과 위치 가져오기
+        # write-behind 모드: 아직 DB에 안 들어간 최신 체크인이 있으면 그걸 사용 (read-your-writes)
+        latest = emotion_writer.latest_pending(user_nickname) if emotion_writer else None
+        if latest is None:
+            with engine.connect() as conn:
+                row = conn.execute(LATEST_EMOTION_SQL, {"nickname": user_nickname}).fetchone()
 
             if not row:
                 raise HTTPException(status_code=404, detail="사용자 감정 정보가 없습니다.")
-            
-            emotions = {
-                "우울": row._mapping["depression"],
-                "불안": row._mapping["anxiety"],
-                "스트레스": row._mapping["stress"],
-                "행복": row._mapping["happiness"],
-                "에너지": row._mapping["energy"],
-                "성취감": row._mapping["achievement"]
-            }
-            lat, lon = row._mapping["latitude"], row._mapping["longitude"]
-            print(f"[{user_nickname}] 최신 감정:", emotions, "위치:", (lat, lon))
-
-            # 2. 녹지 유형 추천
-            recommended_categories = recommend_category_by_mind(emotions, top_n=top_n_categories)
-            print(f"[{user_nickname}] 추천 녹지 유형 (이름만):", recommended_categories)
-
-            # Content 포함해서 DB와 반환용으로 한 번에 가져오기
-            categories = [rc["category"] for rc in recommended_categories]
-            query_content = text("""
-                SELECT Category, Content
-                FROM tb_parks_categorys
-                WHERE Category IN :categories
-            """)
-            content_rows = conn.execute(query_content, {"categories": tuple(categories)}).fetchall()
-            content_map = {r._mapping["Category"]: r._mapping["Content"] for r in content_rows}
-
-            cat_with_content = []
-            for rc in recommended_categories:
-                cat_name = rc["category"]
-                sentences = [s.strip() for s in content_map.get(cat_name, "").split("/") if s.strip()]
-                cat_with_content.append({"category": cat_name, "content": sentences})
-            print(f"[{user_nickname}] 추천 녹지 유형 + Content:", cat_with_content)
+            latest = dict(row._mapping)
+
+        # 2~3. 녹지 유형 + 공원 추천 (미리 계산한 결과가 없거나 늦으면 직접 계산)
+        result = None
+        if top_n_parks == TOP_N_PARKS and top_n_categories == TOP_N_CATEGORIES:
+            t0 = time.perf_counter()
+            result = recommend_jobs.wait_for(latest)
+            if result is not None:
+                print(f"[{user_nickname}] 미리 계산한 추천 사용 ({(time.perf_counter() - t0) * 1000:.1f}ms 대기)")
+        if result is None:
+            result = compute_recommendation(latest, top_n_parks, top_n_categories)
 
+        with engine.begin() as conn:
             # DB 저장 - tb_users_category_recommend
             insert_cat = text("""
                 INSERT INTO tb_users_category_recommend
                 (nickname, create_date, category_1, category_2, category_3)
                 VALUES (:nickname, :create_date, :c1, :c2, :c3)
             """)
-            c = [rc["category"] for rc in recommended_categories] + [None]*3
+            c = [rc["category"] for rc in result["recommended_categories"]] + [None]*3
             conn.execute(insert_cat, {
                 "nickname": user_nickname,
-                "create_date": row._mapping["create_date"],
+                "create_date": latest["create_date"],
                 "c1": c[0],
                 "c2": c[1],
                 "c3": c[2]
             })
             print(f"{user_nickname} 저장된 녹지 유형:", c[:top_n_categories])
 
-            # 3. 공원 추천
-            recommended_parks = recommend_from_scored_parks(lat, lon, emotions, top_n=top_n_parks)            
-
-            print(f"[{user_nickname}] 추천 공원:", [park.get("Park", "") for park in recommended_parks])
-
             # DB 저장 - tb_users_parks_recommend
             insert_parks = text("""
                 INSERT INTO tb_users_parks_recommend
                 (nickname, create_date, park_1, park_2, park_3, park_4, park_5, park_6)
                 VALUES (:nickname, :create_date, :p1, :p2, :p3, :p4, :p5, :p6)
             """)
-            p = [p.get("Park") for p in recommended_parks] + [None]*6
+            p = [p.get("Park") for p in result["recommended_parks"]] + [None]*6
             conn.execute(insert_parks, {
                 "nickname": user_nickname,
-                "create_date": row._mapping["create_date"],
+                "create_date": latest["create_date"],
                 "p1": p[0],
                 "p2": p[1],
                 "p3": p[2],
@@ -102,13 +97,13 @@ def recommend_for_user(user_nickname: str, top_n_parks: int = 6, top_n_categorie
                 "p5": p[4],
                 "p6": p[5],
             })
+        mark_write(user_nickname)
 
         # 4. 결과 반환
-        return {
-            "recommended_categories": cat_with_content,
-            "recommended_parks": recommended_parks
-        }
+        return result
 
+    except HTTPException:
+        raise
     except Exception as e:
         traceback.print_exc()
         raise HTTPException(status_code=500, detail=f"서버 오류: {str(e)}")
@@ -117,7 +112,7 @@ def recommend_for_user(user_nickname: str, top_n_parks: int = 6, top_n_categorie
 @router.get("/latest_recommendation/{user_nickname}")
 def get_latest_recommendation(user_nickname: str):
     try:
-        with engine.begin() as conn:
+        with get_read_engine(user_nickname).connect() as conn:
             # 최신 감정 데이터
             emotion_rows = conn.execute(text("""
                 SELECT create_date, depression, anxiety, stress, happiness, achievement, energy
@@ -127,20 +122,10 @@ def get_latest_recommendation(user_nickname: str):
             """), {"nickname": user_nickname}).fetchall()
 
             # 최신 녹지 유형
-            cat_rows = conn.execute(text("""
-                SELECT create_date, category_1, category_2, category_3
-                FROM tb_users_category_recommend
-                WHERE nickname = :nickname
-                ORDER BY create_date DESC
-            """), {"nickname": user_nickname}).fetchall()
+            cat_rows = conn.execute(LATEST_CATEGORIES_SQL, {"nickname": user_nickname}).fetchall()
 
             # 최신 추천 공원
-            park_rows = conn.execute(text("""
-                SELECT create_date, park_1, park_2, park_3, park_4, park_5, park_6
-                FROM tb_users_parks_recommend
-                WHERE nickname = :nickname
-                ORDER BY create_date DESC
-            """), {"nickname": user_nickname}).fetchall()
+            park_rows = conn.execute(LATEST_PARKS_SQL, {"nickname": user_nickname}).fetchall()
 
             print(f"[{user_nickname}] 최신 감정 데이터:", [dict(r._mapping) for r in emotion_rows])
             print(f"[{user_nickname}] 최신 녹지 유형:", [[c for c in r._mapping.values() if c] for r in cat_rows])
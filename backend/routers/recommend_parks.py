@@ -1,31 +1,50 @@
 # 공원 추천 api
 from fastapi import APIRouter, Body, HTTPException
-from typing import Dict
-from algorithm.parks_algorithm import recommend_from_scored_parks
+from pydantic import Field
+from typing import Annotated, Dict, Optional
+from algorithm.parks_algorithm import recommend_parks_adaptive, MAX_PAGE_SIZE, MAX_EMOTION_LEVEL, MAX_EMOTIONS
 from sqlalchemy import text
 from ..db import engine
+from ..recommend_cache import cached_recommend_parks
+from algorithm.model_registry import model_version
 import traceback
 
 router = APIRouter()
 
 @router.post("/recommend_parks")
 def recommend_parks_api(
-    lat: float = Body(..., description="사용자 위도"),
-    lon: float = Body(..., description="사용자 경도"),
-    emotions: Dict[str, int] = Body(..., description="감정 수준 예: {'우울':5,'불안':5,'행복':3}"),
-    top_n: int = Body(6, description="추천 상위 N개")
+    lat: float = Body(..., ge=-90, le=90, description="사용자 위도"),
+    lon: float = Body(..., ge=-180, le=180, description="사용자 경도"),
+    emotions: Dict[str, Annotated[int, Field(ge=0, le=MAX_EMOTION_LEVEL)]] = Body(
+        ..., max_length=MAX_EMOTIONS, description="감정 수준 예: {'우울':5,'불안':5,'행복':3}"),
+    top_n: int = Body(6, ge=1, le=MAX_PAGE_SIZE, description="추천 상위 N개"),
+    adaptive: bool = Body(False, description="반경을 넓혀가며 후보 k개 확보 (cursor 페이지네이션 지원)"),
+    cursor: Optional[str] = Body(None, description="이전 응답의 next_cursor (다음 순위 공원 조회)")
 ):
     try:
         print("[공원 추천 요청]")
-        # 알고리즘 호출
-        recommended = recommend_from_scored_parks(lat, lon, emotions, top_n=top_n)
+        # 적응형 반경 검색 + 페이지네이션
+        if adaptive or cursor:
+            page = recommend_parks_adaptive(lat, lon, emotions, top_n=top_n, cursor=cursor)
+            return {
+                "recommended_parks": page["parks"],
+                "next_cursor": page["next_cursor"],
+                "radius_km": page["radius_km"],
+                "model_version": model_version(),
+                "message": "추천 성공" if page["parks"] else "추천 결과가 없습니다."
+            }
+
+        # 알고리즘 호출 (같은 격자 + 같은 감정이면 캐시 결과 사용)
+        recommended = cached_recommend_parks(lat, lon, emotions, top_n=top_n)
 
         # 결과 반환
         if not recommended:
-            return {"recommended_parks": [], "message": "추천 결과가 없습니다."}
+            return {"recommended_parks": [], "message": "추천 결과가 없습니다.", "model_version": model_version()}
           
-        return {"recommended_parks": recommended, "message": "추천 성공"}
+        return {"recommended_parks": recommended, "message": "추천 성공", "model_version": model_version()}
 
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
         traceback.print_exc()
         raise HTTPException(status_code=500, detail=f"서버 오류: {str(e)}")
\ No newline at end of file
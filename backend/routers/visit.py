@@ -1,12 +1,61 @@
-from fastapi import APIRouter, HTTPException
+from fastapi import APIRouter, HTTPException, Request
 from sqlalchemy import text
-from ..db import engine  
+from ..db import engine, get_read_engine, mark_write
+from ..responses import json_response
 from datetime import datetime, timedelta, timezone
 import traceback
 
 router = APIRouter()
 KST = timezone(timedelta(hours=9))  # 한국 표준시
 
+# 같은 처방에서 이미 클릭한 기록
+VISIT_LOOKUP_SQL = text("""
+    SELECT id FROM tb_parks_visit_log
+    WHERE nickname = :nickname
+      AND park_id = :park_id
+      AND create_date = :create_date
+""")
+
+USER_VISITS_SQL = text("""
+    SELECT 
+        p.ID AS park_id,
+        p.Park AS park_name,
+        p.Address AS address,
+        COALESCE(v.visit_count, 0) AS visit_count,
+        CASE WHEN v.visit_count > 0 THEN 1 ELSE 0 END AS is_visited,
+        r.create_date AS recommend_date
+    FROM tb_users_parks_recommend r
+    JOIN tb_parks p
+        ON JSON_CONTAINS(
+            JSON_ARRAY(r.park_1,r.park_2,r.park_3,r.park_4,r.park_5,r.park_6),
+            JSON_QUOTE(p.Park)
+        )
+    LEFT JOIN (
+        SELECT 
+            park_id,
+            create_date,
+            COUNT(*) AS visit_count
+        FROM tb_parks_visit_log
+        WHERE nickname = :nickname
+        GROUP BY park_id, create_date
+    ) v ON v.park_id = p.ID AND v.create_date = r.create_date
+    WHERE r.nickname = :nickname
+    ORDER BY r.create_date DESC, p.Park ASC
+""")
+
+DISTRICT_HEATMAP_SQL = text("""
+    SELECT 
+        p.Address,
+        SUBSTRING_INDEX(SUBSTRING_INDEX(p.Address, ' ', 2), ' ', -1) AS district_name,
+        SUM(s.visit_count) AS total_visits,
+        COUNT(DISTINCT s.park_id) AS visited_parks,
+        (SELECT COUNT(*) FROM tb_parks WHERE SUBSTRING_INDEX(SUBSTRING_INDEX(Address, ' ', 2), ' ', -1) = district_name) AS total_parks
+    FROM tb_users_parks_status s
+    JOIN tb_parks p ON s.park_id = p.ID
+    WHERE s.nickname = :nickname AND s.is_visited = 1
+    GROUP BY district_name
+""")
+
 # -----------------------------
 # 토글 상태 변경 API
 # -----------------------------
@@ -19,12 +68,7 @@ def toggle_visit_status(nickname: str, park_id: int, create_date: str):
     try:
         with engine.begin() as conn:
             # 같은 처방에서 이미 클릭한 기록이 있는지 확인
-            existing = conn.execute(text("""
-                SELECT id FROM tb_parks_visit_log
-                WHERE nickname = :nickname 
-                  AND park_id = :park_id 
-                  AND create_date = :create_date
-            """), {
+            existing = conn.execute(VISIT_LOOKUP_SQL, {
                 "nickname": nickname,
                 "park_id": park_id,
                 "create_date": create_date
@@ -86,6 +130,7 @@ def toggle_visit_status(nickname: str, park_id: int, create_date: str):
 
                 action = "on"
 
+        mark_write(nickname)
         return {"status": "success", "action": action}
 
     except Exception:
@@ -96,38 +141,13 @@ def toggle_visit_status(nickname: str, park_id: int, create_date: str):
 # 마이페이지용 – 사용자 방문 상태 조회
 # -----------------------------
 @router.get("/get_user_visits")
-def get_user_visits(nickname: str):
+def get_user_visits(nickname: str, request: Request):
     try:
-        with engine.connect() as conn:
-            result = conn.execute(text("""
-                        SELECT 
-                            p.ID AS park_id,
-                            p.Park AS park_name,
-                            p.Address AS address,
-                            COALESCE(v.visit_count, 0) AS visit_count,
-                            CASE WHEN v.visit_count > 0 THEN 1 ELSE 0 END AS is_visited,
-                            r.create_date AS recommend_date
-                        FROM tb_users_parks_recommend r
-                        JOIN tb_parks p
-                            ON JSON_CONTAINS(
-                                JSON_ARRAY(r.park_1,r.park_2,r.park_3,r.park_4,r.park_5,r.park_6),
-                                JSON_QUOTE(p.Park)
-                            )
-                        LEFT JOIN (
-                            SELECT 
-                                park_id,
-                                create_date,
-                                COUNT(*) AS visit_count
-                            FROM tb_parks_visit_log
-                            WHERE nickname = :nickname
-                            GROUP BY park_id, create_date
-                        ) v ON v.park_id = p.ID AND v.create_date = r.create_date
-                        WHERE r.nickname = :nickname
-                        ORDER BY r.create_date DESC, p.Park ASC
-            """), {"nickname": nickname}).mappings().all()
+        with get_read_engine(nickname).connect() as conn:
+            result = conn.execute(USER_VISITS_SQL, {"nickname": nickname}).mappings().all()
         print(f"[{datetime.now(KST).strftime('%Y-%m-%d %H:%M:%S')}] GET_USER_VISITS: nickname={nickname}, parks_count={len(result)}")
 
-        return {"parks": result}
+        return json_response(request, {"parks": result})
 
     except Exception as e:
         print(f"[{datetime.now(KST).strftime('%Y-%m-%d %H:%M:%S')}] GET_USER_VISITS ERROR:", str(e))
@@ -146,19 +166,8 @@ def get_district_heatmap(nickname: str):
     """
     try:
         now_kst = datetime.now(KST)
-        with engine.connect() as conn:
-            result = conn.execute(text("""
-                SELECT 
-                    p.Address,
-                    SUBSTRING_INDEX(SUBSTRING_INDEX(p.Address, ' ', 2), ' ', -1) AS district_name,
-                    SUM(s.visit_count) AS total_visits,
-                    COUNT(DISTINCT s.park_id) AS visited_parks,
-                    (SELECT COUNT(*) FROM tb_parks WHERE SUBSTRING_INDEX(SUBSTRING_INDEX(Address, ' ', 2), ' ', -1) = district_name) AS total_parks
-                FROM tb_users_parks_status s
-                JOIN tb_parks p ON s.park_id = p.ID
-                WHERE s.nickname = :nickname AND s.is_visited = 1
-                GROUP BY district_name
-            """), {"nickname": nickname}).mappings().all()
+        with get_read_engine(nickname).connect() as conn:
+            result = conn.execute(DISTRICT_HEATMAP_SQL, {"nickname": nickname}).mappings().all()
             
             # weighted_ratio 추가 계산
             districts = []
@@ -0,0 +1,154 @@
+# SQL 실행 계측 (SQLAlchemy engine + pymysql 직접 연결 둘 다)
+# - 문장 fingerprint(값을 ? 로 바꾼 SQL), 실행 시간, 반환 행 수, 호출한 라우트 기록
+# - 느린 쿼리(SLOW_QUERY_MS 이상) 최근 N개 보관 → /admin/slow_queries
+# - 한 요청 안에서 같은 fingerprint 가 N_PLUS_ONE_THRESHOLD 번 이상 실행되면 N+1 의심으로 기록
+from collections import deque, Counter
+from typing import Dict, Any
+from sqlalchemy import event
+from dotenv import load_dotenv
+from .request_context import current_request_id, current_route, request_state
+import pymysql, os, re, threading, time
+
+load_dotenv()
+
+SQL_TRACE_ENABLED = os.getenv("SQL_TRACE", "1") == "1"
+SLOW_QUERY_MS = float(os.getenv("SLOW_QUERY_MS", 200))
+N_PLUS_ONE_THRESHOLD = int(os.getenv("N_PLUS_ONE_THRESHOLD", 5))
+RING_SIZE = 200
+MAX_FINGERPRINTS = 500
+
+_COMMENT = re.compile(r"--[^\n]*|/\*.*?\*/", re.S)
+_STRING = re.compile(r"'(?:[^'\\]|\\.)*'|\"(?:[^\"\\]|\\.)*\"")
+_NUMBER = re.compile(r"(?<![\w.])-?\d+(?:\.\d+)?\b")
+_PARAM = re.compile(r"%\(\w+\)s|%s|:\w+|\?")
+_IN_LIST = re.compile(r"\(\s*\?(?:\s*,\s*\?)+\s*\)")
+_SPACE = re.compile(r"\s+")
+
+_fingerprint_cache: Dict[str, str] = {}
+
+
+def fingerprint(sql: str) -> str:
+    """값/파라미터를 ? 로 바꾸고 공백 정리 → 같은 모양의 쿼리는 같은 문자열"""
+    fp = _fingerprint_cache.get(sql)
+    if fp is None:
+        fp = _COMMENT.sub(" ", sql)
+        fp = _STRING.sub("?", fp)
+        fp = _PARAM.sub("?", fp)
+        fp = _NUMBER.sub("?", fp)
+        fp = _IN_LIST.sub("(?+)", fp)
+        fp = _SPACE.sub(" ", fp).strip().rstrip(";")
+        if len(_fingerprint_cache) > 2000:
+            _fingerprint_cache.clear()
+        _fingerprint_cache[sql] = fp
+    return fp
+
+
+class SqlStats:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.slow = deque(maxlen=RING_SIZE)
+        self.repeated = deque(maxlen=RING_SIZE)
+        self.by_fingerprint: Dict[str, Dict[str, Any]] = {}
+
+    def record(self, sql: str, duration: float, rows, source: str):
+        fp = fingerprint(sql)
+        ms = duration * 1000
+        route = current_route()
+
+        # 요청 안에서 같은 문장 반복 (N+1)
+        state = request_state()
+        repeat = 0
+        if state is not None:
+            counts = state.setdefault("sql_counts", Counter())
+            counts[fp] += 1
+            repeat = counts[fp]
+
+        with self._lock:
+            agg = self.by_fingerprint.get(fp)
+            if agg is None:
+                if len(self.by_fingerprint) >= MAX_FINGERPRINTS:
+                    # 가장 적게 쓰인 것 제거
+                    del self.by_fingerprint[min(self.by_fingerprint, key=lambda k: self.by_fingerprint[k]["total_ms"])]
+                agg = self.by_fingerprint[fp] = {"count": 0, "total_ms": 0.0, "max_ms": 0.0, "rows": 0, "routes": set()}
+            agg["count"] += 1
+            agg["total_ms"] += ms
+            agg["max_ms"] = max(agg["max_ms"], ms)
+            agg["rows"] += rows or 0
+            if route and len(agg["routes"]) < 20:
+                agg["routes"].add(route)
+
+            if ms >= SLOW_QUERY_MS:
+                self.slow.append({"fingerprint": fp, "duration_ms": round(ms, 2), "rows": rows,
+                                  "route": route, "request_id": current_request_id(),
+                                  "source": source, "time": time.time()})
+            if repeat == N_PLUS_ONE_THRESHOLD:
+                self.repeated.append({"fingerprint": fp, "route": route, "request_id": current_request_id(),
+                                      "count": repeat, "time": time.time()})
+        if repeat == N_PLUS_ONE_THRESHOLD:
+            print(f"[WARN] N+1 의심: {route} 에서 같은 쿼리 {repeat}회 이상 실행 - {fp[:120]}")
+
+    def report(self, top: int = 20) -> Dict[str, Any]:
+        with self._lock:
+            ranked = sorted(self.by_fingerprint.items(), key=lambda x: x[1]["total_ms"], reverse=True)[:top]
+            return {
+                "slow_query_ms": SLOW_QUERY_MS,
+                "slow": list(self.slow)[::-1],
+                "repeated": list(self.repeated)[::-1],
+                "top": [
+                    {"fingerprint": fp, "count": a["count"], "total_ms": round(a["total_ms"], 2),
+                     "avg_ms": round(a["total_ms"] / a["count"], 2), "max_ms": round(a["max_ms"], 2),
+                     "rows": a["rows"], "routes": sorted(a["routes"])}
+                    for fp, a in ranked
+                ],
+            }
+
+
+sql_stats = SqlStats()
+
+
+# ---------------------------
+# SQLAlchemy engine 계측
+# ---------------------------
+def instrument_engine(engine):
+    if not SQL_TRACE_ENABLED:
+        return
+
+    # 시작 시각은 실행 컨텍스트에 저장 (실행마다 새로 만들어지므로 실패한 실행이 남긴 값이 다음 실행에 섞이지 않음)
+    @event.listens_for(engine, "before_cursor_execute")
+    def _before(conn, cursor, statement, parameters, context, executemany):
+        if context is not None:
+            context._sql_trace_start = time.perf_counter()
+
+    @event.listens_for(engine, "after_cursor_execute")
+    def _after(conn, cursor, statement, parameters, context, executemany):
+        start = getattr(context, "_sql_trace_start", None)
+        if start is None:
+            return
+        rows = cursor.rowcount if cursor.rowcount is not None and cursor.rowcount >= 0 else None
+        sql_stats.record(statement, time.perf_counter() - start, rows, "sqlalchemy")
+
+    @event.listens_for(engine, "handle_error")
+    def _error(exception_context):
+        """실패한 실행은 시간만 기록 (행 수 없음)"""
+        start = getattr(exception_context.execution_context, "_sql_trace_start", None)
+        if start is not None and exception_context.statement is not None:
+            sql_stats.record(exception_context.statement, time.perf_counter() - start, None, "sqlalchemy")
+
+
+# ---------------------------
+# pymysql 직접 연결 계측 (algorithm / llm)
+# ---------------------------
+class InstrumentedConnection(pymysql.connections.Connection):
+    """모든 cursor.execute 는 Connection.query 를 거치므로 여기서 측정"""
+    def query(self, sql, unbuffered=False):
+        start = time.perf_counter()
+        rows = None  # 실패하면 행 수 없음 (self._result 는 이전 쿼리의 결과)
+        try:
+            result = super().query(sql, unbuffered)
+            if self._result is not None:
+                rows = self._result.affected_rows
+            return result
+        finally:
+            if SQL_TRACE_ENABLED:
+                text_sql = sql.decode("utf-8", "replace") if isinstance(sql, bytes) else sql
+                sql_stats.record(text_sql, time.perf_counter() - start, rows, "pymysql")
@@ -0,0 +1,80 @@
+# 서버 콜드 스타트 측정
+# 1) import 시간 프로파일 (python -X importtime)
+# 2) uvicorn 실행 → 첫 요청(GET /) 성공까지 걸린 시간 (time-to-first-request)
+#
+# 사용법: python -m backend.startup_profile [--runs 5] [--top 20]
+from collections import defaultdict
+from pathlib import Path
+import argparse, socket, statistics, subprocess, sys, time, urllib.request
+
+ROOT = Path(__file__).resolve().parent.parent
+
+
+def import_profile(module: str = "backend.main"):
+    """모듈 import 시 각 모듈의 누적 import 시간(us) 목록"""
+    proc = subprocess.run([sys.executable, "-X", "importtime", "-c", f"import {module}"],
+                          cwd=ROOT, capture_output=True, text=True)
+    if proc.returncode != 0:
+        raise RuntimeError(proc.stderr[-2000:])
+
+    rows = []
+    for line in proc.stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, self_us, cumulative_us, name = [x.strip() for x in line.replace("import time:", "|").split("|")]
+        rows.append((name, int(self_us), int(cumulative_us)))
+    return rows
+
+
+def _free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def time_to_first_request(timeout: float = 30.0) -> float:
+    """uvicorn 프로세스 시작 ~ GET / 200 응답까지(초)"""
+    port = _free_port()
+    start = time.perf_counter()
+    proc = subprocess.Popen([sys.executable, "-m", "uvicorn", "backend.main:app", "--port", str(port),
+                             "--log-level", "warning"], cwd=ROOT)
+    try:
+        while time.perf_counter() - start < timeout:
+            try:
+                with urllib.request.urlopen(f"http://127.0.0.1:{port}/", timeout=1) as res:
+                    if res.status == 200:
+                        return time.perf_counter() - start
+            except OSError:
+                time.sleep(0.01)
+        raise TimeoutError("서버가 응답하지 않습니다.")
+    finally:
+        proc.terminate()
+        proc.wait()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--top", type=int, default=20)
+    args = parser.parse_args()
+
+    rows = import_profile()
+    total = next(c for n, _, c in rows if n == "backend.main")
+    print(f"[import] backend.main 전체 : {total / 1000:.1f} ms")
+
+    # 최상위 패키지별 self 시간 합계
+    by_package = defaultdict(int)
+    for name, self_us, _ in rows:
+        by_package[name.split(".")[0]] += self_us
+    print(f"\n[import] 패키지별 시간 (상위 {args.top})")
+    for pkg, us in sorted(by_package.items(), key=lambda x: x[1], reverse=True)[:args.top]:
+        print(f"  {pkg:<30} {us / 1000:8.1f} ms")
+
+    # 지연 import 대상이 시작 시 로드되는지 확인
+    loaded = {n.split(".")[0] for n, _, _ in rows}
+    for heavy in ("langchain_core", "langchain_openai", "openai", "requests"):
+        print(f"  {heavy:<30} {'로드됨 (확인 필요)' if heavy in loaded else '지연 로드'}")
+
+    times = [time_to_first_request() for _ in range(args.runs)]
+    print(f"\n[startup] time-to-first-request ({args.runs}회) "
+          f"median={statistics.median(times) * 1000:.0f} ms  max={max(times) * 1000:.0f} ms")
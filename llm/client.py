@@ -0,0 +1,179 @@
+# 재사용 LLM 클라이언트
+# - 프로세스당 하나의 httpx 커넥션 풀 (keep-alive) → 호출마다 TCP/TLS 핸드셰이크 생략
+# - 연결/응답 타임아웃 설정 (LLM_CONNECT_TIMEOUT, LLM_READ_TIMEOUT)
+# - hedged request (LLM_HEDGE=1) : 첫 시도가 p95 를 넘기면 두 번째 시도를 보내고 먼저 끝난 쪽 사용
+# - 서킷 브레이커 : 최근 호출이 계속 실패하거나 느리면 잠시 호출하지 않고 LLMUnavailableError (호출한 쪽이 대체 응답)
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeout, wait, FIRST_COMPLETED
+from functools import lru_cache
+from typing import Any, Dict, Optional
+from langchain_openai import ChatOpenAI
+from llm.errors import LLMOutputError, LLMTimeoutError, LLMUnavailableError
+from llm.instrumentation import invoke_instrumented, llm_stats
+from backend.circuit_breaker import get_breaker, CircuitOpenError
+import httpx, os, time
+
+MODEL = os.getenv("LLM_MODEL", "gpt-4o-mini")
+CONNECT_TIMEOUT = float(os.getenv("LLM_CONNECT_TIMEOUT", "5"))
+READ_TIMEOUT = float(os.getenv("LLM_READ_TIMEOUT", "30"))
+MAX_CONNECTIONS = int(os.getenv("LLM_MAX_CONNECTIONS", "20"))
+
+HEDGE_ENABLED = os.getenv("LLM_HEDGE", "0") == "1"
+HEDGE_AFTER_MS = float(os.getenv("LLM_HEDGE_AFTER_MS", "0"))  # 0 이면 엔드포인트 p95 사용
+HEDGE_MIN_SAMPLES = 20  # p95 를 믿을 수 있을 만큼 쌓이기 전에는 hedge 안 함
+
+# 응답 형식 오류(LLMOutputError)는 OpenAI 장애가 아니므로 실패로 세지 않음
+llm_breaker = get_breaker("openai", slow_call_seconds=float(os.getenv("LLM_BREAKER_SLOW_SECONDS", READ_TIMEOUT / 2)),
+                          open_seconds=float(os.getenv("LLM_BREAKER_OPEN_SECONDS", "60")))
+
+_http_client = None
+_executor = ThreadPoolExecutor(max_workers=MAX_CONNECTIONS, thread_name_prefix="llm-hedge")
+_budget_executor = ThreadPoolExecutor(max_workers=MAX_CONNECTIONS, thread_name_prefix="llm-budget")
+
+
+def http_client() -> httpx.Client:
+    global _http_client
+    if _http_client is None:
+        _http_client = httpx.Client(
+            timeout=httpx.Timeout(READ_TIMEOUT, connect=CONNECT_TIMEOUT),
+            limits=httpx.Limits(max_connections=MAX_CONNECTIONS,
+                                max_keepalive_connections=MAX_CONNECTIONS,
+                                keepalive_expiry=60),
+        )
+    return _http_client
+
+
+@lru_cache(maxsize=None)
+def chat_model(temperature: Optional[float] = None) -> ChatOpenAI:
+    """온도별로 하나씩 만들어 재사용 (재시도는 with_llm_retry 에서 처리하므로 클라이언트 재시도는 끔)"""
+    kwargs = {} if temperature is None else {"temperature": temperature}
+    return ChatOpenAI(
+        model=MODEL,
+        http_client=http_client(),
+        timeout=httpx.Timeout(READ_TIMEOUT, connect=CONNECT_TIMEOUT),
+        max_retries=0,
+        **kwargs,
+    )
+
+
+def hedge_delay(endpoint: str) -> Optional[float]:
+    """두 번째 시도를 보낼 때까지 기다릴 시간(초). None 이면 hedge 하지 않음"""
+    if not HEDGE_ENABLED:
+        return None
+    if HEDGE_AFTER_MS > 0:
+        return HEDGE_AFTER_MS / 1000
+    if llm_stats.latency_count(endpoint) < HEDGE_MIN_SAMPLES:
+        return None
+    return llm_stats.latency_percentile(endpoint, 0.95)
+
+
+def invoke_llm(chain, inputs: Dict[str, Any], endpoint: str, model: str = MODEL,
+               budget: Optional[float] = None):
+    """계측된 chain 호출. hedge 가 켜져 있으면 느린 첫 시도에 두 번째 시도를 겹쳐 보냄
+    (체인은 DB 쓰기 등 부작용이 없어야 함 — 결과 저장은 호출한 쪽에서 한 번만)
+    budget(초) 안에 끝나지 않으면 LLMTimeoutError (아직 대기열에 있던 호출은 취소, 이미 보낸 호출은 끝나고 버려짐)
+    서킷 브레이커가 열려 있으면 호출 없이 LLMUnavailableError"""
+    if budget is not None:
+        deadline = time.monotonic() + budget
+        future = _budget_executor.submit(_invoke_before, deadline, chain, inputs, endpoint, model)
+        try:
+            return future.result(timeout=budget)
+        except FutureTimeout:
+            future.cancel()  # 대기열에 있으면 OpenAI 에 보내지 않음 (나중에 업그레이드에서 다시 호출하므로 중복 비용)
+            llm_stats.add(endpoint, budget_exceeded=1)
+            raise LLMTimeoutError(f"{endpoint}: {budget:.1f}초 안에 LLM 응답 없음")
+
+    try:
+        return llm_breaker.call(_invoke, chain, inputs, endpoint, model,
+                                is_failure=lambda e: not isinstance(e, LLMOutputError))
+    except CircuitOpenError as e:
+        llm_stats.add(endpoint, breaker_rejected=1)
+        raise LLMUnavailableError(f"{endpoint}: {e}") from e
+
+
+def _invoke_before(deadline: float, chain, inputs: Dict[str, Any], endpoint: str, model: str):
+    """예산 호출 : 대기열에서 기다리는 사이 예산이 지났으면 호출하지 않음 (호출한 쪽은 이미 대체 응답)"""
+    if time.monotonic() >= deadline:
+        raise LLMTimeoutError(f"{endpoint}: 대기 중 예산 초과로 호출 생략")
+    return invoke_llm(chain, inputs, endpoint, model)
+
+
+def _invoke(chain, inputs: Dict[str, Any], endpoint: str, model: str):
+    delay = hedge_delay(endpoint)
+    if delay is None:
+        return invoke_instrumented(chain, inputs, endpoint, model)
+
+    first = _executor.submit(invoke_instrumented, chain, inputs, endpoint, model)
+    try:
+        return first.result(timeout=delay)
+    except FutureTimeout:
+        pass
+
+    llm_stats.add(endpoint, hedged=1)
+    second = _executor.submit(invoke_instrumented, chain, inputs, endpoint, model)
+    pending, error = {first, second}, None
+    while pending:
+        done, pending = wait(pending, return_when=FIRST_COMPLETED)
+        for future in done:
+            if future.exception() is None:
+                if future is second:
+                    llm_stats.add(endpoint, hedge_wins=1)
+                return future.result()  # 느린 쪽은 백그라운드에서 끝나고 버려짐
+            error = future.exception()
+    raise error
+
+
+# 벤치마크 : python -m llm.client --calls 100 --latency 0.3 --slow-ratio 0.02
+if __name__ == "__main__":
+    import argparse, time
+    from langchain_core.output_parsers import JsonOutputParser
+    from llm.fake_openai import FakeOpenAIServer
+    from llm.instrumentation import _percentile
+
+    parser = argparse.ArgumentParser(description="LLM 클라이언트 재사용 / hedging 벤치마크 (가짜 OpenAI 서버)")
+    parser.add_argument("--calls", type=int, default=100)
+    parser.add_argument("--latency", type=float, default=0.3)
+    parser.add_argument("--slow-ratio", type=float, default=0.02)
+    parser.add_argument("--slow-latency", type=float, default=3.0)
+    args = parser.parse_args()
+
+    def report(name, latencies, server):
+        print(f"{name:<28} p50={_percentile(latencies, .5)*1000:7.1f}ms "
+              f"p95={_percentile(latencies, .95)*1000:7.1f}ms p99={_percentile(latencies, .99)*1000:7.1f}ms "
+              f"requests={server.requests} connections={server.connections}")
+
+    with FakeOpenAIServer(latency=args.latency, slow_ratio=args.slow_ratio,
+                          slow_latency=args.slow_latency, seed=1) as server:
+        os.environ["OPENAI_API_KEY"] = "fake"
+        os.environ["OPENAI_BASE_URL"] = server.base_url
+        from llm.summary_chain import summary_prompt
+        inputs = {k: 3 for k in ("depression", "anxiety", "stress", "happiness", "achievement", "energy")}
+
+        # 1) 예전 방식 : 호출마다 새 ChatOpenAI + 새 커넥션
+        latencies = []
+        for _ in range(args.calls):
+            t0 = time.perf_counter()
+            with httpx.Client() as fresh:
+                (summary_prompt | ChatOpenAI(model=MODEL, http_client=fresh, max_retries=0) | JsonOutputParser()).invoke(inputs)
+            latencies.append(time.perf_counter() - t0)
+        report("new client per call", latencies, server)
+
+        # 2) 재사용 클라이언트 (keep-alive), hedge 없음
+        server.requests = server.connections = 0
+        chain = summary_prompt | chat_model() | JsonOutputParser()
+        latencies = []
+        for _ in range(args.calls):
+            t0 = time.perf_counter()
+            invoke_llm(chain, inputs, endpoint="bench")
+            latencies.append(time.perf_counter() - t0)
+        report("pooled client", latencies, server)
+
+        # 3) 재사용 클라이언트 + hedge (위에서 쌓인 p95 기준)
+        server.requests = server.connections = 0
+        HEDGE_ENABLED = True
+        latencies = []
+        for _ in range(args.calls):
+            t0 = time.perf_counter()
+            invoke_llm(chain, inputs, endpoint="bench")
+            latencies.append(time.perf_counter() - t0)
+        report("pooled client + hedge", latencies, server)
+        print(llm_stats.snapshot()["bench"])
@@ -0,0 +1,13 @@
+# LLM 관련 예외 (라우터에서 langchain 없이 import 할 수 있도록 분리)
+
+
+class LLMOutputError(Exception):
+    """LLM 응답이 JSON 형식이 아님 (일반 500 과 구분해서 502 로 응답)"""
+
+
+class LLMTimeoutError(Exception):
+    """지연 예산(budget) 안에 LLM 응답이 오지 않음"""
+
+
+class LLMUnavailableError(Exception):
+    """OpenAI 서킷 브레이커가 열려 있어 호출하지 않음 (최근 호출이 계속 실패/지연)"""
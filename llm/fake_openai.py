@@ -0,0 +1,109 @@
+# 로컬 테스트용 OpenAI 호환 서버 (/v1/chat/completions)
+# - 지연시간 주입 (기본 지연 + 일정 비율의 느린 응답) 으로 keep-alive / 타임아웃 / hedging 확인용
+# - 단독 실행 : python -m llm.fake_openai --port 8099 --latency 0.3 --slow-ratio 0.1
+#   → OPENAI_BASE_URL=http://127.0.0.1:8099/v1 OPENAI_API_KEY=fake 로 서버 실행
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import json, random, socket, threading, time
+
+SUMMARY_CONTENT = {"top_emotions": [{"행복": 4}, {"에너지": 3}, {"성취감": 3}],
+                   "emotions_summary": "전반적으로 안정적이고 긍정적인 하루였어요."}
+REVIEW_CONTENT = {"review": "지난 한 주 동안 꾸준히 마음을 돌보셨네요. 이번 주도 천천히 걸어가요."}
+
+
+class FakeOpenAIServer:
+    def __init__(self, host="127.0.0.1", port=0, latency=0.2, slow_ratio=0.0, slow_latency=2.0, seed=None):
+        self.latency = latency
+        self.slow_ratio = slow_ratio
+        self.slow_latency = slow_latency
+        self.requests = 0
+        self.connections = 0
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+        self._server = ThreadingHTTPServer((host, port), self._handler())
+        self._server.daemon_threads = True
+        self._thread = None
+
+    @property
+    def base_url(self):
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}/v1"
+
+    def _delay(self):
+        with self._lock:
+            self.requests += 1
+            slow = self._random.random() < self.slow_ratio
+        return self.slow_latency if slow else self.latency
+
+    def _handler(self):
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"  # keep-alive
+
+            def setup(self):
+                super().setup()
+                self.connection.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+                with server._lock:
+                    server.connections += 1
+
+            def log_message(self, *args):
+                pass
+
+            def do_POST(self):
+                body = json.loads(self.rfile.read(int(self.headers.get("Content-Length", 0))) or b"{}")
+                prompt = " ".join(str(m.get("content", "")) for m in body.get("messages", []))
+                time.sleep(server._delay())
+
+                content = SUMMARY_CONTENT if "top_emotions" in prompt else REVIEW_CONTENT
+                payload = json.dumps({
+                    "id": "chatcmpl-fake",
+                    "object": "chat.completion",
+                    "created": int(time.time()),
+                    "model": body.get("model", "gpt-4o-mini"),
+                    "choices": [{"index": 0, "finish_reason": "stop",
+                                 "message": {"role": "assistant",
+                                             "content": json.dumps(content, ensure_ascii=False)}}],
+                    "usage": {"prompt_tokens": len(prompt) // 2, "completion_tokens": 40,
+                              "total_tokens": len(prompt) // 2 + 40},
+                }, ensure_ascii=False).encode("utf-8")
+
+                self.send_response(200)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(payload)))
+                self.end_headers()
+                self.wfile.write(payload)
+
+        return Handler
+
+    def start(self):
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+
+if __name__ == "__main__":
+    import argparse
+    parser = argparse.ArgumentParser(description="OpenAI 호환 가짜 서버")
+    parser.add_argument("--port", type=int, default=8099)
+    parser.add_argument("--latency", type=float, default=0.2)
+    parser.add_argument("--slow-ratio", type=float, default=0.0)
+    parser.add_argument("--slow-latency", type=float, default=2.0)
+    args = parser.parse_args()
+
+    server = FakeOpenAIServer(port=args.port, latency=args.latency,
+                              slow_ratio=args.slow_ratio, slow_latency=args.slow_latency)
+    print(f"[INFO] fake OpenAI : {server.base_url}")
+    try:
+        server._server.serve_forever()
+    except KeyboardInterrupt:
+        server.stop()
@@ -0,0 +1,147 @@
+# LLM 호출 계측 (콜백 기반)
+# - 호출별 지연시간, prompt/completion 토큰, 예상 비용, 재시도, JSON 파싱 실패를 엔드포인트별로 집계
+# - /admin/metrics 의 "llm" 항목으로 노출
+from collections import deque, defaultdict
+from typing import Any, Dict, Optional
+from uuid import UUID
+from langchain_core.callbacks import BaseCallbackHandler
+from langchain_core.exceptions import OutputParserException
+from backend import metrics
+from llm.errors import LLMOutputError
+import threading, time
+
+# 1M 토큰당 USD (입력, 출력)
+MODEL_PRICES = {
+    "gpt-4o-mini": (0.15, 0.60),
+    "gpt-4o": (2.50, 10.00),
+}
+RETRY_ATTEMPTS = 3
+RETRY_TAG = "retry:attempt:"  # RunnableRetry 가 두 번째 시도부터 자식 실행에 붙이는 태그 (retry:attempt:2, ...)
+LATENCY_WINDOW = 500  # 백분위 계산에 쓰는 최근 호출 수
+
+
+def _percentile(values, q: float) -> Optional[float]:
+    if not values:
+        return None
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+
+
+class LLMStats:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._latencies = defaultdict(lambda: deque(maxlen=LATENCY_WINDOW))
+        self._totals = defaultdict(lambda: defaultdict(float))
+
+    def add(self, endpoint: str, **values):
+        with self._lock:
+            for k, v in values.items():
+                self._totals[endpoint][k] += v
+
+    def observe_latency(self, endpoint: str, seconds: float):
+        with self._lock:
+            self._latencies[endpoint].append(seconds)
+
+    def latency_count(self, endpoint: str) -> int:
+        with self._lock:
+            return len(self._latencies[endpoint])
+
+    def latency_percentile(self, endpoint: str, q: float) -> Optional[float]:
+        with self._lock:
+            return _percentile(list(self._latencies[endpoint]), q)
+
+    def snapshot(self) -> Dict[str, Any]:
+        with self._lock:
+            result = {}
+            for endpoint in set(self._totals) | set(self._latencies):
+                lat = list(self._latencies[endpoint])
+                totals = dict(self._totals[endpoint])
+                result[endpoint] = {
+                    "calls": int(totals.get("calls", 0)),
+                    "errors": int(totals.get("errors", 0)),
+                    "retries": int(totals.get("retries", 0)),
+                    "parse_failures": int(totals.get("parse_failures", 0)),
+                    "hedged": int(totals.get("hedged", 0)),
+                    "hedge_wins": int(totals.get("hedge_wins", 0)),
+                    "budget_exceeded": int(totals.get("budget_exceeded", 0)),
+                    "breaker_rejected": int(totals.get("breaker_rejected", 0)),
+                    "prompt_tokens": int(totals.get("prompt_tokens", 0)),
+                    "completion_tokens": int(totals.get("completion_tokens", 0)),
+                    "cost_usd": round(totals.get("cost_usd", 0.0), 6),
+                    "latency_ms": {
+                        "p50": None if not lat else round(_percentile(lat, 0.50) * 1000, 1),
+                        "p95": None if not lat else round(_percentile(lat, 0.95) * 1000, 1),
+                        "p99": None if not lat else round(_percentile(lat, 0.99) * 1000, 1),
+                    },
+                }
+            return result
+
+
+llm_stats = LLMStats()
+metrics.register_provider("llm", llm_stats.snapshot)
+
+
+def estimate_cost(model: str, prompt_tokens: int, completion_tokens: int) -> float:
+    price_in, price_out = MODEL_PRICES.get(model, (0.0, 0.0))
+    return (prompt_tokens * price_in + completion_tokens * price_out) / 1_000_000
+
+
+class LLMMetricsCallback(BaseCallbackHandler):
+    """LLM 호출(시도) 단위 지연시간 / 토큰 / 재시도 기록"""
+    def __init__(self, endpoint: str, model: str):
+        self.endpoint = endpoint
+        self.model = model
+        self._starts: Dict[UUID, float] = {}
+
+    def _start(self, run_id: UUID, tags):
+        self._starts[run_id] = time.perf_counter()
+        if any(tag.startswith(RETRY_TAG) for tag in tags or ()):
+            llm_stats.add(self.endpoint, retries=1)
+
+    def on_chat_model_start(self, serialized, messages, *, run_id: UUID, tags=None, **kwargs):
+        self._start(run_id, tags)
+
+    def on_llm_start(self, serialized, prompts, *, run_id: UUID, tags=None, **kwargs):
+        self._start(run_id, tags)
+
+    def on_llm_end(self, response, *, run_id: UUID, **kwargs):
+        start = self._starts.pop(run_id, None)
+        if start is not None:
+            llm_stats.observe_latency(self.endpoint, time.perf_counter() - start)
+
+        usage = (response.llm_output or {}).get("token_usage") or {}
+        prompt = usage.get("prompt_tokens", 0) or 0
+        completion = usage.get("completion_tokens", 0) or 0
+        if not usage:
+            # 스트리밍 등으로 llm_output 이 비어 있으면 메시지의 usage_metadata 사용
+            for generations in response.generations:
+                for gen in generations:
+                    meta = getattr(getattr(gen, "message", None), "usage_metadata", None) or {}
+                    prompt += meta.get("input_tokens", 0)
+                    completion += meta.get("output_tokens", 0)
+        llm_stats.add(self.endpoint, calls=1, prompt_tokens=prompt, completion_tokens=completion,
+                      cost_usd=estimate_cost(self.model, prompt, completion))
+
+    def on_llm_error(self, error, *, run_id: UUID, **kwargs):
+        self._starts.pop(run_id, None)
+        llm_stats.add(self.endpoint, calls=1, errors=1)
+
+
+def with_llm_retry(llm):
+    """일시적 오류(연결/타임아웃/429/5xx)만 재시도 → 재시도한 시도는 retry:attempt:N 태그로 콜백에서 집계"""
+    import openai
+    return llm.with_retry(
+        retry_if_exception_type=(openai.APIConnectionError, openai.APITimeoutError,
+                                 openai.RateLimitError, openai.InternalServerError),
+        stop_after_attempt=RETRY_ATTEMPTS,
+    )
+
+
+def invoke_instrumented(chain, inputs: Dict[str, Any], endpoint: str, model: str):
+    """chain.invoke + 계측. JSON 파싱 실패는 LLMOutputError 로 변환"""
+    callback = LLMMetricsCallback(endpoint, model)
+    try:
+        return chain.invoke(inputs, config={"callbacks": [callback]})
+    except OutputParserException as e:
+        llm_stats.add(endpoint, parse_failures=1)
+        raise LLMOutputError(f"LLM 응답을 JSON 으로 해석할 수 없습니다: {e}") from e
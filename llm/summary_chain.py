@@ -1,24 +1,91 @@
 import pymysql
 import json
 from langchain_core.prompts import PromptTemplate
-from langchain_openai import ChatOpenAI
 from langchain_core.output_parsers import JsonOutputParser
 import os
+from functools import lru_cache
 from dotenv import load_dotenv
+from backend.db import connect_raw
+from backend.emotion_rollups import record_summary
+from llm.client import chat_model, invoke_llm
+from llm.errors import LLMOutputError, LLMTimeoutError, LLMUnavailableError
+from llm.instrumentation import with_llm_retry
 
 load_dotenv()
 
+# 요약 지연 예산(초). 넘기면 로컬 요약을 저장하고 나중에 LLM 요약으로 교체
+SUMMARY_BUDGET_SECONDS = float(os.getenv("SUMMARY_BUDGET_SECONDS", "6"))
+
+EMOTION_LABELS = {"depression": "우울", "anxiety": "불안", "stress": "스트레스",
+                  "happiness": "행복", "achievement": "성취감", "energy": "에너지"}
+NEGATIVE = ("depression", "anxiety", "stress")
+POSITIVE = ("happiness", "achievement", "energy")
+
+# 한 번 사용당 요약
+summary_prompt = PromptTemplate.from_template("""
+Input Data:
+우울: {depression}
+불안: {anxiety}
+스트레스: {stress}
+행복: {happiness}
+성취감: {achievement}
+에너지: {energy}
+
+Instructions:
+1. 감정 top3를 점수 순으로 내림차순 정렬해서 "top_emotions"에 담아주세요.
+- 점수가 같으면 모두 포함할 수 있음 (즉, top3 이상이 될 수도 있음)
+2. 각 감정은 {{"감정명": 점수}} 형태로 작성
+- 예: [{{"우울": 3}}, {{"불안": 2}}, {{"행복": 5}}]
+3. 전체 감정의 흐름을 자연어로 요약해서 "emotions_summary"에 한 줄(50자 이내)로 담아주세요.
+4. 우울, 불안, 스트레스는 부정적 감정으로 점수가 높을 수록 부정적이고, 행복, 에너지, 성취감은 긍정적 감정으로 점수가 높을 수록 긍정적인 상태
+5. JSON 형식을 정확히 지켜주세요.
+
+Return JSON in this exact format:
+{{
+"top_emotions": [],
+"emotions_summary": ""
+}}
+""")
+
+@lru_cache(maxsize=None)
+def get_summary_chain():
+    """요약 체인 (처음 호출할 때 한 번만 생성 → import 만으로는 ChatOpenAI 를 만들지 않음)"""
+    return summary_prompt | with_llm_retry(chat_model()) | JsonOutputParser()
+
+
+def _josa(word: str, batchim: str, no_batchim: str) -> str:
+    """마지막 글자 받침 유무로 조사 선택 (행복이 / 에너지가)"""
+    last = word[-1]
+    has_batchim = "가" <= last <= "힣" and (ord(last) - ord("가")) % 28 != 0
+    return word + (batchim if has_batchim else no_batchim)
+
+
+def local_summary(use: dict) -> dict:
+    """LLM 없이 여섯 점수만으로 만드는 요약 (같은 입력이면 항상 같은 결과)
+    - top_emotions : 점수 내림차순 top3 (3위와 동점이면 모두 포함), 동점은 EMOTION_LABELS 순서
+    - emotions_summary : 긍정/부정 평균 차이로 고른 템플릿 문장"""
+    scores = [(key, int(use[key] or 0)) for key in EMOTION_LABELS]
+    ranked = sorted(scores, key=lambda kv: -kv[1])  # 안정 정렬 → 동점은 라벨 순서 유지
+    cutoff = ranked[min(2, len(ranked) - 1)][1]
+    top = [{EMOTION_LABELS[k]: v} for k, v in ranked if v >= cutoff]
+
+    positive = sum(int(use[k] or 0) for k in POSITIVE) / len(POSITIVE)
+    negative = sum(int(use[k] or 0) for k in NEGATIVE) / len(NEGATIVE)
+    first = EMOTION_LABELS[ranked[0][0]]
+    if positive - negative >= 1:
+        text = f"{_josa(first, '이', '가')} 돋보이는 긍정적인 하루였어요."
+    elif negative - positive >= 1:
+        text = f"{_josa(first, '이', '가')} 크게 느껴진, 조금 지친 하루였어요."
+    else:
+        text = f"{_josa(first, '을', '를')} 중심으로 감정이 고르게 섞인 하루였어요."
+    return {"top_emotions": top, "emotions_summary": text}
+
+
+
 def summary(nickname: str):
     
     # DB연결
-    conn = pymysql.connect(
-        host=os.getenv("DB_HOST"),
-        port=int(os.getenv("DB_PORT")),
-        user=os.getenv("DB_USER"),
-        password=os.getenv("DB_PASSWORD"),
-        db=os.getenv("DB_NAME"),
-        charset=os.getenv("DB_CHARSET", "utf8mb4")
-    )
+    conn = connect_raw()
 
     # 서비스 이용하면 이용 기록 바로 가져오기
     cur = conn.cursor(pymysql.cursors.DictCursor)
@@ -38,35 +105,14 @@ def summary(nickname: str):
     """, (nickname, )) 
     use = cur.fetchone()
     
-    # 한 번 사용당 요약
-    summary_prompt = PromptTemplate.from_template("""
-    Input Data:
-    우울: {depression}
-    불안: {anxiety}
-    스트레스: {stress}
-    행복: {happiness}
-    성취감: {achievement}
-    에너지: {energy}
-
-    Instructions:
-    1. 감정 top3를 점수 순으로 내림차순 정렬해서 "top_emotions"에 담아주세요.
-    - 점수가 같으면 모두 포함할 수 있음 (즉, top3 이상이 될 수도 있음)
-    2. 각 감정은 {{"감정명": 점수}} 형태로 작성
-    - 예: [{{"우울": 3}}, {{"불안": 2}}, {{"행복": 5}}]
-    3. 전체 감정의 흐름을 자연어로 요약해서 "emotions_summary"에 한 줄(50자 이내)로 담아주세요.
-    4. 우울, 불안, 스트레스는 부정적 감정으로 점수가 높을 수록 부정적이고, 행복, 에너지, 성취감은 긍정적 감정으로 점수가 높을 수록 긍정적인 상태
-    5. JSON 형식을 정확히 지켜주세요.
-
-    Return JSON in this exact format:
-    {{
-    "top_emotions": [],
-    "emotions_summary": ""
-    }}
-    """)
-
-    summary_chain = summary_prompt | ChatOpenAI(model="gpt-4o-mini") | JsonOutputParser()
-
-    summary = summary_chain.invoke(use)
+    # 예산 안에 응답이 없거나 JSON 이 깨지거나 OpenAI 브레이커가 열려 있으면 로컬 요약 저장 + 업그레이드 표시
+    needs_upgrade = 0
+    try:
+        summary = invoke_llm(get_summary_chain(), use, endpoint="generate_summary", budget=SUMMARY_BUDGET_SECONDS)
+    except (LLMTimeoutError, LLMOutputError, LLMUnavailableError) as e:
+        print(f"[WARN] 로컬 요약으로 대체 ({nickname}): {e}")
+        summary = local_summary(use)
+        needs_upgrade = 1
     print(summary)
 
     recommand_parks = [use['park_1'], use['park_2'], use['park_3']]
@@ -75,8 +121,8 @@ def summary(nickname: str):
     with conn.cursor() as cur:
         sql = """
         INSERT INTO tb_users_summary
-        (nickname, Create_date, TopEmotions, EmotionsSummary, RecommandCates, RecommandParks)
-        VALUES (%s, %s, %s, %s, %s, %s)
+        (nickname, Create_date, TopEmotions, EmotionsSummary, RecommandCates, RecommandParks, NeedsUpgrade)
+        VALUES (%s, %s, %s, %s, %s, %s, %s)
         """
         cur.execute(sql, (
             nickname,
@@ -84,10 +130,16 @@ def summary(nickname: str):
             json.dumps(summary['top_emotions'], ensure_ascii=False),
             summary['emotions_summary'],
             json.dumps(recommand_cates, ensure_ascii=False),
-            json.dumps(recommand_parks, ensure_ascii=False)
+            json.dumps(recommand_parks, ensure_ascii=False),
+            needs_upgrade
         ))
+        # 주간 롤업(요약 횟수, 추천 녹지 유형/공원 횟수) 같은 트랜잭션에서 갱신
+        record_summary(cur, nickname, use['create_date'], recommand_cates, recommand_parks)
 
     conn.commit()
     conn.close()
+    if needs_upgrade:
+        from llm.summary_upgrade import summary_upgrader
+        summary_upgrader.start()
     print('요약 끝!')
     return summary
\ No newline at end of file
@@ -0,0 +1,152 @@
+# 로컬 요약(NeedsUpgrade = 1) → LLM 요약 교체 작업
+# - summary() 가 로컬 요약을 저장하면 백그라운드 스레드가 시작되어 주기적으로 교체
+# - 서버 시작 시 남은 기록(재시작 전 미처리)이 있으면 바로 시작, 수동 실행도 가능
+# - 교체 실패(형식 오류)한 기록은 UpgradeNextAt 까지 건너뜀 (UPGRADE_RETRY_SECONDS x 2^실패횟수),
+#   UPGRADE_MAX_ATTEMPTS 번 실패하면 더 시도하지 않고 로컬 요약 유지 (V006)
+#   python -m llm.summary_upgrade          : 남은 기록 한 번 교체
+import pymysql
+import json
+import os
+import threading
+from backend.db import connect_raw
+from llm.errors import LLMOutputError, LLMUnavailableError
+
+UPGRADE_INTERVAL = float(os.getenv("SUMMARY_UPGRADE_INTERVAL", "60"))
+UPGRADE_BATCH = 20
+UPGRADE_MAX_ATTEMPTS = 5
+UPGRADE_RETRY_SECONDS = 300  # 첫 실패 후 다시 시도까지 (실패할 때마다 2배)
+
+PENDING_SQL = """
+    SELECT s.nickname, s.Create_date AS create_date, s.UpgradeAttempts AS upgrade_attempts,
+        e.depression, e.anxiety, e.stress, e.happiness, e.achievement, e.energy
+    FROM tb_users_summary s
+    JOIN tb_users_emotions e ON e.nickname = s.nickname AND e.create_date = s.Create_date
+    WHERE s.NeedsUpgrade = 1 AND s.UpgradeAttempts < %s
+      AND (s.UpgradeNextAt IS NULL OR s.UpgradeNextAt <= NOW())
+    ORDER BY s.Create_date
+    LIMIT %s
+"""
+
+UPDATE_SQL = """
+    UPDATE tb_users_summary
+    SET TopEmotions = %s, EmotionsSummary = %s, NeedsUpgrade = 0
+    WHERE nickname = %s AND Create_date = %s AND NeedsUpgrade = 1
+"""
+
+FAILED_SQL = """
+    UPDATE tb_users_summary
+    SET UpgradeAttempts = UpgradeAttempts + 1,
+        UpgradeNextAt = NOW() + INTERVAL %s SECOND
+    WHERE nickname = %s AND Create_date = %s
+"""
+
+PENDING_COUNT_SQL = """
+    SELECT COUNT(*) AS n FROM tb_users_summary
+    WHERE NeedsUpgrade = 1 AND UpgradeAttempts < %s
+"""
+
+
+def pending_count() -> int:
+    conn = connect_raw()
+    try:
+        with conn.cursor(pymysql.cursors.DictCursor) as cur:
+            cur.execute(PENDING_COUNT_SQL, (UPGRADE_MAX_ATTEMPTS,))
+            return cur.fetchone()["n"]
+    finally:
+        conn.close()
+
+
+def upgrade_pending(limit: int = UPGRADE_BATCH) -> dict:
+    """교체 대상 기록을 LLM 요약으로 덮어씀 (예산 없이 호출)
+    반환: {"fetched": 가져온 건수, "upgraded": 교체, "failed": 실패 → 나중에 다시,
+           "more": 바로 다음 배치를 돌릴지 (배치가 꽉 찼고 이번 배치에서 처리한 기록이 있을 때만)}"""
+    # langchain 은 무거워서 실제로 교체할 때 import (서버 시작 시 이 모듈을 import 해도 불러오지 않음)
+    from llm.client import invoke_llm
+    from llm.summary_chain import get_summary_chain
+    conn = connect_raw()
+    upgraded = failed = 0
+    try:
+        with conn.cursor(pymysql.cursors.DictCursor) as cur:
+            cur.execute(PENDING_SQL, (UPGRADE_MAX_ATTEMPTS, limit))
+            rows = cur.fetchall()
+
+        for row in rows:
+            try:
+                result = invoke_llm(get_summary_chain(), row, endpoint="summary_upgrade")
+                values = (json.dumps(result['top_emotions'], ensure_ascii=False), result['emotions_summary'])
+            except (LLMOutputError, KeyError, TypeError) as e:
+                # 실패 횟수 기록 → UpgradeNextAt 까지 건너뜀 (다음 배치에서 뒤의 기록이 먼저 처리됨)
+                with conn.cursor() as cur:
+                    cur.execute(FAILED_SQL, (
+                        UPGRADE_RETRY_SECONDS * 2 ** row['upgrade_attempts'], row['nickname'], row['create_date']))
+                conn.commit()
+                failed += 1
+                print(f"[WARN] 요약 교체 실패 ({row['nickname']}, {row['create_date']}, "
+                      f"{row['upgrade_attempts'] + 1}/{UPGRADE_MAX_ATTEMPTS}회): {e}")
+                continue
+            except LLMUnavailableError:
+                break  # OpenAI 브레이커 open → 남은 기록은 다음 주기에 (NeedsUpgrade 그대로)
+            with conn.cursor() as cur:
+                cur.execute(UPDATE_SQL, (*values, row['nickname'], row['create_date']))
+            conn.commit()
+            upgraded += 1
+    finally:
+        conn.close()
+    # 브레이커 open 으로 하나도 처리 못 했으면 같은 기록을 다시 가져오게 되므로 다음 주기까지 쉼
+    more = len(rows) >= limit and upgraded + failed > 0
+    return {"fetched": len(rows), "upgraded": upgraded, "failed": failed, "more": more}
+
+
+class SummaryUpgrader:
+    def __init__(self, interval: float = UPGRADE_INTERVAL):
+        self.interval = interval
+        self._thread = None
+        self._wake = threading.Event()
+        self._lock = threading.Lock()
+
+    def start(self):
+        """이미 돌고 있으면 바로 한 번 더 돌도록 깨우기만 함"""
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._run, name="summary-upgrade", daemon=True)
+                self._thread.start()
+        self._wake.set()
+
+    def start_if_pending(self):
+        """서버 시작 시 호출 : 남은 교체 대상이 있으면 시작 (확인은 백그라운드에서 - 시작을 늦추지 않음)"""
+        threading.Thread(target=self._start_if_pending, name="summary-upgrade-check", daemon=True).start()
+
+    def _start_if_pending(self):
+        try:
+            pending = pending_count()
+        except Exception as e:
+            print(f"[WARN] 요약 교체 대상 확인 실패: {e}")
+            return
+        if pending:
+            print(f"[INFO] 요약 교체 대상 {pending}건 → 교체 작업 시작")
+            self.start()
+
+    def _run(self):
+        while True:
+            self._wake.wait(self.interval)
+            self._wake.clear()
+            try:
+                # 한 배치가 꽉 차면 남은 게 더 있을 수 있으므로 바로 다음 배치 (처리한 기록이 없으면 다음 주기에)
+                while upgrade_pending()["more"]:
+                    pass
+            except Exception as e:
+                print(f"[WARN] 요약 교체 작업 실패: {e}")
+
+
+summary_upgrader = SummaryUpgrader()
+
+
+if __name__ == "__main__":
+    upgraded = failed = 0
+    while True:
+        result = upgrade_pending()
+        upgraded += result["upgraded"]
+        failed += result["failed"]
+        if not result["more"]:
+            break
+    print(f"[INFO] 요약 교체 : {upgraded}건, 실패 {failed}건")
@@ -1,14 +1,63 @@
 import pymysql
 import datetime
 from langchain_core.prompts import PromptTemplate
-from langchain_openai import ChatOpenAI
 from langchain_core.output_parsers import JsonOutputParser
 import os
 import pytz
+from functools import lru_cache
 from dotenv import load_dotenv
+from backend.db import connect_raw
+from backend.emotion_rollups import EMOTIONS, weekly_rollup, weekly_from_source
+from llm.client import chat_model, invoke_llm
+from llm.errors import LLMOutputError, LLMUnavailableError
+from llm.instrumentation import with_llm_retry
 
 load_dotenv()
 
+EMOTION_LABELS = {"depression": "우울", "anxiety": "불안", "stress": "스트레스",
+                  "happiness": "행복", "achievement": "성취감", "energy": "에너지"}
+
+# 지난주 총평이 이미 있는지 (지난주 총평은 이번주에 생성됨)
+EXISTING_REVIEW_SQL = """
+    SELECT review
+    FROM tb_weekly_review
+    WHERE nickname = %s
+    AND create_date > %s
+    LIMIT 1
+"""
+
+# 주간 총평 프롬프트 / 체인 (체인은 처음 호출할 때 한 번만 생성)
+overall_prompt = PromptTemplate.from_template("""
+# Guidelines
+- Use only the information provided.
+- Do not make up information.
+- Do not exaggerate.
+
+당신은 따뜻한 위로의 말을 전해주는 상담사입니다. 
+아래는 한 사용자의 한 주 동안 서비스 이용 결과야. 
+데이터 그대로 말하지 말고, 약간의 관찰과 해석, 따뜻한 격려를 담아서 총평을 작성해줘. 
+말투는 사무적이지 않고 자연스럽게, 상담사가 말하듯 부드럽게 작성해.
+**"사용자"라는 단어는 사용하지 마세요. 대신 UserNickname님이라고 한 번만 언급하세요.**
+
+총평은 5줄 내외, 자연스러운 완전 문장으로 작성해주세요.
+
+Inputs
+UserNickname: {nickname}
+기간: {period}
+감정 체크인 횟수: {checkins}
+감정 점수 (1~5점, 평균 / 최소~최대, 우울·불안·스트레스는 높을수록 부정적): {emotions}
+자주 추천된 녹지 유형: {categories}
+자주 추천된 공원: {parks}
+
+Return in JSON format:
+"review": ""
+""")
+
+@lru_cache(maxsize=None)
+def get_overall_chain():
+    """주간 총평 체인 (import 만으로는 ChatOpenAI 를 만들지 않음)"""
+    return overall_prompt | with_llm_retry(chat_model(temperature=0.5)) | JsonOutputParser()
+
 
 # 전 주 날짜 가져오기(datetime 맞춰서 시간까지 가져오기)
 # 파이썬 일주일은 월요일이 한 주의 시작
@@ -33,14 +82,7 @@ def get_last_week_range():
 
 def weekly_review(nickname:str):
     # DB연결
-    conn = pymysql.connect(
-        host=os.getenv("DB_HOST"),
-        port=int(os.getenv("DB_PORT")),
-        user=os.getenv("DB_USER"),
-        password=os.getenv("DB_PASSWORD"),
-        db=os.getenv("DB_NAME"),
-        charset=os.getenv("DB_CHARSET", "utf8mb4")
-    )
+    conn = connect_raw()
 
     try:
         start_of_last_week, end_of_last_week = get_last_week_range()
@@ -48,71 +90,39 @@ def weekly_review(nickname:str):
         
         # 1️⃣ 지난주 총평이 이미 있는지 확인 (지난주 총평은 이번주에 생성됨)
         with conn.cursor(pymysql.cursors.DictCursor) as cur:
-            cur.execute("""
-                SELECT review
-                FROM tb_weekly_review
-                WHERE nickname = %s
-                AND create_date > %s
-                LIMIT 1
-            """, (nickname, end_of_last_week))  # end_of_last_week = 지난주 일요일 23:59:59
+            cur.execute(EXISTING_REVIEW_SQL, (nickname, end_of_last_week))  # end_of_last_week = 지난주 일요일 23:59:59
             existing = cur.fetchone()
             
             if existing:
                 return existing['review'] # 이미 있으면 기존 총평 바로 반환
 
-        # 2️⃣ 지난주 요약본 가져오기
+        # 2️⃣ 지난주 롤업 한 행 가져오기 (체크인/요약 저장 시 증분 갱신됨)
+        #    롤업이 꺼졌거나(테이블 없음) 아직 없으면(--rebuild 전) 원본 행에서 집계
         with conn.cursor(pymysql.cursors.DictCursor) as cur:
-            cur.execute("""
-                SELECT Create_date, TopEmotions, EmotionsSummary, RecommandCates, RecommandParks
-                FROM tb_users_summary
-                WHERE nickname = %s
-                AND Create_date BETWEEN %s AND %s
-                ORDER BY Create_date ASC
-            """, (nickname, start_of_last_week, end_of_last_week))
-            week_list = cur.fetchall()
-
-        if len(week_list) < 3:
+            rollup = weekly_rollup(cur, nickname, start_of_last_week.date())
+            if rollup is None:
+                rollup = weekly_from_source(cur, nickname, start_of_last_week, end_of_last_week)
+
+        if not rollup or rollup['summaries'] < 3:
             return '요약할 데이터가 충분하지 않습니다.'
 
-        # 3️⃣ LLM용 입력 텍스트 생성
-        contents = "\n\n".join(
-            [
-                f"Record {i+1} ({day['Create_date'].strftime('%m/%d %H:%M')})\n"
-                f"감정_top3: {day['TopEmotions']}\n"
-                f"감정_요약: {day['EmotionsSummary']}\n"
-                f"추천_카테고리: {day['RecommandCates']}\n"
-                f"추천_공원: {day['RecommandParks']}"
-                for i, day in enumerate(week_list)
-            ]
+        # 3️⃣ LLM용 구조화 입력 생성
+        emotions = ", ".join(
+            f"{EMOTION_LABELS[e]} {stat['mean']} ({stat['min']}~{stat['max']})"
+            for e in EMOTIONS
+            if (stat := rollup['emotions'][e])['mean'] is not None
         )
-
-        weekly_text = {'nickname': nickname, 'conctents': contents}
+        weekly_text = {
+            'nickname': nickname,
+            'period': f"{start_of_last_week:%m/%d} ~ {end_of_last_week:%m/%d}",
+            'checkins': rollup['checkins'],
+            'emotions': emotions or '기록 없음',
+            'categories': ", ".join(f"{c['item']}({c['count']}회)" for c in rollup['categories']) or '없음',
+            'parks': ", ".join(f"{p['item']}({p['count']}회)" for p in rollup['parks']) or '없음',
+        }
 
         # 4️⃣ LLM 총평 생성
-        overall_prompt = PromptTemplate.from_template("""
-        # Guidelines
-        - Use only the information provided.
-        - Do not make up information.
-        - Do not exaggerate.
-
-        당신은 따뜻한 위로의 말을 전해주는 상담사입니다. 
-        아래는 한 사용자의 한 주 동안 서비스 이용 결과야. 
-        데이터 그대로 말하지 말고, 약간의 관찰과 해석, 따뜻한 격려를 담아서 총평을 작성해줘. 
-        말투는 사무적이지 않고 자연스럽게, 상담사가 말하듯 부드럽게 작성해.
-        **"사용자"라는 단어는 사용하지 마세요. 대신 UserNickname님이라고 한 번만 언급하세요.**
-
-        총평은 5줄 내외, 자연스러운 완전 문장으로 작성해주세요.
-
-        Inputs
-        UserNickname: {nickname}
-        주간 데이터: {conctents}
-
-        Return in JSON format:
-        "review": ""
-        """)
-
-        overall_chain = overall_prompt | ChatOpenAI(model="gpt-4o-mini", temperature=0.5) | JsonOutputParser()
-        weekly_review = overall_chain.invoke(weekly_text)
+        weekly_review = invoke_llm(get_overall_chain(), weekly_text, endpoint="generate_weekly_review")
         
         # 5️⃣ 결과 저장 (주간 총평 1회만)
         with conn.cursor() as cur:
@@ -126,6 +136,8 @@ def weekly_review(nickname:str):
 
         return weekly_review['review']
     
+    except (LLMOutputError, LLMUnavailableError):
+        raise  # 응답 형식 오류(502) / OpenAI 장애 중(503)은 라우터에서 구분
     except Exception as e:
         print(f"[ERROR] weekly_review() failed for {nickname}: {str(e)}")
         return f"에러가 발생했습니다: {str(e)}"
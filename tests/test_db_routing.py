@@ -0,0 +1,70 @@
+# python -m pytest tests/test_db_routing.py
+# replica 읽기 라우팅 + read-your-writes (backend/db.py) - 실제 DB 없이 엔진/연결만 바꿔서 확인
+import time
+import pytest
+
+from backend import db
+
+
+@pytest.fixture
+def replica(monkeypatch):
+    """replica 가 설정되어 있고 복제 지연 0초인 상태"""
+    replica_engine = object()
+    monkeypatch.setattr(db, "read_engine", replica_engine)
+    monkeypatch.setattr(db, "DB_READ_HOST", "replica.test")
+    monkeypatch.setattr(db, "_recent_writes", {})
+    monkeypatch.setattr(db, "_lag", {"value": 0.0, "checked": time.time() + 3600})  # 지연 확인 생략
+    yield replica_engine
+
+
+def _nickname(request) -> str:
+    return f"routing-{request.node.name}"  # 공용 캐시(_shared_writes) 키가 테스트끼리 섞이지 않도록
+
+
+def test_reads_go_to_replica(replica, request):
+    assert db.get_read_engine(_nickname(request)) is replica
+    assert db.get_read_engine() is replica
+
+
+def test_write_sticks_user_to_primary(replica, request):
+    nickname = _nickname(request)
+    db.mark_write(nickname)
+    assert db.get_read_engine(nickname) is db.engine
+    assert db.get_read_engine("someone-else") is replica  # 다른 사용자는 그대로 replica
+
+
+def test_stickiness_expires(replica, request):
+    nickname = _nickname(request)
+    db._recent_writes[nickname] = time.time() - db.READ_YOUR_WRITES_SECONDS - 1
+    assert db.get_read_engine(nickname) is replica
+
+
+def test_write_from_other_worker_is_seen(replica, request):
+    """이 워커에는 기록이 없고 다른 워커가 공용 캐시에 남긴 쓰기만 있는 경우"""
+    nickname = _nickname(request)
+    db._shared_writes.set(nickname, time.time())
+    assert db.get_read_engine(nickname) is db.engine
+
+
+def test_expired_local_write_does_not_hide_newer_shared_write(replica, request):
+    nickname = _nickname(request)
+    db._recent_writes[nickname] = time.time() - db.READ_YOUR_WRITES_SECONDS - 1
+    db._shared_writes.set(nickname, time.time())
+    assert db.get_read_engine(nickname) is db.engine
+
+
+@pytest.mark.parametrize("lag", [db.REPLICA_MAX_LAG + 1, None])
+def test_lagging_or_broken_replica_falls_back_to_primary(replica, monkeypatch, request, lag):
+    monkeypatch.setattr(db, "_lag", {"value": lag, "checked": time.time() + 3600})
+    assert db.get_read_engine(_nickname(request)) is db.engine
+
+
+def test_connect_raw_routes_read_only(replica, monkeypatch, request):
+    hosts = []
+    monkeypatch.setattr(db, "InstrumentedConnection", lambda **params: hosts.append(params["host"]))
+    nickname = _nickname(request)
+    db.connect_raw(read_only=True, nickname=nickname)
+    db.connect_raw()
+    db.mark_write(nickname)
+    db.connect_raw(read_only=True, nickname=nickname)
+    assert hosts == ["replica.test", db.DB_HOST, db.DB_HOST]
@@ -0,0 +1,69 @@
+# python -m pytest tests/test_emotion_trends.py
+# 감정 추세 집계 (backend/emotion_rollups.py emotion_trends) - 일간 롤업 행 → 일/주/월 평균 + 이동평균
+from datetime import date
+
+from backend.emotion_rollups import EMOTIONS, emotion_trends
+
+
+def _row(day: date, values):
+    """한 날짜의 일간 롤업 행 (모든 감정에 같은 값들)"""
+    row = {"day": day, "checkins": len(values)}
+    for e in EMOTIONS:
+        row[f"{e}_sum"], row[f"{e}_min"], row[f"{e}_max"] = sum(values), min(values), max(values)
+    return row
+
+
+def _mean(value):
+    return dict.fromkeys(EMOTIONS, value)
+
+
+ROWS = [
+    _row(date(2025, 1, 22), [1]),     # 요청 기간 앞 (이동평균 앞부분에만 사용)
+    _row(date(2025, 1, 30), [2, 4]),  # 목
+    _row(date(2025, 2, 3), [5]),      # 월
+    _row(date(2025, 2, 9), [1]),      # 일
+]
+START, END = date(2025, 1, 27), date(2025, 2, 9)
+
+
+def test_daily_only_days_with_checkins_in_range():
+    trends = emotion_trends(ROWS, START, END, windows=(7,))
+    assert trends["from"] == "2025-01-27" and trends["to"] == "2025-02-09"
+    assert trends["checkins"] == 4
+    assert trends["daily"] == [
+        {"date": "2025-01-30", "checkins": 2, "mean": _mean(3.0)},
+        {"date": "2025-02-03", "checkins": 1, "mean": _mean(5.0)},
+        {"date": "2025-02-09", "checkins": 1, "mean": _mean(1.0)},
+    ]
+
+
+def test_weeks_start_on_monday():
+    weekly = emotion_trends(ROWS, START, END, windows=(7,))["weekly"]
+    assert [w["week_start"] for w in weekly] == ["2025-01-27", "2025-02-03"]
+    assert [w["checkins"] for w in weekly] == [2, 2]
+    # 주 평균은 체크인 가중 (일 평균의 평균 아님) / 최소·최대는 주 전체
+    assert weekly[1]["mean"] == _mean(3.0)
+    assert weekly[1]["min"] == dict.fromkeys(EMOTIONS, 1) and weekly[1]["max"] == dict.fromkeys(EMOTIONS, 5)
+
+
+def test_months_split_at_month_boundary():
+    monthly = emotion_trends(ROWS, START, END, windows=(7,))["monthly"]
+    assert [(m["month"], m["checkins"]) for m in monthly] == [("2025-01", 2), ("2025-02", 2)]
+    assert monthly[0]["min"] == dict.fromkeys(EMOTIONS, 2) and monthly[0]["max"] == dict.fromkeys(EMOTIONS, 4)
+
+
+def test_rolling_mean_is_checkin_weighted_and_uses_lead_days():
+    rolling = {r["date"]: r["mean"] for r in emotion_trends(ROWS, START, END, windows=(7,))["rolling"]["7"]}
+    assert rolling["2025-01-27"] == _mean(1.0)   # 1/22 ~ 1/27 : 요청 기간 앞의 행
+    assert "2025-01-29" not in rolling           # 1/23 ~ 1/29 : 체크인 없음
+    assert rolling["2025-02-03"] == _mean(3.67)  # (2 + 4 + 5) / 3
+    assert rolling["2025-02-06"] == _mean(5.0)   # 1/31 ~ 2/6
+    assert rolling["2025-02-09"] == _mean(3.0)   # (5 + 1) / 2
+
+
+def test_rows_as_strings_and_empty_period():
+    rows = [{**r, "day": str(r["day"])} for r in ROWS]
+    assert emotion_trends(rows, START, END, windows=(7,))["checkins"] == 4
+    empty = emotion_trends([], START, END)
+    assert empty["checkins"] == 0 and empty["daily"] == empty["weekly"] == empty["monthly"] == []
+    assert empty["rolling"] == {"7": [], "30": []}
@@ -0,0 +1,89 @@
+# python -m pytest tests/test_llm_client.py
+# 재사용 LLM 클라이언트 (llm/client.py) - 가짜 OpenAI 서버(llm/fake_openai.py) 상대로 keep-alive / 타임아웃 / hedge / 예산 확인
+import time
+import pytest
+from langchain_core.output_parsers import JsonOutputParser
+
+from llm import client
+from llm.errors import LLMTimeoutError
+from llm.fake_openai import FakeOpenAIServer, SUMMARY_CONTENT
+from llm.instrumentation import llm_stats
+from llm.summary_chain import summary_prompt
+
+INPUTS = {k: 3 for k in ("depression", "anxiety", "stress", "happiness", "achievement", "energy")}
+
+
+class FirstSlowServer(FakeOpenAIServer):
+    """첫 요청만 느리고 나머지는 빠름 (hedge 확인용)"""
+    def _delay(self):
+        with self._lock:
+            self.requests += 1
+            first = self.requests == 1
+        return self.slow_latency if first else self.latency
+
+
+def _use_server(monkeypatch, server):
+    """chat_model() 은 캐시되므로 서버마다 새 클라이언트"""
+    monkeypatch.setenv("OPENAI_API_KEY", "fake")
+    monkeypatch.setenv("OPENAI_BASE_URL", server.base_url)
+    monkeypatch.setattr(client, "_http_client", None)
+    client.chat_model.cache_clear()
+    server._server.handle_error = lambda *args: None  # 타임아웃/hedge 로 끊긴 연결의 BrokenPipe 출력 생략
+
+
+def _chain():
+    return summary_prompt | client.chat_model() | JsonOutputParser()
+
+
+@pytest.fixture(autouse=True)
+def fresh_client():
+    yield
+    if client._http_client is not None:
+        client._http_client.close()
+    client._http_client = None
+    client.chat_model.cache_clear()
+
+
+def test_pooled_client_reuses_one_connection(monkeypatch):
+    with FakeOpenAIServer(latency=0.01) as server:
+        _use_server(monkeypatch, server)
+        chain = _chain()
+        results = [client.invoke_llm(chain, INPUTS, endpoint="test_client_pool") for _ in range(5)]
+    assert results == [SUMMARY_CONTENT] * 5
+    assert server.requests == 5
+    assert server.connections == 1
+    assert llm_stats.snapshot()["test_client_pool"]["calls"] == 5
+
+
+def test_read_timeout(monkeypatch):
+    monkeypatch.setattr(client, "READ_TIMEOUT", 0.2)
+    with FakeOpenAIServer(latency=2.0) as server:
+        _use_server(monkeypatch, server)
+        t0 = time.perf_counter()
+        with pytest.raises(Exception):
+            client.invoke_llm(_chain(), INPUTS, endpoint="test_client_timeout")
+        assert time.perf_counter() - t0 < 1.5
+
+
+def test_hedge_returns_faster_second_attempt(monkeypatch):
+    monkeypatch.setattr(client, "HEDGE_ENABLED", True)
+    monkeypatch.setattr(client, "HEDGE_AFTER_MS", 100)
+    with FirstSlowServer(latency=0.01, slow_latency=1.5) as server:
+        _use_server(monkeypatch, server)
+        t0 = time.perf_counter()
+        result = client.invoke_llm(_chain(), INPUTS, endpoint="test_client_hedge")
+        elapsed = time.perf_counter() - t0
+    assert result == SUMMARY_CONTENT
+    assert elapsed < 1.0
+    stats = llm_stats.snapshot()["test_client_hedge"]
+    assert stats["hedged"] == 1 and stats["hedge_wins"] == 1
+
+
+def test_budget_exceeded(monkeypatch):
+    with FakeOpenAIServer(latency=1.0) as server:
+        _use_server(monkeypatch, server)
+        t0 = time.perf_counter()
+        with pytest.raises(LLMTimeoutError):
+            client.invoke_llm(_chain(), INPUTS, endpoint="test_client_budget", budget=0.1)
+        assert time.perf_counter() - t0 < 0.5
+    assert llm_stats.snapshot()["test_client_budget"]["budget_exceeded"] == 1
@@ -0,0 +1,34 @@
+# python -m pytest tests/test_llm_instrumentation.py
+import httpx
+import openai
+from langchain_core.language_models.fake_chat_models import FakeListChatModel
+
+from llm.instrumentation import invoke_instrumented, llm_stats, with_llm_retry
+
+
+class FlakyChatModel(FakeListChatModel):
+    """처음 failures 번은 연결 오류, 그다음부터 정상 응답"""
+    failures: int = 0
+    calls: int = 0
+
+    def _call(self, *args, **kwargs):
+        self.calls += 1
+        if self.calls <= self.failures:
+            raise openai.APIConnectionError(request=httpx.Request("POST", "http://llm.test/v1/chat/completions"))
+        return super()._call(*args, **kwargs)
+
+
+def test_retries_are_counted():
+    model = FlakyChatModel(responses=['{"ok": true}'], failures=2)
+    result = invoke_instrumented(with_llm_retry(model), "hi", "test_retry", "gpt-4o-mini")
+    assert result.content == '{"ok": true}'
+    stats = llm_stats.snapshot()["test_retry"]
+    assert stats["retries"] == 2
+    assert stats["errors"] == 2
+    assert stats["calls"] == 3
+
+
+def test_no_retry_no_count():
+    model = FlakyChatModel(responses=["ok"])
+    invoke_instrumented(with_llm_retry(model), "hi", "test_no_retry", "gpt-4o-mini")
+    assert llm_stats.snapshot()["test_no_retry"]["retries"] == 0
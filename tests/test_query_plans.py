@@ -0,0 +1,103 @@
+# python -m pytest tests/test_query_plans.py
+# 주요 쿼리 실행 계획 회귀 테스트 (backend/migrate.py check_plans)
+# - 앱 기본 스키마가 있는 테스트용 MySQL/MariaDB 를 TEST_DATABASE_URL 로 지정할 때만 실행 (없으면 skip)
+#   예) TEST_DATABASE_URL=mysql+pymysql://user:pw@127.0.0.1:3306/sesac_test python -m pytest tests/test_query_plans.py
+# - 미적용 마이그레이션 적용 → plan_check 사용자 + 다른 사용자 행 채움 → check_plans() 가 문제 없어야 통과 → 채운 행 삭제
+#   (빈 테이블은 옵티마이저가 계획을 건너뛰어 회귀를 잡지 못하므로 여러 사용자 행을 넣음)
+from datetime import date, datetime, timedelta
+import os
+import pytest
+from sqlalchemy import create_engine, text
+
+TEST_DATABASE_URL = os.getenv("TEST_DATABASE_URL")
+pytestmark = pytest.mark.skipif(not TEST_DATABASE_URL, reason="TEST_DATABASE_URL 미설정 (테스트용 DB 없음)")
+
+USERS = ["plan_check"] + [f"plan_check_{i}" for i in range(200)]
+ROWS_PER_USER = 5
+EMOTIONS = ("depression", "anxiety", "stress", "happiness", "achievement", "energy")
+SEEDED_TABLES = ("tb_users_emotions", "tb_users_category_recommend", "tb_users_parks_recommend",
+                 "tb_weekly_review", "tb_parks_visit_log", "tb_users_parks_status",
+                 "tb_users_weekly_items", "tb_users_emotion_daily")
+
+
+def _seed(conn, park_ids):
+    start = datetime(2025, 1, 6, 9)
+    emotions, categories, parks, reviews, visits, daily = [], [], [], [], [], []
+    for u, nickname in enumerate(USERS):
+        for i in range(ROWS_PER_USER):
+            when = start + timedelta(days=i, minutes=u)
+            emotions.append({"nickname": nickname, "create_date": when, **{e: (u + i) % 5 + 1 for e in EMOTIONS},
+                             "latitude": 37.5, "longitude": 127.0})
+            categories.append({"nickname": nickname, "create_date": when, "c1": "숲", "c2": "수변", "c3": None})
+            parks.append({"nickname": nickname, "create_date": when,
+                          **{f"p{k}": f"공원{(u + k) % 50}" for k in range(1, 7)}})
+            visits.append({"nickname": nickname, "park_id": park_ids[(u + i) % len(park_ids)], "create_date": when})
+            daily.append({"nickname": nickname, "day": when.date(), "checkins": 1})
+        reviews.append({"nickname": nickname, "create_date": start + timedelta(days=7), "review": "plan check"})
+
+    conn.execute(text(f"""
+        INSERT INTO tb_users_emotions (nickname, create_date, {", ".join(EMOTIONS)}, latitude, longitude)
+        VALUES (:nickname, :create_date, {", ".join(":" + e for e in EMOTIONS)}, :latitude, :longitude)
+    """), emotions)
+    conn.execute(text("""
+        INSERT INTO tb_users_category_recommend (nickname, create_date, category_1, category_2, category_3)
+        VALUES (:nickname, :create_date, :c1, :c2, :c3)
+    """), categories)
+    conn.execute(text("""
+        INSERT INTO tb_users_parks_recommend (nickname, create_date, park_1, park_2, park_3, park_4, park_5, park_6)
+        VALUES (:nickname, :create_date, :p1, :p2, :p3, :p4, :p5, :p6)
+    """), parks)
+    conn.execute(text("""
+        INSERT INTO tb_weekly_review (nickname, create_date, review) VALUES (:nickname, :create_date, :review)
+    """), reviews)
+    conn.execute(text("""
+        INSERT INTO tb_parks_visit_log (nickname, park_id, create_date, visit_date)
+        VALUES (:nickname, :park_id, :create_date, NOW())
+    """), visits)
+    conn.execute(text("""
+        INSERT INTO tb_users_parks_status (nickname, park_id, is_visited, visit_count, visit_date)
+        VALUES (:nickname, :park_id, 1, 1, NOW())
+        ON DUPLICATE KEY UPDATE visit_count = visit_count + 1
+    """), visits)
+    conn.execute(text("""
+        INSERT INTO tb_users_weekly_items (nickname, week_start, kind, item, cnt)
+        VALUES (:nickname, :week_start, 'category', '숲', 3)
+    """), [{"nickname": n, "week_start": date(2025, 1, 6)} for n in USERS])
+    conn.execute(text("""
+        INSERT INTO tb_users_emotion_daily (nickname, day, checkins) VALUES (:nickname, :day, :checkins)
+    """), daily)
+    for table in SEEDED_TABLES:
+        conn.execute(text(f"ANALYZE TABLE {table}"))  # 채운 행을 통계에 반영
+
+
+def _cleanup(engine):
+    with engine.begin() as conn:
+        for table in SEEDED_TABLES:
+            conn.execute(text(f"DELETE FROM {table} WHERE nickname LIKE 'plan\\_check%'"))
+
+
+@pytest.fixture(scope="module")
+def seeded_db():
+    from backend import migrate
+    engine = create_engine(TEST_DATABASE_URL, future=True)
+    original = migrate.engine
+    migrate.engine = engine
+    try:
+        migrate.migrate()
+        with engine.connect() as conn:
+            park_ids = [r[0] for r in conn.execute(text("SELECT ID FROM tb_parks ORDER BY ID LIMIT 20"))]
+        if not park_ids:
+            pytest.skip("tb_parks 에 공원 데이터가 없습니다.")
+        _cleanup(engine)  # 이전 실행이 중간에 끊긴 경우
+        with engine.begin() as conn:
+            _seed(conn, park_ids)
+        yield migrate
+    finally:
+        _cleanup(engine)
+        migrate.engine = original
+        engine.dispose()
+
+
+def test_hot_queries_use_indexes(seeded_db):
+    problems = seeded_db.check_plans()
+    assert problems == [], "\n".join(problems)
@@ -0,0 +1,115 @@
+# python -m pytest tests/test_rate_limit.py
+import asyncio, threading, time
+import pytest
+import httpx
+from fastapi import Depends, FastAPI
+
+from backend import rate_limit
+from backend.rate_limit import MemoryBucketStore, RedisBucketStore, rate_limited
+
+
+@pytest.fixture
+def fake_redis_url():
+    fakeredis = pytest.importorskip("fakeredis")
+    pytest.importorskip("lupa")  # EVAL(Lua) 지원
+    server = fakeredis.TcpFakeServer(("127.0.0.1", 0), server_type="redis")
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    host, port = server.server_address
+    yield f"redis://{host}:{port}/0"
+    server.shutdown()
+    server.server_close()
+
+
+def test_redis_bucket_burst_then_retry_after(fake_redis_url):
+    store = RedisBucketStore(fake_redis_url)
+    results = [store.take("llm:/x:user:a", 1 / 20, 3) for _ in range(4)]
+    assert [allowed for allowed, _ in results] == [True, True, True, False]
+    assert 19 < results[-1][1] <= 20
+    # 다른 사용자는 따로 셈
+    assert store.take("llm:/x:user:b", 1 / 20, 3)[0]
+
+
+def test_redis_bucket_shared_between_stores(fake_redis_url):
+    """워커 두 개 = 저장소 두 개가 같은 버킷을 봄"""
+    a, b = RedisBucketStore(fake_redis_url), RedisBucketStore(fake_redis_url)
+    assert a.take("k", 1 / 20, 2)[0] and b.take("k", 1 / 20, 2)[0]
+    assert not a.take("k", 1 / 20, 2)[0]
+
+
+def test_redis_down_falls_back_to_memory():
+    store = RedisBucketStore("redis://127.0.0.1:1/0")
+    assert [store.take("k", 1 / 20, 2)[0] for _ in range(3)] == [True, True, False]
+
+
+class SlowStore(MemoryBucketStore):
+    """느린 Redis 흉내 (블로킹 소켓 I/O)"""
+    def take(self, key, rate, capacity):
+        time.sleep(0.3)
+        return super().take(key, rate, capacity)
+
+
+def test_dependency_does_not_block_event_loop(monkeypatch):
+    monkeypatch.setattr(rate_limit, "bucket_store", SlowStore())
+    app = FastAPI()
+
+    @app.post("/limited", dependencies=[Depends(rate_limited("recommend"))])
+    def limited():
+        return {"ok": True}
+
+    async def scenario():
+        gaps, stop = [], asyncio.Event()
+
+        async def ticker():
+            last = time.perf_counter()
+            while not stop.is_set():
+                await asyncio.sleep(0.01)
+                now = time.perf_counter()
+                gaps.append(now - last)
+                last = now
+
+        task = asyncio.create_task(ticker())
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+            responses = await asyncio.gather(*(client.post("/limited", params={"user_nickname": f"u{i}"})
+                                               for i in range(4)))
+        stop.set()
+        await task
+        return responses, max(gaps)
+
+    responses, max_gap = asyncio.run(scenario())
+    assert [r.status_code for r in responses] == [200] * 4
+    assert max_gap < 0.2  # take() 가 루프에서 돌면 0.3초 이상 멈춤
+
+
+def test_429_with_retry_after(monkeypatch):
+    monkeypatch.setattr(rate_limit, "bucket_store", MemoryBucketStore())
+    app = FastAPI()
+
+    @app.post("/limited", dependencies=[Depends(rate_limited("llm"))])
+    def limited():
+        return {"ok": True}
+
+    async def scenario():
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+            return [await client.post("/limited", json={"nickname": "a"}) for _ in range(4)]
+
+    responses = asyncio.run(scenario())
+    assert [r.status_code for r in responses] == [200, 200, 200, 429]
+    assert int(responses[-1].headers["Retry-After"]) >= 1
+
+
+def test_memory_store_cap_keeps_recent_buckets():
+    """키 상한을 넘으면 가장 오래 안 쓴 버킷만 지움 - 다른 종류(recommend) 요청이 llm 버킷을 초기화하지 않음"""
+    store = MemoryBucketStore(max_keys=3)
+    llm_rate, llm_capacity = rate_limit.LIMITS["llm"][:2]
+    rec_rate, rec_capacity = rate_limit.LIMITS["recommend"][:2]
+    for _ in range(llm_capacity):
+        assert store.take("llm:/x:user:a", llm_rate, llm_capacity)[0]
+    store.take("recommend:/y:user:b", rec_rate, rec_capacity)
+    store.take("recommend:/y:user:c", rec_rate, rec_capacity)
+    assert not store.take("llm:/x:user:a", llm_rate, llm_capacity)[0]  # 소진된 llm 버킷이 그대로 남아 있음
+    store.take("recommend:/y:user:d", rec_rate, rec_capacity)  # 가장 오래 안 쓴 b 가 지워짐
+    assert len(store._buckets) == 3 and "recommend:/y:user:b" not in store._buckets
+    assert not store.take("llm:/x:user:a", llm_rate, llm_capacity)[0]
@@ -0,0 +1,61 @@
+# python -m pytest tests/test_resp_client.py
+# RESP 클라이언트 재시도 (backend/resp_client.py) - 보내기 전 실패만 재시도, 응답 대기 중 실패는 그대로 실패
+import socket, threading
+import pytest
+
+from backend.resp_client import RespClient
+
+
+class LineServer:
+    """명령을 받은 횟수를 세고 reply 를 돌려주는 서버 (reply=None 이면 응답하지 않음)"""
+    def __init__(self, reply=None):
+        self.reply = reply
+        self.commands = 0
+        self._sock = socket.create_server(("127.0.0.1", 0))
+        self.url = "redis://127.0.0.1:%d/0" % self._sock.getsockname()[1]
+        threading.Thread(target=self._serve, daemon=True).start()
+
+    def _serve(self):
+        while True:
+            try:
+                conn, _ = self._sock.accept()
+            except OSError:
+                return
+            threading.Thread(target=self._handle, args=(conn,), daemon=True).start()
+
+    def _handle(self, conn):
+        with conn:
+            while conn.recv(4096):
+                self.commands += 1
+                if self.reply is not None:
+                    conn.sendall(self.reply)
+
+    def close(self):
+        self._sock.close()
+
+
+@pytest.fixture
+def server(request):
+    srv = LineServer(getattr(request, "param", None))
+    yield srv
+    srv.close()
+
+
+def test_read_timeout_is_not_retried(server):
+    """EVAL 을 보낸 뒤 응답 타임아웃 - 서버가 이미 실행했을 수 있으므로 한 번만 보냄"""
+    client = RespClient(server.url, timeout=0.2)
+    with pytest.raises(socket.timeout):
+        client.execute("EVAL", "return 1", 0)
+    assert server.commands == 1
+    assert client._sock is None  # 응답이 뒤늦게 와도 다음 명령과 섞이지 않도록 연결 폐기
+
+
+@pytest.mark.parametrize("server", [b"+PONG\r\n"], indirect=True)
+def test_send_failure_reconnects_once(server):
+    """끊긴 연결로 보내다 실패 - 명령이 나가지 않았으므로 재연결 후 재시도"""
+    client = RespClient(server.url, timeout=0.5)
+    stale = socket.socket()
+    stale.close()
+    client._sock = stale
+    assert client.execute("PING") == "PONG"
+    assert server.commands == 1
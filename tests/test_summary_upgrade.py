@@ -0,0 +1,160 @@
+# python -m pytest tests/test_summary_upgrade.py
+# 요약 지연 예산 → 로컬 요약 저장 → 나중에 LLM 요약으로 교체 (llm/summary_chain.py, llm/summary_upgrade.py)
+# DB 는 sqlite 로 흉내 (pymysql %s / NOW() / INTERVAL 만 바꿔서 실행)
+import json, sqlite3, time
+from unittest import mock
+import pytest
+from langchain_core.language_models.fake_chat_models import FakeListChatModel
+from langchain_core.output_parsers import JsonOutputParser
+from langchain_core.runnables import RunnableLambda
+
+import llm.summary_chain as summary_chain
+import llm.summary_upgrade as summary_upgrade
+from backend.circuit_breaker import CircuitBreaker
+from llm import client
+from llm.fake_openai import SUMMARY_CONTENT
+
+EMOTIONS = ("depression", "anxiety", "stress", "happiness", "achievement", "energy")
+
+SCHEMA = f"""
+CREATE TABLE tb_users_emotions (nickname TEXT, create_date TEXT, {", ".join(f"{e} INT" for e in EMOTIONS)});
+CREATE TABLE tb_users_category_recommend (nickname TEXT, create_date TEXT, category_1 TEXT, category_2 TEXT, category_3 TEXT);
+CREATE TABLE tb_users_parks_recommend (nickname TEXT, create_date TEXT, park_1 TEXT, park_2 TEXT, park_3 TEXT);
+CREATE TABLE tb_users_summary (nickname TEXT, Create_date TEXT, TopEmotions TEXT, EmotionsSummary TEXT,
+    RecommandCates TEXT, RecommandParks TEXT, NeedsUpgrade INT DEFAULT 0,
+    UpgradeAttempts INT NOT NULL DEFAULT 0, UpgradeNextAt TEXT NULL);
+"""
+
+
+class SqliteCursor:
+    def __init__(self, db):
+        self.db, self._cur = db, None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        pass
+
+    def execute(self, sql, params=()):
+        sql = (sql.replace("NOW() + INTERVAL %s SECOND", "datetime('now', '+' || %s || ' seconds')")
+                  .replace("NOW()", "datetime('now')").replace("%s", "?"))
+        self._cur = self.db.execute(sql, params)
+
+    def fetchone(self):
+        row = self._cur.fetchone()
+        return dict(row) if row else None
+
+    def fetchall(self):
+        return [dict(r) for r in self._cur.fetchall()]
+
+
+class SqliteConnection:
+    def __init__(self, db):
+        self.db = db
+
+    def cursor(self, *args):
+        return SqliteCursor(self.db)
+
+    def commit(self):
+        self.db.commit()
+
+    def close(self):
+        pass
+
+
+def _chain(response: str, delay: float = 0.0):
+    model = FakeListChatModel(responses=[response])
+    slow = RunnableLambda(lambda x: time.sleep(delay) or x)
+    return summary_chain.summary_prompt | slow | model | JsonOutputParser()
+
+
+GOOD = json.dumps(SUMMARY_CONTENT, ensure_ascii=False)
+
+
+@pytest.fixture
+def db(monkeypatch):
+    conn = sqlite3.connect(":memory:", check_same_thread=False)
+    conn.row_factory = sqlite3.Row
+    conn.executescript(SCHEMA)
+    for i, nickname in enumerate(("u1", "u2")):
+        when = f"2025-01-06 09:00:0{i}"
+        conn.execute("INSERT INTO tb_users_emotions VALUES (?, ?, 1, 2, 2, 5, 4, 4)", (nickname, when))
+        conn.execute("INSERT INTO tb_users_category_recommend VALUES (?, ?, '숲', '수변', NULL)", (nickname, when))
+        conn.execute("INSERT INTO tb_users_parks_recommend VALUES (?, ?, '공원A', '공원B', NULL)", (nickname, when))
+    connect = lambda: SqliteConnection(conn)
+    monkeypatch.setattr(summary_chain, "connect_raw", connect)
+    monkeypatch.setattr(summary_upgrade, "connect_raw", connect)
+    monkeypatch.setattr(summary_chain, "record_summary", lambda *args: None)  # 롤업은 여기서 다루지 않음
+    monkeypatch.setattr(summary_upgrade, "summary_upgrader", mock.Mock())
+    # 다른 테스트의 호출 기록이 섞이지 않도록 브레이커 새로
+    monkeypatch.setattr(client, "llm_breaker", CircuitBreaker("openai-test"))
+    yield conn
+    conn.close()
+
+
+def _summary_row(db, nickname):
+    return dict(db.execute("SELECT * FROM tb_users_summary WHERE nickname = ?", (nickname,)).fetchone())
+
+
+def test_slow_llm_stores_local_summary_then_upgrades(db, monkeypatch):
+    monkeypatch.setattr(summary_chain, "SUMMARY_BUDGET_SECONDS", 0.1)
+    monkeypatch.setattr(summary_chain, "get_summary_chain", lambda: _chain(GOOD, delay=1.0))
+    result = summary_chain.summary("u1")
+
+    assert result == summary_chain.local_summary(dict(zip(EMOTIONS, (1, 2, 2, 5, 4, 4))))
+    row = _summary_row(db, "u1")
+    assert row["NeedsUpgrade"] == 1
+    assert row["EmotionsSummary"] == result["emotions_summary"]
+    summary_upgrade.summary_upgrader.start.assert_called_once()
+
+    monkeypatch.setattr(summary_chain, "get_summary_chain", lambda: _chain(GOOD))
+    assert summary_upgrade.upgrade_pending() == {"fetched": 1, "upgraded": 1, "failed": 0, "more": False}
+    row = _summary_row(db, "u1")
+    assert row["NeedsUpgrade"] == 0
+    assert row["EmotionsSummary"] == SUMMARY_CONTENT["emotions_summary"]
+    assert json.loads(row["TopEmotions"]) == SUMMARY_CONTENT["top_emotions"]
+    assert summary_upgrade.upgrade_pending()["fetched"] == 0
+
+
+def test_fast_llm_needs_no_upgrade(db, monkeypatch):
+    monkeypatch.setattr(summary_chain, "get_summary_chain", lambda: _chain(GOOD))
+    assert summary_chain.summary("u1") == SUMMARY_CONTENT
+    assert _summary_row(db, "u1")["NeedsUpgrade"] == 0
+    summary_upgrade.summary_upgrader.start.assert_not_called()
+
+
+def _pending(db, *nicknames):
+    for nickname in nicknames:
+        db.execute("""INSERT INTO tb_users_summary (nickname, Create_date, TopEmotions, EmotionsSummary, NeedsUpgrade)
+                      SELECT nickname, create_date, '[]', 'local', 1 FROM tb_users_emotions WHERE nickname = ?""",
+                   (nickname,))
+
+
+def test_failed_upgrade_backs_off(db, monkeypatch):
+    _pending(db, "u1")
+    monkeypatch.setattr(summary_chain, "get_summary_chain", lambda: _chain("not json"))
+    assert summary_upgrade.upgrade_pending() == {"fetched": 1, "upgraded": 0, "failed": 1, "more": False}
+    row = _summary_row(db, "u1")
+    assert row["NeedsUpgrade"] == 1 and row["UpgradeAttempts"] == 1 and row["UpgradeNextAt"] is not None
+    # UpgradeNextAt 전에는 다시 가져오지 않음
+    assert summary_upgrade.upgrade_pending()["fetched"] == 0
+
+
+def test_gives_up_after_max_attempts(db, monkeypatch):
+    _pending(db, "u1")
+    db.execute("UPDATE tb_users_summary SET UpgradeAttempts = ?", (summary_upgrade.UPGRADE_MAX_ATTEMPTS,))
+    monkeypatch.setattr(summary_chain, "get_summary_chain", lambda: _chain(GOOD))
+    assert summary_upgrade.upgrade_pending()["fetched"] == 0
+    assert summary_upgrade.pending_count() == 0
+
+
+def test_open_breaker_makes_no_progress(db, monkeypatch):
+    """브레이커 open 이면 기록을 그대로 두고 more=False → 작업 스레드가 같은 배치를 다시 조회하며 돌지 않음"""
+    _pending(db, "u1", "u2")
+    breaker = CircuitBreaker("openai-test-open", open_seconds=60)
+    breaker._transition("open")
+    monkeypatch.setattr(client, "llm_breaker", breaker)
+    monkeypatch.setattr(summary_chain, "get_summary_chain", lambda: _chain(GOOD))
+    assert summary_upgrade.upgrade_pending(limit=2) == {"fetched": 2, "upgraded": 0, "failed": 0, "more": False}
+    assert summary_upgrade.pending_count() == 2